@@ -0,0 +1,111 @@
+# analytics.py
+
+import threading
+from collections import Counter
+from datetime import date
+from database import Database, task_source
+
+OPEN_STATUSES = ('Pending', 'Blocker', 'Inprogress')
+COMPLETED_STATUSES = ('Done', 'Closed')
+THROUGHPUT_WEEKS = 12
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def task_stats(db, include_archive=False, today=None):
+    """Aggregate one database in SQL.
+
+    Overdue means still open with a completion date before `today` (a date,
+    local today by default). Weekly throughput counts Done/Closed tasks by
+    completion week. Archived tasks are counted only with `include_archive`.
+    """
+    tasks = task_source(include_archive)
+    today = (today or date.today()).isoformat()
+    cursor = db.conn.cursor()
+    try:
+        cursor.execute(f'SELECT COUNT(*), AVG(progress_percentage) FROM {tasks}')
+        total, average_progress = cursor.fetchone()
+
+        def grouped(column):
+            cursor.execute(f'SELECT {column}, COUNT(*) FROM {tasks} GROUP BY {column} ORDER BY COUNT(*) DESC')
+            return {key if key is not None else '': count for key, count in cursor.fetchall()}
+
+        by_status = grouped('status')
+        by_assignee = grouped('assigned_to')
+        by_priority = grouped('priority')
+
+        placeholders = ', '.join('?' * len(OPEN_STATUSES))
+        cursor.execute(f'''
+        SELECT COUNT(*) FROM {tasks}
+        WHERE status IN ({placeholders}) AND completion_date < ?
+        ''', (*OPEN_STATUSES, today))
+        overdue = cursor.fetchone()[0]
+
+        placeholders = ', '.join('?' * len(COMPLETED_STATUSES))
+        cursor.execute(f'''
+        SELECT strftime('%Y-W%W', completion_date) AS week, COUNT(*) FROM {tasks}
+        WHERE status IN ({placeholders}) AND completion_date >= date(?, ?)
+        GROUP BY week ORDER BY week
+        ''', (*COMPLETED_STATUSES, today, f'-{THROUGHPUT_WEEKS * 7} days'))
+        weekly_completed = dict(cursor.fetchall())
+    finally:
+        cursor.close()
+
+    return {
+        'total': total,
+        'average_progress': average_progress or 0,
+        'overdue': overdue,
+        'by_status': by_status,
+        'by_assignee': by_assignee,
+        'by_priority': by_priority,
+        'weekly_completed': weekly_completed,
+    }
+
+
+def cached_stats(db, include_archive=False):
+    """task_stats, reused until the database's change counter moves or the day changes."""
+    # Overdue and throughput depend on the date, so a dashboard left open overnight must recount.
+    version = (db.change_cursor(), date.today())
+    key = (db.db_name, include_archive)
+    with _cache_lock:
+        hit = _cache.get(key)
+    if hit is not None and hit[0] == version:
+        return hit[1]
+    stats = task_stats(db, include_archive, version[1])
+    with _cache_lock:
+        _cache[key] = (version, stats)
+    return stats
+
+
+def combine_stats(all_stats):
+    combined = {'total': 0, 'overdue': 0}
+    progress_sum = 0
+    for key in ('by_status', 'by_assignee', 'by_priority', 'weekly_completed'):
+        combined[key] = Counter()
+    for stats in all_stats:
+        combined['total'] += stats['total']
+        combined['overdue'] += stats['overdue']
+        progress_sum += stats['average_progress'] * stats['total']
+        for key in ('by_status', 'by_assignee', 'by_priority', 'weekly_completed'):
+            combined[key].update(stats[key])
+    combined['average_progress'] = progress_sum / combined['total'] if combined['total'] else 0
+    for key in ('by_status', 'by_assignee', 'by_priority'):
+        combined[key] = dict(combined[key].most_common())
+    combined['weekly_completed'] = dict(sorted(combined['weekly_completed'].items()))
+    return combined
+
+
+def all_databases_stats(db, db_names):
+    """Combined stats for every database in `db_names`, reusing `db` for its own name."""
+    results = []
+    for name in db_names:
+        if name == db.db_name:
+            results.append(cached_stats(db))
+            continue
+        other = Database(name)
+        try:
+            results.append(cached_stats(other))
+        finally:
+            other.close()
+    return combine_stats(results)
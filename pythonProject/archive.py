@@ -0,0 +1,129 @@
+# archive.py
+"""Archive tier and database upkeep.
+
+Finished tasks older than the policy allows are moved from `tasks` into
+`tasks_archive` in the same file, a batch per transaction, so the active
+table (and every refresh of the task list) only holds work that is still
+live. Archived tasks keep their ids and can be searched, counted and
+analysed with `include_archive=True`, or moved back with unarchive.
+
+`run_maintenance` applies the policy, then refreshes the query planner
+statistics and compacts the file when enough of it is free pages. A
+`MaintenanceScheduler` runs it through the database executor about once a
+day; the last run is recorded in the `maintenance` table, so restarts do
+not repeat it. The scheduler only archives when asked to (TASK_MANAGER_AUTO_ARCHIVE=1
+for the app, `serve --auto-archive` for the API): the per-database task
+list shows active tasks only, so archiving on its own would hide them.
+"""
+import os
+import threading
+import time
+from database import NOW
+from instrumentation import profiler
+
+ARCHIVE_STATUSES = ('Closed', 'Done')
+ARCHIVE_AFTER_DAYS = 90
+# Tasks moved per transaction, so other connections are never locked out for long.
+ARCHIVE_BATCH = 5000
+
+MAINTENANCE_INTERVAL = 24 * 3600
+# How often (seconds) the scheduler checks whether maintenance is due.
+MAINTENANCE_CHECK = 600
+# VACUUM only when at least this share of the file is free pages.
+VACUUM_FREE_RATIO = 0.2
+
+
+def archive_old_tasks(db, statuses=ARCHIVE_STATUSES, days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH,
+                      progress=None):
+    """Move every task the policy covers into the archive and return how many moved."""
+    moved = 0
+    while True:
+        db.conn.commit()
+        db.cursor.execute('BEGIN IMMEDIATE')
+        try:
+            task_ids = db.archivable_ids(statuses, days, batch_size)
+            if task_ids:
+                db.archive_tasks(task_ids)
+            db.conn.commit()
+        except BaseException:
+            db.conn.rollback()
+            raise
+        if not task_ids:
+            return moved
+        db.tasks.invalidate(task_ids)
+        moved += len(task_ids)
+        if progress is not None:
+            progress(moved)
+
+
+def archive_counts(db):
+    """(active, archived) task counts."""
+    db.cursor.execute('SELECT (SELECT COUNT(*) FROM tasks), (SELECT COUNT(*) FROM tasks_archive)')
+    return db.cursor.fetchone()
+
+
+def free_ratio(db):
+    page_count = db.conn.execute('PRAGMA page_count').fetchone()[0]
+    freelist = db.conn.execute('PRAGMA freelist_count').fetchone()[0]
+    return freelist / page_count if page_count else 0
+
+
+def run_maintenance(db, vacuum=None, archive=True, **policy):
+    """Archive by policy (unless `archive` is False), ANALYZE, optimize the search indexes and VACUUM if worthwhile.
+
+    `vacuum` forces (True) or skips (False) the VACUUM; by default it runs
+    when VACUUM_FREE_RATIO of the file is free. Returns a dict of what was done.
+    """
+    report = {'archived': archive_old_tasks(db, **policy) if archive else 0}
+    start = time.perf_counter()
+    db.conn.commit()
+    for index in ('tasks_fts', 'tasks_archive_fts'):
+        db.cursor.execute(f"INSERT INTO {index} ({index}) VALUES ('optimize')")
+    db.cursor.execute('ANALYZE')
+    db.conn.commit()
+    report['analyze_s'] = time.perf_counter() - start
+    report['free_ratio'] = free_ratio(db)
+    if vacuum or (vacuum is None and report['free_ratio'] >= VACUUM_FREE_RATIO):
+        start = time.perf_counter()
+        db.cursor.execute('VACUUM')
+        report['vacuum_s'] = time.perf_counter() - start
+    db.cursor.execute(f"INSERT OR REPLACE INTO maintenance (name, ran_at) VALUES ('maintenance', {NOW})")
+    db.conn.commit()
+    report['active'], report['archive'] = archive_counts(db)
+    return report
+
+
+def maintenance_due(db, interval=MAINTENANCE_INTERVAL):
+    db.cursor.execute("SELECT ran_at FROM maintenance WHERE name = 'maintenance'")
+    row = db.cursor.fetchone()
+    return row is None or row[0] <= time.time() - interval
+
+
+def auto_archive_enabled():
+    """Whether TASK_MANAGER_AUTO_ARCHIVE asks the app's maintenance to archive by policy."""
+    return os.environ.get('TASK_MANAGER_AUTO_ARCHIVE', '') not in ('', '0')
+
+
+class MaintenanceScheduler:
+    """Runs `run_maintenance` on the executor's writer whenever it is due; archives only with `archive`."""
+
+    def __init__(self, executor, interval=MAINTENANCE_INTERVAL, check=MAINTENANCE_CHECK, archive=False):
+        self.executor = executor
+        self.archive = archive
+        self.interval = interval
+        self.check = check
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=f"maintenance-{executor.db_name}", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while not self.stopped.wait(self.check):
+            try:
+                if self.executor.submit_read(maintenance_due, self.interval).result():
+                    report = self.executor.submit(run_maintenance, archive=self.archive).result()
+                    profiler.log('maintenance', db=self.executor.db_name, report=report)
+            except Exception as e:
+                profiler.error('maintenance', f"{self.executor.db_name}: {e}")
+
+    def stop(self):
+        self.stopped.set()
@@ -0,0 +1,197 @@
+# artifacts.py
+"""Index of the test-result files that tasks point at.
+
+To the rest of the app `test_result_path` is just text. `scan_artifacts`
+stats every distinct path on a thread pool (file system calls release the
+GIL), reads only new or changed files to hash them and find a pass/fail
+verdict, and stores the result in the `artifacts` table keyed by path. A
+path whose size and mtime match its stored row is not read again, so
+rescanning an unchanged tree costs one stat per path.
+
+Relative paths are resolved against the database's directory. A directory
+counts as one artifact: its signature covers the files directly inside
+it, and its verdict combines theirs.
+
+`artifact_status` turns a task and its row into the status shown in the
+task list. ARTIFACT_STATUS in database.py applies the same rule in SQL
+for the filter.
+"""
+import hashlib
+import os
+import re
+import stat
+import time
+from calendar import timegm
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+SCAN_THREADS = 16
+# Paths per pool job; one future per path costs more than the stat itself.
+SCAN_CHUNK = 256
+HASH_CHUNK = 1024 * 1024
+# Bytes read from the start and the end of a file to find its verdict.
+SUMMARY_BYTES = 64 * 1024
+# Most files inside one result directory that are read for a verdict.
+DIRECTORY_FILES = 200
+# Rows saved per write, so the writer is never held for a whole scan.
+SAVE_BATCH = 1000
+
+ARTIFACT_STATUSES = ('Missing', 'Unreadable', 'Stale', 'Failed', 'Passed', 'Present', 'Unscanned')
+
+_JUNIT_SUITE = re.compile(rb'<testsuites?\b[^>]*>')
+_JUNIT_COUNT = re.compile(rb'\b(tests|failures|errors)="(\d+)"')
+# "3 failed, 10 passed" as pytest and many runners print it.
+_RUN_COUNTS = re.compile(rb'\b(\d+) (passed|failed|errors?)\b')
+_VERDICT_WORD = re.compile(rb'\b(FAIL(?:ED|URE)?|ERROR|PASS(?:ED)?|OK|SUCCESS)\b')
+
+
+def verdict(head, tail):
+    """('pass' | 'fail' | None, summary) from the start and the end of a result file."""
+    suite = _JUNIT_SUITE.search(head)
+    if suite:
+        counts = {name.decode(): int(value) for name, value in _JUNIT_COUNT.findall(suite.group())}
+        failed = counts.get('failures', 0) + counts.get('errors', 0)
+        return ('fail' if failed else 'pass'), f"{counts.get('tests', 0)} tests, {failed} failed"
+    # The last line that says something decides: runners print their summary at the end.
+    for line in reversed(tail.splitlines()):
+        counts = {}
+        for number, word in _RUN_COUNTS.findall(line):
+            key = b'failed' if word.startswith(b'error') else word
+            counts[key] = counts.get(key, 0) + int(number)
+        if counts:
+            failed = counts.get(b'failed', 0)
+            return ('fail' if failed else 'pass'), f"{counts.get(b'passed', 0)} passed, {failed} failed"
+        word = _VERDICT_WORD.search(line)
+        if word:
+            failed = word.group().startswith((b'FAIL', b'ERROR'))
+            return ('fail' if failed else 'pass'), line.strip()[:200].decode(errors='replace')
+    return None, ''
+
+
+def read_file(full_path):
+    """(hash, head, tail) of a file, reading it once in chunks."""
+    digest = hashlib.blake2b(digest_size=16)
+    head = tail = b''
+    with open(full_path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+            if len(head) < SUMMARY_BYTES:
+                head += chunk[:SUMMARY_BYTES - len(head)]
+            tail = (tail + chunk)[-SUMMARY_BYTES:]
+    return digest.hexdigest(), head, tail
+
+
+def inspect_file(path, full_path, st, known):
+    """The artifacts row for a file, or None when its size and mtime are unchanged."""
+    if known == ('file', st.st_size, st.st_mtime_ns):
+        return None
+    digest, head, tail = read_file(full_path)
+    result, summary = verdict(head, tail)
+    return path, 'file', st.st_size, st.st_mtime_ns, digest, result, summary, int(time.time())
+
+
+def inspect_directory(path, full_path, known):
+    entries = sorted(
+        (entry.name, entry.stat()) for entry in os.scandir(full_path) if entry.is_file(follow_symlinks=True)
+    )
+    size = sum(st.st_size for _, st in entries)
+    mtime_ns = max((st.st_mtime_ns for _, st in entries), default=os.stat(full_path).st_mtime_ns)
+    if known == ('dir', size, mtime_ns):
+        return None
+    listing = hashlib.blake2b(digest_size=16)
+    verdicts = []
+    for name, st in entries:
+        listing.update(f"{name}\0{st.st_size}\0{st.st_mtime_ns}\n".encode(errors='surrogateescape'))
+        if len(verdicts) < DIRECTORY_FILES:
+            _, head, tail = read_file(os.path.join(full_path, name))
+            verdicts.append(verdict(head, tail)[0])
+    failed, passed = verdicts.count('fail'), verdicts.count('pass')
+    result = 'fail' if failed else 'pass' if passed else None
+    summary = f"{len(entries)} files, {passed} passed, {failed} failed"
+    return path, 'dir', size, mtime_ns, listing.hexdigest(), result, summary, int(time.time())
+
+
+def inspect(path, base, known):
+    """The artifacts row for `path`, or None when it has not changed since `known` (kind, size, mtime_ns)."""
+    full_path = os.path.join(base, os.path.expanduser(path))
+    try:
+        st = os.stat(full_path)
+        if stat.S_ISDIR(st.st_mode):
+            return inspect_directory(path, full_path, known)
+        return inspect_file(path, full_path, st, known)
+    except (FileNotFoundError, NotADirectoryError):
+        if known is not None and known[0] == 'missing':
+            return None
+        return path, 'missing', None, None, None, None, '', int(time.time())
+    except OSError as e:
+        return path, 'error', None, None, None, None, str(e), int(time.time())
+
+
+def scan_artifacts(db, threads=SCAN_THREADS, progress=None, cancel=None, save=None):
+    """Index every test-result path the tasks reference; returns a summary dict.
+
+    `save(rows, removed)` stores a batch; by default it writes through `db`.
+    TaskStore passes one that goes through its writer instead.
+    """
+    if save is None:
+        def save(rows, removed):
+            db.save_artifacts(rows, removed)
+            db.conn.commit()
+    paths = db.artifact_paths()
+    known = db.artifact_signatures()
+    base = os.path.dirname(os.path.abspath(db.db_name))
+    referenced = set(paths)
+    removed = [path for path in known if path not in referenced]
+    summary = {'paths': len(paths), 'changed': 0, 'removed': len(removed)}
+    start = time.perf_counter()
+    batch = []
+    scanned = 0
+
+    def inspect_chunk(chunk):
+        if cancel is not None and cancel.is_set():
+            return []
+        return [row for row in (inspect(path, base, known.get(path)) for path in chunk) if row is not None]
+
+    chunks = [paths[i:i + SCAN_CHUNK] for i in range(0, len(paths), SCAN_CHUNK)]
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='artifact-scan') as pool:
+        for chunk, rows in zip(chunks, pool.map(inspect_chunk, chunks)):
+            if cancel is not None and cancel.is_set():
+                pool.shutdown(cancel_futures=True)
+                break
+            batch.extend(rows)
+            if len(batch) >= SAVE_BATCH:
+                save(batch, [])
+                summary['changed'] += len(batch)
+                batch = []
+            scanned += len(chunk)
+            if progress is not None:
+                progress(scanned)
+    save(batch, removed)
+    summary['changed'] += len(batch)
+    summary['seconds'] = time.perf_counter() - start
+    summary['cancelled'] = cancel is not None and cancel.is_set()
+    summary['statuses'] = db.artifact_status_counts()
+    return summary
+
+
+def artifact_status(task, info):
+    """The result status shown for `task`, given its artifacts (kind, mtime_ns, result) or None.
+
+    Missing and unreadable paths come first; a result older than the day the
+    task was assigned is stale, whatever it says.
+    """
+    if not task.test_result_path:
+        return ''
+    if info is None:
+        return 'Unscanned'
+    kind, mtime_ns, result = info
+    if kind == 'missing':
+        return 'Missing'
+    if kind == 'error':
+        return 'Unreadable'
+    if isinstance(task.assigned_date, date) and mtime_ns < timegm(task.assigned_date.timetuple()) * 10 ** 9:
+        return 'Stale'
+    return {'fail': 'Failed', 'pass': 'Passed'}.get(result, 'Present')
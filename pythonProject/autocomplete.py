@@ -0,0 +1,123 @@
+# autocomplete.py
+"""Suggestions for the task form: completions and possible duplicates.
+
+A `CompletionIndex` holds the distinct values of one column in a sorted
+list of normalized keys (case-folded, whitespace collapsed), so completing
+a prefix is a bisect plus a short scan, fast enough to run on the Tk
+thread on every key press. Spellings that normalize to the same key are
+counted together and the most common one is suggested, so "john " offers
+"John". The indexes are built once per database on a reader thread and
+then updated as the form saves values.
+
+`similar_tasks` looks up tasks sharing the typed title's words through the
+FTS index and keeps those whose trigrams mostly overlap with it.
+"""
+import heapq
+import threading
+from bisect import bisect_left, insort
+
+COMPLETION_FIELDS = ('task', 'assigned_to')
+# Suggestions shown under a field.
+COMPLETION_LIMIT = 8
+# Keys sharing a prefix that are ranked; a one-letter prefix can match thousands.
+COMPLETION_SCAN = 2000
+
+# Possible duplicates listed, the trigram overlap they need and the FTS hits they are picked from.
+DUPLICATE_LIMIT = 3
+DUPLICATE_SIMILARITY = 0.6
+DUPLICATE_CANDIDATES = 50
+
+
+def normalize(value):
+    return ' '.join(value.split()).casefold()
+
+
+class CompletionIndex:
+    """Prefix lookup over the distinct values of one column, with how often each is used."""
+
+    def __init__(self, counts=()):
+        self.variants = {}
+        for value, count in counts:
+            key = normalize(value)
+            if key:
+                spellings = self.variants.setdefault(key, {})
+                spellings[value.strip()] = spellings.get(value.strip(), 0) + count
+        self.keys = sorted(self.variants)
+        # (-uses, most used spelling) per key, so a lookup does not recount spellings.
+        self.ranked = {key: self.rank(spellings) for key, spellings in self.variants.items()}
+
+    @staticmethod
+    def rank(spellings):
+        return -sum(spellings.values()), max(spellings, key=spellings.get)
+
+    def add(self, value):
+        """Count one more use of `value`, as when a task is saved with it."""
+        key = normalize(value)
+        if not key:
+            return
+        if key not in self.variants:
+            insort(self.keys, key)
+            self.variants[key] = {}
+        spellings = self.variants[key]
+        spellings[value.strip()] = spellings.get(value.strip(), 0) + 1
+        self.ranked[key] = self.rank(spellings)
+
+    def canonical(self, value):
+        """The most used spelling of `value`, or `value` trimmed if it is new."""
+        key = normalize(value)
+        return self.ranked[key][1] if key in self.ranked else value.strip()
+
+    def complete(self, prefix, limit=COMPLETION_LIMIT):
+        """Up to `limit` values starting with `prefix`, most used first."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        start = bisect_left(self.keys, prefix)
+        matches = []
+        for key in self.keys[start:start + COMPLETION_SCAN]:
+            if not key.startswith(prefix):
+                break
+            if key != prefix:
+                matches.append((self.ranked[key], key))
+        return [best for (_, best), _ in heapq.nsmallest(limit, matches)]
+
+
+def load_completions(db, fields=COMPLETION_FIELDS):
+    """{field: CompletionIndex} built from the database's distinct values."""
+    return {field: CompletionIndex(db.value_counts(field)) for field in fields}
+
+
+_completions = {}
+_completions_lock = threading.Lock()
+
+
+def completions(executor):
+    """A future of the completion indexes for the executor's database, built once per process."""
+    with _completions_lock:
+        future = _completions.get(executor.db_name)
+        if future is None or (future.done() and future.exception() is not None):
+            future = _completions[executor.db_name] = executor.submit_read(load_completions)
+        return future
+
+
+def trigrams(value):
+    padded = f"  {normalize(value)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similar_tasks(db, text, exclude_id=None, limit=DUPLICATE_LIMIT, threshold=DUPLICATE_SIMILARITY):
+    """(similarity, id, task, status) of active tasks whose title nearly matches `text`, closest first.
+
+    Similarity is the share of trigrams the two titles have in common (Jaccard).
+    """
+    target = trigrams(text)
+    matches = []
+    for task_id, task, status in db.similar_candidates(text, DUPLICATE_CANDIDATES):
+        if task_id == exclude_id:
+            continue
+        other = trigrams(task)
+        score = len(target & other) / len(target | other)
+        if score >= threshold:
+            matches.append((score, task_id, task, status))
+    matches.sort(key=lambda match: (-match[0], match[1]))
+    return matches[:limit]
@@ -0,0 +1,904 @@
+# benchmark.py
+"""Timing harness for the Task Manager data and refresh paths.
+
+The data-layer benchmarks run anywhere; the Treeview ones need a display and
+are skipped without one (use a virtual one, e.g. ``xvfb-run python benchmark.py``).
+Databases come from synthetic_data with a fixed seed, so runs are comparable.
+
+    python benchmark.py --sizes 1000,10000 --json before.json
+    python benchmark.py --sizes 1000,10000 --json after.json --compare before.json
+
+With --compare, the exit status is 1 when any timing is more than
+--threshold slower than the baseline (and throughput likewise lower).
+"""
+
+import argparse
+import asyncio
+import csv
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import tkinter as tk
+from datetime import date
+from tkinter import ttk
+from analytics import cached_stats, task_stats
+from archive import ARCHIVE_AFTER_DAYS, archive_old_tasks, run_maintenance
+from artifacts import scan_artifacts
+from autocomplete import load_completions, similar_tasks
+from bulk_import import import_csv
+from change_feed import ChangeFeed
+from data_export import export_tasks
+from database import Database, TASK_FIELDS
+from db_executor import DatabaseExecutor
+from federation import Federation, DATABASE_FIELD, FEDERATED_LIMIT
+from instrumentation import profiler
+from reminders import ReminderScheduler
+from snapshots import create_snapshot, compare_snapshot, read_snapshot, restore_tasks
+from sorting import sort_tasks
+from synthetic_data import generate_database, synthetic_rows
+from task_store import ApiServer, TaskStore
+
+# Add 1000000 with --sizes for the large-file runs; generating it takes a while.
+SIZES = [1000, 10000, 100000]
+STATUSES = ['Done', 'Pending', 'Descoped', 'Blocker', 'Inprogress', 'Closed']
+SEED = 1
+# Generated dates are relative to this fixed day, so the data never drifts between runs.
+ANCHOR = date(2024, 12, 31)
+REGRESSION_THRESHOLD = 0.25
+# Timings under this many seconds in both runs are too noisy to call a regression.
+MIN_REGRESSION_SECONDS = 0.005
+
+# Metric suffixes and whether a bigger value is better; the first match wins.
+# Anything else (counts, sizes) is informational and never compared.
+METRIC_DIRECTIONS = [
+    ('_cpu_s_per_s', False),
+    ('_per_s', True),
+    ('_s', False),
+    ('_us', False),
+    ('_mb', False),
+    ('_per_task', False),
+]
+
+# Where the generated databases live, and which seed they use.
+data = {'dir': None, 'seed': SEED}
+
+
+def make_rows(count):
+    return synthetic_rows(count, data['seed'], ANCHOR)
+
+
+def write_csv(path, count):
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['Seq No', 'Assigned Date', 'Task', 'Status', 'Completion Date', 'Issue', 'Remark',
+                         'Test Result Path', 'Assigned To', 'Priority', 'Progress percentage'])
+        for seq_no, row in enumerate(make_rows(count), start=1):
+            writer.writerow([seq_no, *row])
+
+
+def create_database(path, count):
+    """Put a copy of the generated `count`-task database at `path`.db.
+
+    Each size is generated once per data directory and copied from then on,
+    so the large sizes cost their generation time only on the first run.
+    """
+    template = os.path.join(data['dir'], f"tasks_{count}_seed{data['seed']}")
+    if not os.path.exists(f"{template}.db"):
+        partial = f"{template}.partial"
+        generate_database(partial, count, data['seed'], ANCHOR)
+        os.replace(f"{partial}.db", f"{template}.db")
+    shutil.copyfile(f"{template}.db", f"{path}.db")
+
+
+def legacy_load_data(manager, db):
+    """The original delete-all/reinsert refresh, kept for comparison."""
+    tree = manager.tree
+    for item in tree.get_children():
+        tree.delete(item)
+    data = db.fetch_data()
+    visible_data = [row for row in data if row[3] != 'Closed']
+    for seq_no, row in enumerate(visible_data, start=1):
+        tree.insert('', 'end', values=(seq_no, *row[1:], row[0]))
+    for item in tree.get_children():
+        status = tree.item(item, 'values')[3]
+        tree.item(item, tags=manager.status_tag(status))
+
+
+def touch_rows(db, count):
+    db.cursor.execute(
+        # Step away from 100 rather than past it: the CHECK keeps progress within 0-100.
+        'UPDATE tasks SET progress_percentage = CASE WHEN progress_percentage < 100 '
+        'THEN progress_percentage + 1 ELSE progress_percentage - 1 END '
+        'WHERE id IN (SELECT id FROM tasks ORDER BY RANDOM() LIMIT ?)', (count,)
+    )
+    db.conn.commit()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def bench_query(workdir, count):
+    path = os.path.join(workdir, f"query_{count}")
+    create_database(path, count)
+    db = Database(path)
+    # The page 90% of the way down the active tasks by assignee, as a windowed view scrolled there.
+    deep_sort = [('assigned_to', False)]
+    total, keys = db.page_bounds(200, deep_sort, exclude_status='Closed')
+    deep_page = int(len(keys) * 0.9)
+
+    def legacy_filter_sort():
+        rows = [row for row in db.fetch_data() if row[3] == 'Blocker']
+        rows.sort(key=lambda row: str(row[10]))
+
+    def legacy_search():
+        [row for row in db.fetch_data() if 'deploy' in row[2].lower() or 'deploy' in row[3].lower()]
+
+    result = {
+        'tasks': count,
+        'py_filter_sort_s': timed(legacy_filter_sort),
+        'sql_filter_sort_s': timed(lambda: db.query(order_by='progress_percentage', limit=200, status='Blocker')),
+        'sql_sort_page_s': timed(lambda: db.query(order_by='task', limit=200)),
+        'sql_multi_sort_page_s': timed(lambda: db.query(order_by=[('status', False), ('completion_date', True)],
+                                                        limit=200)),
+        'page_bounds_s': timed(lambda: db.page_bounds(200, deep_sort, exclude_status='Closed')),
+        'deep_page_offset_s': timed(lambda: db.query(order_by=deep_sort, limit=200, offset=(deep_page + 1) * 200,
+                                                     exclude_status='Closed')),
+        'deep_page_keyset_s': timed(lambda: db.query(order_by=deep_sort, limit=200,
+                                                     after=keys[deep_page] if keys else None,
+                                                     exclude_status='Closed')),
+        'memory_multi_sort_s': timed(sort_tasks, db.query_tasks(),
+                                     [('assigned_to', False), ('progress_percentage', True)]),
+        'py_search_s': timed(legacy_search),
+        'sql_search_page_s': timed(lambda: db.query(limit=200, text='deploy')),
+        'fts_search_s': timed(lambda: db.search('deploy')),
+        'fts_search_page_s': timed(lambda: db.search('depl', limit=200)),
+        'fts_selective_s': timed(lambda: db.search('"memory leak" billing')),
+    }
+    db.close()
+    return result
+
+
+def legacy_import(db, file_path):
+    """The original row-at-a-time import, one commit per row."""
+    with open(file_path, 'r') as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader)
+        for row in reader:
+            db.insert_data(row[1:])
+
+
+def bench_import(workdir, count):
+    csv_path = os.path.join(workdir, f"import_{count}.csv")
+    write_csv(csv_path, count)
+
+    result = {'tasks': count}
+    for label, func in (('row_by_row_import_s', legacy_import), ('bulk_import_s', import_csv)):
+        db = Database(os.path.join(workdir, f"import_{label}_{count}"))
+        result[label] = timed(func, db, csv_path)
+        db.close()
+    return result
+
+
+def bench_export(workdir, count):
+    path = os.path.join(workdir, f"export_{count}")
+    create_database(path, count)
+    db = Database(path)
+
+    def legacy_export(file_path):
+        with open(file_path, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            for seq_no, row in enumerate(db.fetch_data(), start=1):
+                writer.writerow([seq_no, *row[1:]])
+
+    columns = [('Seq No', None)] + [(field, field) for field in TASK_FIELDS[1:]]
+    result = {'tasks': count}
+    for label, func in (
+        ('fetchall_csv', lambda: legacy_export(os.path.join(workdir, 'legacy.csv'))),
+        ('stream_csv', lambda: export_tasks(db, os.path.join(workdir, 'out.csv'), columns)),
+        ('stream_jsonl_gz', lambda: export_tasks(db, os.path.join(workdir, 'out.jsonl.gz'), columns)),
+    ):
+        result[f'{label}_s'] = timed(func)
+        tracemalloc.start()
+        func()
+        result[f'{label}_peak_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    db.close()
+    return result
+
+
+def bench_analyze(workdir, count):
+    path = os.path.join(workdir, f"analyze_{count}")
+    create_database(path, count)
+    db = Database(path)
+
+    def legacy_analyze():
+        status_count = dict.fromkeys(STATUSES, 0)
+        for row in db.fetch_data():
+            status_count[row[3]] += 1
+
+    result = {
+        'tasks': count,
+        'python_count_s': timed(legacy_analyze),
+        'sql_stats_s': timed(task_stats, db),
+        'cached_stats_first_s': timed(cached_stats, db),
+        'cached_stats_repeat_s': timed(cached_stats, db),
+    }
+    db.close()
+    return result
+
+
+def traced_bytes(func):
+    """Bytes still allocated by the value `func` returns."""
+    tracemalloc.start()
+    value = func()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del value
+    return size
+
+
+def bench_model_memory(workdir, count):
+    """Python memory per task: raw sqlite3 tuples versus typed Task objects."""
+    path = os.path.join(workdir, f"model_{count}")
+    create_database(path, count)
+    db = Database(path)
+    tuple_bytes = traced_bytes(db.query)
+    task_bytes = traced_bytes(db.query_tasks)
+    db.close()
+    return {'tasks': count, 'tuple_bytes_per_task': tuple_bytes / count, 'task_bytes_per_task': task_bytes / count}
+
+
+def rss_bytes():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def bench_tree_memory(root, workdir, count):
+    """Resident memory per task of the Treeview items holding the full table (Linux only)."""
+    path = os.path.join(workdir, f"tree_memory_{count}")
+    create_database(path, count)
+    db = Database(path)
+    rows = db.query()
+    tree = ttk.Treeview(root, columns=TASK_FIELDS, show='headings')
+    before = rss_bytes()
+    for seq_no, row in enumerate(rows, start=1):
+        tree.insert('', 'end', values=(seq_no, *row[1:], row[0]))
+    tk_bytes = rss_bytes() - before
+    tree.destroy()
+    db.close()
+    return {'tasks': count, 'tk_item_bytes_per_task': tk_bytes / count}
+
+
+def bench_migrate(workdir, count):
+    """Upgrade a pre-versioning file (no search index, untyped columns) to the current schema."""
+    from migrations import migrate
+    path = os.path.join(workdir, f"migrate_{count}")
+    legacy = sqlite3.connect(f"{path}.db")
+    legacy.execute("""
+    CREATE TABLE tasks (id INTEGER PRIMARY KEY, assigned_date TEXT, task TEXT, status TEXT, completion_date TEXT,
+                        issue TEXT, remark TEXT, test_result_path TEXT, assigned_to TEXT, priority TEXT,
+                        progress_percentage INTEGER)
+    """)
+    legacy.executemany(f"INSERT INTO tasks ({', '.join(TASK_FIELDS[1:])}) VALUES ({', '.join('?' * 10)})",
+                       make_rows(count))
+    legacy.commit()
+    legacy.close()
+    db = Database(path, upgrade=False)
+    result = {'tasks': count}
+    for label, dry_run in (('dry_run', True), ('migrate', False)):
+        start = time.perf_counter()
+        steps = migrate(db, dry_run=dry_run)
+        result[f'{label}_s'] = time.perf_counter() - start
+    for version, description, seconds, details in steps:
+        result[f'v{version}_s'] = seconds
+    db.close()
+    return result
+
+
+def bench_reminders(workdir, count):
+    """Schedule `count` reminders due within a second and time until all have fired."""
+    path = os.path.join(workdir, f"reminders_{count}")
+    Database(path).close()
+    executor = DatabaseExecutor(path)
+    scheduler = ReminderScheduler(executor)
+    start = time.perf_counter()
+    for i in range(count):
+        scheduler.add(i, f"Task {i}", (i % 100) / 100)
+    executor.submit(lambda db: None).result()
+    scheduled = time.perf_counter() - start
+    fired = 0
+    while fired < count:
+        fired += len(scheduler.drain())
+        time.sleep(0.01)
+    result = {'reminders': count, 'schedule_s': scheduled, 'all_fired_s': time.perf_counter() - start,
+              'threads': threading.active_count()}
+    scheduler.stop()
+    executor.shutdown()
+    return result
+
+
+def api_requests(port, requests):
+    """Send `requests` (method, path, body) over one keep-alive connection; return the error count."""
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    errors = 0
+    for method, path, body in requests:
+        connection.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        errors += response.status >= 400
+    connection.close()
+    return errors
+
+
+def bench_api(workdir, count, requests=4000, clients=8):
+    """Requests per second through the HTTP API: point reads, filtered pages, then creates and updates."""
+    path = os.path.join(workdir, f"api_{count}")
+    create_database(path, count)
+    store = TaskStore(path)
+    loop = asyncio.new_event_loop()
+    server = ApiServer(store, port=0)
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    rnd = random.Random(1)
+    task = json.dumps({'assigned_date': '2024-05-01', 'task': 'API task', 'status': 'Pending'})
+    mixes = {
+        'read': lambda i: ('GET', f"/tasks/{rnd.randint(1, count)}", None) if i % 2 else
+                          ('GET', f"/tasks?status={rnd.choice(STATUSES)}&limit=20", None),
+        'write': lambda i: ('POST', '/tasks', task) if i % 2 else
+                           ('PATCH', f"/tasks/{rnd.randint(1, count)}", json.dumps({'progress_percentage': i % 101})),
+    }
+    result = {'tasks': count, 'clients': clients}
+    for name, make_request in mixes.items():
+        batches = [[make_request(i) for i in range(n, requests, clients)] for n in range(clients)]
+        errors = []
+        workers = [threading.Thread(target=lambda b=batch: errors.append(api_requests(server.port, b)))
+                   for batch in batches]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        result[f'{name}_per_s'] = requests / (time.perf_counter() - start)
+        result[f'{name}_errors'] = sum(errors)
+
+    asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+    store.close()
+    return result
+
+
+def bench_change_feed(workdir, count, writes=20):
+    """Latency from a commit on an unrelated connection to the feed callback, and the feed's idle CPU cost."""
+    path = os.path.join(workdir, f"feed_{count}")
+    create_database(path, count)
+    feed = ChangeFeed(path)
+    feed.ready.wait()
+    seen = threading.Event()
+    feed.subscribe(lambda cursor, changes: seen.set())
+    writer = sqlite3.connect(f"{path}.db")
+    latencies = []
+    for i in range(writes):
+        seen.clear()
+        start = time.perf_counter()
+        writer.execute('UPDATE tasks SET progress_percentage = ? WHERE id = ?', (i, i + 1))
+        writer.commit()
+        seen.wait(5)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+    cpu = time.process_time()
+    time.sleep(1)
+    idle_cpu = time.process_time() - cpu
+    feed.stop()
+    latencies.sort()
+    return {'tasks': count, 'median_latency_s': latencies[len(latencies) // 2], 'max_latency_s': latencies[-1],
+            'idle_cpu_s_per_s': idle_cpu}
+
+
+def bench_bulk(workdir, count, selected=5000):
+    """Closing out a selection: one write per task vs one undoable bulk transaction, and the undo."""
+    path = os.path.join(workdir, f"bulk_{count}")
+    create_database(path, count)
+    task_ids = list(range(1, min(count, selected) + 1))
+    db = Database(path)
+
+    def legacy_updates():
+        for task_id in task_ids:
+            db.execute_query('UPDATE tasks SET status = ? WHERE id = ?', ('Closed', task_id))
+
+    store = TaskStore(path)
+    result = {
+        'tasks': count,
+        'selected': len(task_ids),
+        'commit_per_row_s': timed(legacy_updates),
+        'bulk_update_s': timed(lambda: store.bulk_update(task_ids, {'status': 'Done'}).result()),
+        'undo_update_s': timed(lambda: store.undo().result()),
+        'bulk_delete_s': timed(lambda: store.bulk_delete(task_ids).result()),
+        'undo_delete_s': timed(lambda: store.undo().result()),
+    }
+    store.close()
+    db.close()
+    return result
+
+
+def bench_archive(workdir, count):
+    """Default task-list query and refresh scan before and after archiving finished tasks."""
+    path = os.path.join(workdir, f"archive_{count}")
+    create_database(path, count)
+    db = Database(path)
+
+    def active_view():
+        db.query(exclude_status='Closed')
+        db.fetch_changes(0, exclude_status='Closed')
+
+    result = {'tasks': count, 'active_view_before_s': timed(active_view)}
+    # The data is dated around ANCHOR, so age the policy by the days since then.
+    days = ARCHIVE_AFTER_DAYS + (date.today() - ANCHOR).days
+    result['archive_s'] = timed(lambda: result.__setitem__('archived', archive_old_tasks(db, days=days)))
+    result['active_view_after_s'] = timed(active_view)
+    result['search_with_archive_s'] = timed(lambda: db.search('login', include_archive=True))
+    result['stats_with_archive_s'] = timed(task_stats, db, True)
+    result['maintenance_s'] = timed(run_maintenance, db, True)
+    db.close()
+    return result
+
+
+def bench_profiler(workdir, count, lookups=20000):
+    """Cost of the query instrumentation per point lookup: plain cursor, profiling off, profiling on."""
+    path = os.path.join(workdir, f"profiler_{count}")
+    create_database(path, count)
+    db = Database(path)
+    ids = [random.randint(1, count) for _ in range(lookups)]
+
+    def lookups_with(cursor):
+        for task_id in ids:
+            cursor.execute('SELECT task FROM tasks WHERE id = ?', (task_id,))
+            cursor.fetchall()
+
+    plain = db.conn.cursor(sqlite3.Cursor)
+    result = {'tasks': count, 'plain_us': timed(lookups_with, plain) / lookups * 1e6,
+              'profiling_off_us': timed(lookups_with, db.cursor) / lookups * 1e6}
+    profiler.enable(log_path=None)
+    result['profiling_on_us'] = timed(lookups_with, db.cursor) / lookups * 1e6
+    profiler.disable()
+    profiler.reset()
+    db.close()
+    return result
+
+
+def bench_artifacts(workdir, count, files=20000):
+    """Indexing test-result files: first scan, rescan of an unchanged tree, and filtering on the status."""
+    path = os.path.join(workdir, f"artifacts_{count}")
+    create_database(path, count)
+    db = Database(path)
+    files = min(files, count)
+    # Point the first tasks at real files next to the database; every tenth one is missing.
+    db.cursor.execute("UPDATE tasks SET test_result_path = 'results/' || id || '.log' WHERE id <= ?", (files,))
+    db.conn.commit()
+    os.makedirs(os.path.join(workdir, 'results'))
+    for task_id in range(1, files + 1):
+        if task_id % 10:
+            with open(os.path.join(workdir, 'results', f"{task_id}.log"), 'w') as f:
+                f.write(f"== {task_id % 7 == 0:d} failed, {task_id % 50} passed in 0.5s ==\n")
+    result = {
+        'tasks': count,
+        'files': files,
+        'first_scan_s': timed(scan_artifacts, db),
+        'rescan_s': timed(scan_artifacts, db),
+        'filter_failed_s': timed(lambda: db.query(artifact='Failed', limit=200)),
+        'status_counts_s': timed(db.artifact_status_counts),
+    }
+    db.close()
+    return result
+
+
+def bench_snapshot(workdir, count, changed=1000):
+    """A snapshot taken while another thread keeps committing, then compare and restore against it.
+
+    `max_stall_s` is the worst lateness of a 1 ms timer on a third thread,
+    standing in for the Tk event loop; `max_write_s` is the slowest commit.
+    """
+    path = os.path.join(workdir, f"snapshot_{count}")
+    create_database(path, count)
+    stop = threading.Event()
+    stalls, writes = [0.0], [0.0]
+
+    def tick():
+        while not stop.is_set():
+            start = time.perf_counter()
+            time.sleep(0.001)
+            stalls[0] = max(stalls[0], time.perf_counter() - start - 0.001)
+
+    def write():
+        db = Database(path)
+        n = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            db.cursor.execute('UPDATE tasks SET remark = ? WHERE id = ?', (f"edit {n}", n % count + 1))
+            db.conn.commit()
+            writes[0] = max(writes[0], time.perf_counter() - start)
+            n += 1
+            time.sleep(0.005)
+        db.close()
+
+    threads = [threading.Thread(target=tick), threading.Thread(target=write)]
+    for thread in threads:
+        thread.start()
+    snapshot = {}
+    result = {'tasks': count, 'db_mb': os.path.getsize(f"{path}.db") / 1e6}
+    result['snapshot_s'] = timed(lambda: snapshot.setdefault('path', create_snapshot(path, if_changed=False)))
+    stop.set()
+    for thread in threads:
+        thread.join()
+    result['max_stall_s'] = stalls[0]
+    result['max_write_s'] = writes[0]
+    result['snapshot_mb'] = os.path.getsize(snapshot['path']) / 1e6
+    db = Database(path)
+    changed = min(changed, count)
+    db.cursor.execute("UPDATE tasks SET status = 'Blocker' WHERE id <= ?", (changed,))
+    db.conn.commit()
+    result['read_snapshot_s'] = timed(read_snapshot, snapshot['path'])
+    result['compare_s'] = timed(compare_snapshot, db, snapshot['path'])
+    rows = read_snapshot(snapshot['path'])
+    result['restore_s'] = timed(restore_tasks, db, rows)
+    db.conn.commit()
+    db.close()
+    return result
+
+
+def bench_autocomplete(workdir, count, lookups=200):
+    """Building the task form's completion indexes, then completing prefixes and looking up duplicates."""
+    path = os.path.join(workdir, f"autocomplete_{count}")
+    create_database(path, count)
+    db = Database(path)
+    indexes = {}
+    result = {'tasks': count, 'build_s': timed(lambda: indexes.update(load_completions(db)))}
+    titles = [row[0] for row in db.cursor.execute('SELECT task FROM tasks ORDER BY random() LIMIT ?', (lookups,))]
+    prefixes = [title[:length] for title in titles for length in (1, 4, 12)]
+    result['complete_us'] = timed(lambda: [indexes['task'].complete(prefix) for prefix in prefixes]) / len(prefixes) * 1e6
+    result['similar_s'] = timed(lambda: [similar_tasks(db, title) for title in titles]) / len(titles)
+    db.close()
+    return result
+
+
+def bench_federation(workdir, count, databases=4):
+    """First page of the "All projects" view: open-and-sort each database in turn vs the parallel merge."""
+    names = [os.path.join(workdir, f"federation_{count}_{i}") for i in range(databases)]
+    for name in names:
+        create_database(name, count)
+
+    def legacy_all_projects():
+        rows = []
+        for name in names:
+            db = Database(name)
+            rows.extend((name, *row) for row in db.fetch_data())
+            db.close()
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows[:FEDERATED_LIMIT]
+
+    federation = Federation(names)
+    export_path = os.path.join(workdir, f"federation_{count}.csv")
+    columns = [('Database', DATABASE_FIELD), *((field, field) for field in TASK_FIELDS)]
+    result = {
+        'tasks': count * databases,
+        'databases': databases,
+        'sequential_sort_s': timed(legacy_all_projects),
+        'federated_query_first_s': timed(federation.query, 'assigned_date', True),
+        'federated_query_s': timed(federation.query, 'assigned_date', True),
+        'federated_count_s': timed(federation.count_tasks),
+        'federated_search_s': timed(federation.search, 'login'),
+        'federated_export_s': timed(lambda: export_tasks(federation, export_path, columns, order_by='assigned_date')),
+    }
+    federation.close()
+    return result
+
+
+def bench_refresh(root, workdir, count, changed=10):
+    from task_manager import TaskManager
+    path = os.path.join(workdir, f"refresh_{count}")
+    create_database(path, count)
+    frame = ttk.Frame(root)
+    manager = TaskManager(frame, path, windowed=False)
+    manager.parent.after_cancel(manager.refresh_job)
+    db = Database(path)
+
+    # The app runs the SQL on its worker thread; here both halves run inline
+    # so the timing covers the whole refresh.
+    def incremental():
+        manager.apply_changes(db.fetch_task_changes(manager.change_cursor, **manager.view_filters()))
+
+    before = timed(legacy_load_data, manager, db)
+    manager.show_rows((db.change_cursor(), db.query_tasks(**manager.view_filters())))
+    touch_rows(db, changed)
+    after = timed(incremental)
+    idle = timed(incremental)
+
+    manager.store.close()
+    db.close()
+    frame.destroy()
+    return {'tasks': count, 'full_reload_s': before, f'incremental_{changed}_s': after, 'no_change_s': idle}
+
+
+def bench_sort(root, workdir, count):
+    """Clicking a column header: reading, sorting and moving each item vs the typed sort relinked in one call."""
+    from task_manager import TaskManager
+    path = os.path.join(workdir, f"sort_{count}")
+    create_database(path, count)
+    frame = ttk.Frame(root)
+    manager = TaskManager(frame, path, windowed=False)
+    manager.parent.after_cancel(manager.refresh_job)
+    manager.show_rows(manager.reload_future.result())
+    tree = manager.tree
+
+    def legacy_sort(col):
+        items = [(tree.set(item, col), item) for item in tree.get_children('')]
+        items.sort()
+        for index, (_, item) in enumerate(items):
+            tree.move(item, '', index)
+        for item in tree.get_children():
+            tree.item(item, tags=manager.status_tag(tree.item(item, 'values')[3]))
+
+    result = {
+        'tasks': len(manager.tasks),
+        'legacy_sort_s': timed(legacy_sort, 'Progress percentage'),
+        'sort_s': timed(manager.sort_column, 'Progress percentage'),
+        'reverse_s': timed(manager.sort_column, 'Progress percentage'),
+        'add_key_s': timed(lambda: manager.sort_column('Assigned To', extend=True)),
+    }
+    manager.store.close()
+    frame.destroy()
+    return result
+
+
+def bench_open(root, workdir, count):
+    from task_manager import TaskManager
+    path = os.path.join(workdir, f"open_{count}")
+    create_database(path, count)
+    result = {'tasks': count}
+    for windowed in (False, True):
+        frame = ttk.Frame(root)
+        start = time.perf_counter()
+        manager = TaskManager(frame, path, windowed=windowed)
+        if not windowed:
+            manager.show_rows(manager.reload_future.result())
+        else:
+            # Until the first page is on screen; the count and page load on a reader.
+            while not any(row is not None for row in manager.view.slot_rows.values()):
+                root.update()
+        root.update_idletasks()
+        result['windowed_open_s' if windowed else 'full_open_s'] = time.perf_counter() - start
+        manager.parent.after_cancel(manager.refresh_job)
+        manager.store.close()
+        frame.destroy()
+    return result
+
+
+def bench_startup(root, workdir, count, tabs=4):
+    """Time until the first tab is usable: every tab built up front vs. lazily."""
+    from main import create_notebook
+    from task_manager import TaskManager
+    names = [os.path.join(workdir, f"startup_{count}_{i}") for i in range(tabs)]
+    for name in names:
+        create_database(name, count)
+
+    window = tk.Toplevel(root)
+    start = time.perf_counter()
+    eager = [TaskManager(ttk.Frame(window), name, db_names=names) for name in names]
+    window.update()
+    result = {'tasks_per_tab': count, 'eager_all_tabs_s': time.perf_counter() - start}
+    for manager in eager:
+        manager.stop_auto_refresh()
+        manager.store.close(wait=False)
+    window.destroy()
+
+    window = tk.Toplevel(root)
+    start = time.perf_counter()
+    notebook = create_notebook(window, names)
+    while notebook.loader.active is None:
+        window.update()
+    result['lazy_first_tab_s'] = time.perf_counter() - start
+    notebook.loader.active.stop_auto_refresh()
+    window.destroy()
+    return result
+
+
+def bench_import_latency(root, workdir, count):
+    """Worst Tk event-loop stall while `count` rows are imported in the background."""
+    from task_manager import TaskManager
+    csv_path = os.path.join(workdir, f"latency_{count}.csv")
+    write_csv(csv_path, count)
+
+    frame = ttk.Frame(root)
+    manager = TaskManager(frame, os.path.join(workdir, f"latency_{count}"), windowed=True)
+    manager.parent.after_cancel(manager.refresh_job)
+    future = manager.executor.submit(import_csv, csv_path)
+    worst, last = 0.0, time.perf_counter()
+    while not future.done():
+        root.update()
+        now = time.perf_counter()
+        worst, last = max(worst, now - last), now
+    future.result()
+    manager.store.close()
+    frame.destroy()
+    return {'tasks': count, 'import_worst_ui_stall_s': worst}
+
+
+# (name, function, fixed size or None to run at every size)
+DATA_BENCHMARKS = [
+    ('query', bench_query, None),
+    ('import', bench_import, None),
+    ('export', bench_export, None),
+    ('analyze', bench_analyze, None),
+    ('model_memory', bench_model_memory, None),
+    ('migrate', bench_migrate, None),
+    ('reminders', bench_reminders, 10000),
+    ('api', bench_api, None),
+    ('change_feed', bench_change_feed, None),
+    ('federation', bench_federation, None),
+    ('bulk', bench_bulk, None),
+    ('archive', bench_archive, None),
+    ('profiler', bench_profiler, None),
+    ('artifacts', bench_artifacts, None),
+    ('snapshot', bench_snapshot, None),
+    ('autocomplete', bench_autocomplete, None),
+]
+UI_BENCHMARKS = [
+    ('refresh', bench_refresh, None),
+    ('sort', bench_sort, None),
+    ('open', bench_open, None),
+    ('import_latency', bench_import_latency, None),
+    ('startup', bench_startup, None),
+    ('tree_memory', bench_tree_memory, None),
+]
+
+
+def report(result, name=None):
+    values = ', '.join(f"{k}={v:.4f}" if isinstance(v, float) else f"{k}={v}" for k, v in result.items())
+    print(f"{name}: {values}" if name else values)
+
+
+def median_result(runs):
+    """Per-metric median of repeated runs, so one noisy run does not decide a comparison."""
+    return {key: statistics.median(run[key] for run in runs) if isinstance(runs[0][key], (int, float)) else runs[0][key]
+            for key in runs[0]}
+
+
+def metric_direction(metric):
+    for suffix, higher_is_better in METRIC_DIRECTIONS:
+        if metric.endswith(suffix):
+            return higher_is_better
+    return None
+
+
+def compare_results(baseline, current, threshold=REGRESSION_THRESHOLD, min_seconds=MIN_REGRESSION_SECONDS):
+    """(name, size, metric, before, after, change) for every metric that got worse by more than `threshold`."""
+    regressions = []
+    for name, sizes in current['results'].items():
+        for size, metrics in sizes.items():
+            before_metrics = baseline['results'].get(name, {}).get(size, {})
+            for metric, after in metrics.items():
+                before = before_metrics.get(metric)
+                higher_is_better = metric_direction(metric)
+                if higher_is_better is None or not isinstance(before, (int, float)) or before <= 0:
+                    continue
+                if metric.endswith('_s') and not higher_is_better and max(before, after) < min_seconds:
+                    continue
+                change = after / before - 1
+                if (-change if higher_is_better else change) > threshold:
+                    regressions.append((name, size, metric, before, after, change))
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(benchmarks, sizes, repeat, workdir, results, root=None):
+    for name, func, fixed_size in benchmarks:
+        for count in [fixed_size] if fixed_size else sizes:
+            runs = []
+            for attempt in range(repeat):
+                # A fresh directory per run, so no run sees files an earlier one left behind.
+                rundir = tempfile.mkdtemp(prefix=f"{name}_{count}_{attempt}_", dir=workdir)
+                runs.append(func(rundir, count) if root is None else func(root, rundir, count))
+                shutil.rmtree(rundir, ignore_errors=True)
+            result = median_result(runs)
+            report(result, name)
+            results.setdefault(name, {})[str(count)] = result
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Time the Task Manager data and UI paths on synthetic databases")
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)),
+                        help="comma-separated task counts, e.g. 1000,10000,100000,1000000")
+    parser.add_argument('--only', help="comma-separated benchmark names to run (default: all)")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per benchmark; the median is reported")
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--data-dir', help="keep generated databases here and reuse them on later runs")
+    parser.add_argument('--json', help="write the results to this file")
+    parser.add_argument('--compare', help="baseline results file; exit 1 on regressions")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="allowed relative slowdown before a metric counts as a regression")
+    parser.add_argument('--min-seconds', type=float, default=MIN_REGRESSION_SECONDS,
+                        help="ignore timings below this in both runs")
+    parser.add_argument('--no-ui', action='store_true', help="skip the Treeview benchmarks")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(',')]
+    only = set(args.only.split(',')) if args.only else None
+    selected = [entry for entry in DATA_BENCHMARKS if only is None or entry[0] in only]
+    ui_selected = [] if args.no_ui else [entry for entry in UI_BENCHMARKS if only is None or entry[0] in only]
+    if not os.path.exists('/proc/self/statm'):
+        ui_selected = [entry for entry in ui_selected if entry[0] != 'tree_memory']
+    data['seed'] = args.seed
+    output = {
+        'meta': {
+            'commit': git_commit(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'sizes': sizes,
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'results': {},
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        data['dir'] = args.data_dir or workdir
+        os.makedirs(data['dir'], exist_ok=True)
+        run_benchmarks(selected, sizes, args.repeat, workdir, output['results'])
+        if ui_selected:
+            try:
+                root = tk.Tk()
+            except tk.TclError:
+                root = None
+                print("No display available; skipping Treeview benchmarks.")
+            if root is not None:
+                root.withdraw()
+                run_benchmarks(ui_selected, sizes, args.repeat, workdir, output['results'], root)
+                root.destroy()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(output, f, indent=2)
+        print(f"Results written to {args.json}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, output, args.threshold, args.min_seconds)
+        for name, size, metric, before, after, change in regressions:
+            print(f"REGRESSION {name}[{size}] {metric}: {before:.4f} -> {after:.4f} ({change:+.0%})")
+        print(f"{len(regressions)} regressions against {args.compare} "
+              f"(commit {baseline['meta'].get('commit') or 'unknown'})")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
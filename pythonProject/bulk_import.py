@@ -0,0 +1,129 @@
+# bulk_import.py
+
+import csv
+import sqlite3
+from datetime import date, datetime
+from database import INSERT_TASK
+from models import STATUSES, PRIORITIES
+
+DATE_FORMATS = ('%Y-%m-%d', '%Y/%m/%d', '%d-%m-%Y', '%d/%m/%Y')
+BATCH_SIZE = 1000
+
+_STATUS_LOOKUP = {status.lower(): status for status in STATUSES}
+_PRIORITY_LOOKUP = {priority.lower(): priority for priority in PRIORITIES}
+
+
+def parse_date(value, required=False):
+    if not value:
+        if required:
+            raise ValueError("date is required")
+        return ''
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS[1:]:
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            pass
+    raise ValueError(f"unrecognised date '{value}'")
+
+
+def parse_status(value):
+    try:
+        return _STATUS_LOOKUP[value.lower()]
+    except KeyError:
+        raise ValueError(f"unknown status '{value}'") from None
+
+
+def parse_priority(value):
+    """The canonical priority name for `value` (any case); empty means no priority."""
+    if not value:
+        return ''
+    try:
+        return _PRIORITY_LOOKUP[value.lower()]
+    except KeyError:
+        raise ValueError(f"unknown priority '{value}' (expected {', '.join(PRIORITIES)})") from None
+
+
+def parse_progress(value):
+    try:
+        progress = int(float(value.rstrip('%') or 0))
+    except ValueError:
+        raise ValueError(f"progress '{value}' is not a number") from None
+    if not 0 <= progress <= 100:
+        raise ValueError(f"progress {progress} is outside 0-100")
+    return progress
+
+
+def normalize_row(row):
+    """Validate one exported CSV row (Seq No first) and return the values to insert."""
+    if len(row) < 11:
+        raise ValueError(f"expected 11 columns, got {len(row)}")
+    (assigned_date, task, status, completion_date, issue, remark,
+     test_result_path, assigned_to, priority, progress) = (value.strip() for value in row[1:11])
+    if not task:
+        raise ValueError("task is required")
+    return (
+        parse_date(assigned_date, required=True), task, parse_status(status), parse_date(completion_date),
+        issue, remark, test_result_path, assigned_to, parse_priority(priority), parse_progress(progress)
+    )
+
+
+def read_batches(reader, batch_size, errors):
+    batch = []
+    for row in reader:
+        try:
+            batch.append((reader.line_num, normalize_row(row)))
+        except ValueError as e:
+            errors.append((reader.line_num, str(e)))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def insert_batch(db, batch, errors):
+    # Each batch gets a savepoint: a failing batch is rolled back and retried
+    # row by row, so one bad row is reported instead of aborting the import.
+    db.cursor.execute('SAVEPOINT import_batch')
+    try:
+        db.cursor.executemany(INSERT_TASK, [values for _, values in batch])
+        inserted = len(batch)
+    except sqlite3.Error:
+        db.cursor.execute('ROLLBACK TO import_batch')
+        inserted = 0
+        for line_num, values in batch:
+            try:
+                db.cursor.execute(INSERT_TASK, values)
+                inserted += 1
+            except sqlite3.Error as e:
+                errors.append((line_num, str(e)))
+    db.cursor.execute('RELEASE import_batch')
+    return inserted
+
+
+def import_csv(db, file_path, batch_size=BATCH_SIZE, progress=None):
+    """Stream a CSV export into `db` in one transaction.
+
+    Returns (inserted count, [(line number, error), ...]). `progress`, if
+    given, is called with (inserted, rejected) after every batch. The change
+    log and search index are filled once at the end rather than per row.
+    """
+    inserted, errors = 0, []
+    watermark = db.begin_bulk_insert()
+    try:
+        with open(file_path, 'r', newline='', encoding='utf-8-sig') as csvfile:
+            reader = csv.reader(csvfile)
+            next(reader, None)
+            for batch in read_batches(reader, batch_size, errors):
+                inserted += insert_batch(db, batch, errors)
+                if progress is not None:
+                    progress(inserted, len(errors))
+        db.finish_bulk_insert(watermark)
+    except BaseException:
+        db.conn.rollback()
+        raise
+    return inserted, errors
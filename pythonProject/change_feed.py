@@ -0,0 +1,81 @@
+# change_feed.py
+
+import threading
+from database import Database
+from instrumentation import profiler
+
+# Seconds between PRAGMA data_version checks.
+FEED_INTERVAL = 0.05
+# Change-log entries read per query while catching up.
+FEED_BATCH = 5000
+
+
+class ChangeFeed:
+    """Tells subscribers about commits to one database, from this process or any other.
+
+    A thread with its own connection polls PRAGMA data_version, which only
+    moves when some other connection commits, so an idle database costs one
+    tiny query per interval. When it moves, the new task_changes entries are
+    read and every subscriber is called as `callback(cursor, changes)` with
+    the latest change-log seq and a list of (task_id, op) pairs. Callbacks run
+    on the feed thread and must not block or touch Tk.
+    """
+
+    def __init__(self, db_name, interval=FEED_INTERVAL):
+        self.db_name = db_name
+        self.interval = interval
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.cursor = None
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=f"feed-{db_name}", daemon=True)
+        self.thread.start()
+
+    def subscribe(self, callback):
+        with self.lock:
+            self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
+
+    def run(self):
+        db = Database(self.db_name, upgrade=False)
+        try:
+            db.check_schema()
+            self.cursor = db.change_cursor()
+            version = db.data_version()
+            self.ready.set()
+            while not self.stopped.wait(self.interval):
+                current = db.data_version()
+                if current == version:
+                    continue
+                version = current
+                self.publish(db)
+        except Exception as e:
+            profiler.error('change_feed', f"{self.db_name} stopped: {e}")
+        finally:
+            self.ready.set()
+            db.close()
+
+    def publish(self, db):
+        while True:
+            entries = db.changes_since(self.cursor, FEED_BATCH)
+            if not entries:
+                return
+            self.cursor = entries[-1][0]
+            changes = [(task_id, op) for _, task_id, op in entries]
+            with self.lock:
+                subscribers = list(self.subscribers)
+            for callback in subscribers:
+                try:
+                    callback(self.cursor, changes)
+                except Exception as e:
+                    profiler.error('change_feed', f"subscriber failed: {e}")
+            if len(entries) < FEED_BATCH:
+                return
+
+    def stop(self):
+        self.stopped.set()
@@ -0,0 +1,57 @@
+# dashboard.py
+
+import tkinter as tk
+from tkinter import ttk
+from db_executor import deliver
+
+
+class Dashboard(tk.Toplevel):
+    """Analytics window with a page for each (title, future) in `pages`.
+
+    Each future resolves to a dict shaped like analytics.task_stats.
+    """
+
+    def __init__(self, parent, pages):
+        super().__init__(parent)
+        self.title("Task Analytics")
+        self.geometry('900x600')
+        notebook = ttk.Notebook(self)
+        notebook.pack(fill='both', expand=True)
+
+        for title, future in pages:
+            frame = ttk.Frame(notebook, padding=10)
+            notebook.add(frame, text=title)
+            status = ttk.Label(frame, text="Loading...")
+            status.grid(row=0, column=0, columnspan=2, sticky='w')
+            deliver(self, future, lambda stats, frame=frame: self.show(frame, stats),
+                    lambda e, status=status: status.config(text=f"Analysis failed: {e}"))
+
+    def show(self, frame, stats):
+        for child in frame.winfo_children():
+            child.destroy()
+        summary = (f"Total tasks: {stats['total']}    Average progress: {stats['average_progress']:.1f}%    "
+                   f"Overdue: {stats['overdue']}")
+        ttk.Label(frame, text=summary, font=("Helvetica", 12)).grid(row=0, column=0, columnspan=2, sticky='w', pady=5)
+
+        tables = [
+            ("Status", stats['by_status']),
+            ("Assigned To", stats['by_assignee']),
+            ("Priority", stats['by_priority']),
+            ("Completed per week", stats['weekly_completed']),
+        ]
+        for i, (title, counts) in enumerate(tables):
+            self.create_table(frame, title, counts, 1 + i // 2, i % 2)
+        for column in (0, 1):
+            frame.grid_columnconfigure(column, weight=1)
+        for row in (1, 2):
+            frame.grid_rowconfigure(row, weight=1)
+
+    def create_table(self, frame, title, counts, row, column):
+        tree = ttk.Treeview(frame, columns=(title, 'Count'), show='headings', height=8)
+        tree.heading(title, text=title)
+        tree.heading('Count', text='Count')
+        tree.column('Count', width=80, anchor='e')
+        for key, count in counts.items():
+            tree.insert('', 'end', values=(key or '(none)', count))
+        tree.grid(row=row, column=column, sticky='nsew', padx=5, pady=5)
+        return tree
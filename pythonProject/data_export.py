@@ -0,0 +1,72 @@
+# data_export.py
+
+import csv
+import gzip
+import json
+import os
+
+EXPORT_BATCH = 1000
+
+FILE_TYPES = [
+    ("CSV files", "*.csv"),
+    ("JSON Lines", "*.jsonl"),
+    ("Compressed CSV", "*.csv.gz"),
+    ("Compressed JSON Lines", "*.jsonl.gz"),
+    ("All files", "*.*"),
+]
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def open_output(file_path):
+    if file_path.endswith('.gz'):
+        return gzip.open(file_path, 'wt', newline='', encoding='utf-8')
+    return open(file_path, 'w', newline='', encoding='utf-8')
+
+
+def export_format(file_path):
+    base = file_path[:-3] if file_path.endswith('.gz') else file_path
+    return 'jsonl' if base.endswith(('.jsonl', '.json')) else 'csv'
+
+
+def export_tasks(db, file_path, columns, progress=None, cancel=None, **query):
+    """Stream matching tasks to `file_path` and return the number of rows written.
+
+    `columns` is a list of (header, field) pairs; a field of None writes a
+    running sequence number (one such column at most). The format follows
+    the extension: .csv or .jsonl, optionally gzip-compressed with a trailing
+    .gz. `query` takes the same filters and ordering as Database.stream.
+    Setting the `cancel` event stops the export, removes the partial file and
+    raises ExportCancelled.
+    """
+    headers = [header for header, _ in columns]
+    fields = [field for _, field in columns if field is not None]
+    seq_index = next((i for i, (_, field) in enumerate(columns) if field is None), None)
+    as_json = export_format(file_path) == 'jsonl'
+    written = 0
+    try:
+        with open_output(file_path) as output:
+            writer = None if as_json else csv.writer(output)
+            if writer is not None:
+                writer.writerow(headers)
+            for rows in db.stream(fields or ('id',), EXPORT_BATCH, **query):
+                if cancel is not None and cancel.is_set():
+                    raise ExportCancelled()
+                if not fields:
+                    rows = [()] * len(rows)
+                if seq_index is not None:
+                    rows = [(*row[:seq_index], n, *row[seq_index:]) for n, row in enumerate(rows, start=written + 1)]
+                if as_json:
+                    output.writelines(json.dumps(dict(zip(headers, row))) + '\n' for row in rows)
+                else:
+                    writer.writerows(rows)
+                written += len(rows)
+                if progress is not None:
+                    progress(written)
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    return written
@@ -1,30 +1,215 @@
 # database.py
 
+import json
+import re
 import sqlite3
+from instrumentation import ProfiledConnection, profiler
+from models import task_cache
+
+TASK_FIELDS = (
+    'id', 'assigned_date', 'task', 'status', 'completion_date', 'issue', 'remark',
+    'test_result_path', 'assigned_to', 'priority', 'progress_percentage'
+)
+
+TASK_COLUMNS = ', '.join(TASK_FIELDS)
+
+# Columns that hold NULL rather than '' when empty.
+NULLABLE_FIELDS = ('assigned_date', 'completion_date', 'priority')
+
+# Seconds since the epoch, as stored in created_at/updated_at.
+NOW = "CAST(strftime('%s', 'now') AS INTEGER)"
+
+INSERT_TASK = '''
+INSERT INTO tasks (assigned_date, task, status, completion_date, issue, remark, test_result_path, assigned_to, priority, progress_percentage)
+VALUES (NULLIF(?, ''), ?, ?, NULLIF(?, ''), ?, ?, ?, ?, NULLIF(?, ''), ?)
+'''
+
+UPDATE_TASK = f'''
+UPDATE tasks
+SET assigned_date = NULLIF(?, ''), task = ?, status = ?, completion_date = NULLIF(?, ''), issue = ?, remark = ?, test_result_path = ?, assigned_to = ?, priority = NULLIF(?, ''), progress_percentage = ?, updated_at = {NOW}
+WHERE id = ?
+'''
+
+DELETE_TASK = 'DELETE FROM tasks WHERE id = ?'
+
+# WHERE condition matching the ids in one JSON array parameter.
+IDS_IN = 'id IN (SELECT value FROM json_each(?))'
+
+# Both tiers as one table, for reads with include_archive; aliased to `tasks`
+# so filters and ordering apply unchanged.
+WITH_ARCHIVE = f'(SELECT {TASK_COLUMNS} FROM tasks UNION ALL SELECT {TASK_COLUMNS} FROM tasks_archive) AS tasks'
+
+# Puts deleted tasks back under their old ids, as undo does. The parameter is
+# a JSON array of [*TASK_FIELDS, created_at] rows; a null id assigns a new one.
+RESTORE_TASKS = f'''
+INSERT INTO tasks ({TASK_COLUMNS}, created_at)
+SELECT {', '.join(f"json_extract(value, '$[{i}]')" for i in range(len(TASK_FIELDS) + 1))}
+FROM json_each(?)
+'''
+
+# Rows similar_candidates lets FTS5 rank at most, choosing the rarest words to stay under it.
+SIMILAR_MAX_MATCHES = 50000
+
+# Undoable batches kept per database; older ones are dropped.
+UNDO_LIMIT = 20
+
+# The test-result status of the task row in scope, as artifacts.artifact_status
+# computes it in Python. Columns are unqualified so it works under any alias.
+ARTIFACT_STATUS = '''CASE
+    WHEN test_result_path = '' THEN ''
+    ELSE COALESCE((
+        SELECT CASE
+            WHEN a.kind = 'missing' THEN 'Missing'
+            WHEN a.kind = 'error' THEN 'Unreadable'
+            WHEN a.mtime_ns < CAST(strftime('%s', assigned_date) AS INTEGER) * 1000000000 THEN 'Stale'
+            WHEN a.result = 'fail' THEN 'Failed'
+            WHEN a.result = 'pass' THEN 'Passed'
+            ELSE 'Present'
+        END
+        FROM artifacts AS a WHERE a.path = test_result_path
+    ), 'Unscanned')
+END'''
+
+
+def update_fields_query(fields, where='id = ?'):
+    """UPDATE statement setting just `fields` of one task; parameters are the values, then the id."""
+    unknown = [field for field in fields if field not in TASK_FIELDS[1:]]
+    if unknown or not fields:
+        raise ValueError(f"Unknown column: {', '.join(unknown)}" if unknown else "No columns to update")
+    assignments = [f"{field} = NULLIF(?, '')" if field in NULLABLE_FIELDS else f'{field} = ?' for field in fields]
+    return f"UPDATE tasks SET {', '.join(assignments)}, updated_at = {NOW} WHERE {where}"
+
+
+# Columns that sort by their lookup-table rank (High before Medium before Low) rather than by name.
+RANKED_FIELDS = {'priority': 'priorities'}
+
+
+def sort_spec(order_by='id', descending=False):
+    """[(field, descending), ...] for `order_by`, a field name or already such a list."""
+    spec = [(order_by, descending)] if isinstance(order_by, str) else [(field, bool(desc)) for field, desc in order_by]
+    for field, _ in spec:
+        if field not in TASK_FIELDS:
+            raise ValueError(f"Unknown column: {field}")
+    return spec or [('id', False)]
+
+
+def task_source(include_archive=False):
+    return WITH_ARCHIVE if include_archive else 'tasks'
+
+
+def qualified_columns(alias):
+    return ', '.join(f'{alias}.{field}' for field in TASK_FIELDS)
+
 
 class Database:
-    def __init__(self, db_name):
+    def __init__(self, db_name, upgrade=True):
         self.db_name = db_name
-        self.conn = sqlite3.connect(f'{self.db_name}.db', check_same_thread=False)
+        self.conn = sqlite3.connect(f'{self.db_name}.db', check_same_thread=False, factory=ProfiledConnection)
         self.cursor = self.conn.cursor()
-        self.create_table()
+        # WAL lets the UI connection keep reading while the worker thread writes.
+        self.cursor.execute('PRAGMA journal_mode=WAL')
+        self.cursor.execute('PRAGMA synchronous=NORMAL')
+        self.tasks = task_cache(db_name)
+        if upgrade:
+            self.create_table()
 
     def create_table(self):
+        """Create or upgrade the schema; see migrations.py."""
+        from migrations import migrate
+        migrate(self)
+
+    def check_schema(self):
+        """Raise RuntimeError unless the schema is current, for connections that must not migrate it."""
+        from migrations import check_version
+        check_version(self)
+
+    def create_change_log(self):
+        # One row per task id; REPLACE moves the row to a new seq so the log
+        # stays bounded and "changed since seq N" is a single range scan.
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS task_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id INTEGER NOT NULL UNIQUE,
+            op TEXT NOT NULL
+        )
+        ''')
+        for name, event, op, ref in (
+            ('tasks_log_insert', 'INSERT', 'I', 'NEW'),
+            ('tasks_log_update', 'UPDATE', 'U', 'NEW'),
+            ('tasks_log_delete', 'DELETE', 'D', 'OLD'),
+        ):
+            self.cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON tasks
+            BEGIN
+                INSERT OR REPLACE INTO task_changes (task_id, op) VALUES ({ref}.id, '{op}');
+            END
+            ''')
+
+    def create_search_index(self):
+        # External-content FTS5 index over the free-text columns, kept in
+        # sync by triggers. Existing databases are backfilled on first open.
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'tasks_fts'")
+        exists = self.cursor.fetchone() is not None
         self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS tasks (
-            id INTEGER PRIMARY KEY,
-            assigned_date TEXT,
-            task TEXT,
-            status TEXT,
-            completion_date TEXT,
-            issue TEXT,
-            remark TEXT,
-            test_result_path TEXT,
-            assigned_to TEXT,
-            priority TEXT,
-            progress_percentage INTEGER
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            task, issue, remark, status, content='tasks', content_rowid='id'
         )
         ''')
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (rowid, task, issue, remark, status)
+            VALUES (NEW.id, NEW.task, NEW.issue, NEW.remark, NEW.status);
+        END
+        ''')
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, task, issue, remark, status)
+            VALUES ('delete', OLD.id, OLD.task, OLD.issue, OLD.remark, OLD.status);
+        END
+        ''')
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF task, issue, remark, status ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, task, issue, remark, status)
+            VALUES ('delete', OLD.id, OLD.task, OLD.issue, OLD.remark, OLD.status);
+            INSERT INTO tasks_fts (rowid, task, issue, remark, status)
+            VALUES (NEW.id, NEW.task, NEW.issue, NEW.remark, NEW.status);
+        END
+        ''')
+        if not exists:
+            self.cursor.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+
+    def rebuild_search_index(self):
+        self.execute_query("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+
+    def begin_bulk_insert(self):
+        """Open a write transaction with the per-row insert triggers suspended.
+
+        Returns the id watermark for finish_bulk_insert. DDL is transactional,
+        so other connections never see the triggers missing.
+        """
+        self.conn.commit()
+        self.cursor.execute('BEGIN IMMEDIATE')
+        self.cursor.execute('SELECT COALESCE(MAX(id), 0) FROM tasks')
+        watermark = self.cursor.fetchone()[0]
+        self.cursor.execute('DROP TRIGGER IF EXISTS tasks_log_insert')
+        self.cursor.execute('DROP TRIGGER IF EXISTS tasks_fts_insert')
+        return watermark
+
+    def finish_bulk_insert(self, watermark):
+        """Log and index every row inserted since `watermark` set-wise, restore the triggers and commit."""
+        self.cursor.execute(
+            "INSERT OR REPLACE INTO task_changes (task_id, op) SELECT id, 'I' FROM tasks WHERE id > ?",
+            (watermark,)
+        )
+        self.cursor.execute('''
+        INSERT INTO tasks_fts (rowid, task, issue, remark, status)
+        SELECT id, task, issue, remark, status FROM tasks WHERE id > ?
+        ''', (watermark,))
+        self.create_change_log()
+        self.create_search_index()
         self.conn.commit()
 
     def execute_query(self, query, params=()):
@@ -32,33 +217,541 @@ class Database:
             self.cursor.execute(query, params)
             self.conn.commit()
         except sqlite3.Error as e:
-            print(f"An error occurred: {e}")
+            profiler.error('database', e)
             self.conn.rollback()
 
+    def execute_write(self, query, params=()):
+        """Like execute_query, but a failure is rolled back and raised; returns the cursor."""
+        try:
+            self.cursor.execute(query, params)
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        return self.cursor
+
     def insert_data(self, data):
-        self.execute_query('''
-        INSERT INTO tasks (assigned_date, task, status, completion_date, issue, remark, test_result_path, assigned_to, priority, progress_percentage)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', data)
+        self.execute_query(INSERT_TASK, data)
 
     def update_data(self, data):
-        self.execute_query('''
-        UPDATE tasks
-        SET assigned_date = ?, task = ?, status = ?, completion_date = ?, issue = ?, remark = ?, test_result_path = ?, assigned_to = ?, priority = ?, progress_percentage = ?
-        WHERE id = ?
-        ''', data)
-        self.notify_change()
+        self.execute_query(UPDATE_TASK, data)
+        self.tasks.invalidate([data[-1]])
 
     def delete_data(self, task_id):
-        self.execute_query('DELETE FROM tasks WHERE id = ?', (task_id,))
-        self.notify_change()
+        self.execute_query(DELETE_TASK, (task_id,))
+        self.tasks.invalidate([task_id])
+
+    def update_tasks(self, task_ids, changes):
+        """Apply one dict of `changes` to every task in `task_ids`; returns (changed ids, inverse batch).
+
+        Runs inside the caller's transaction and does not commit.
+        """
+        fields = list(changes)
+        self.cursor.execute(f'SELECT id, created_at, {", ".join(fields)} FROM tasks '
+                            f'WHERE {IDS_IN}', (json.dumps(list(task_ids)),))
+        old = self.cursor.fetchall()
+        ids = [row[0] for row in old]
+        self.cursor.execute(update_fields_query(fields, IDS_IN), (*changes.values(), json.dumps(ids)))
+        return ids, {'update': {'fields': fields, 'rows': old}}
+
+    def delete_tasks(self, task_ids):
+        """Delete every task in `task_ids`; returns (deleted ids, inverse batch). Does not commit."""
+        self.cursor.execute(f'SELECT {TASK_COLUMNS}, created_at FROM tasks '
+                            f'WHERE {IDS_IN}', (json.dumps(list(task_ids)),))
+        old = self.cursor.fetchall()
+        ids = [row[0] for row in old]
+        self.cursor.execute(f'DELETE FROM tasks WHERE {IDS_IN}', (json.dumps(ids),))
+        return ids, {'insert': old}
+
+    def archive_tasks(self, task_ids):
+        """Move tasks to tasks_archive; returns (moved ids, inverse batch). Does not commit."""
+        ids = json.dumps(list(task_ids))
+        self.cursor.execute(f'''
+        INSERT INTO tasks_archive ({TASK_COLUMNS}, created_at, updated_at)
+        SELECT {TASK_COLUMNS}, created_at, updated_at FROM tasks WHERE {IDS_IN}
+        ''', (ids,))
+        self.cursor.execute(f'SELECT id FROM tasks WHERE {IDS_IN}', (ids,))
+        moved = [row[0] for row in self.cursor.fetchall()]
+        self.cursor.execute(f'DELETE FROM tasks WHERE {IDS_IN}', (ids,))
+        return moved, {'unarchive': moved}
+
+    def unarchive_tasks(self, task_ids):
+        """Move archived tasks back into tasks; returns (moved ids, inverse batch). Does not commit."""
+        ids = json.dumps(list(task_ids))
+        self.cursor.execute(f'''
+        INSERT INTO tasks ({TASK_COLUMNS}, created_at, updated_at)
+        SELECT {TASK_COLUMNS}, created_at, updated_at FROM tasks_archive WHERE {IDS_IN}
+        ''', (ids,))
+        self.cursor.execute(f'SELECT id FROM tasks_archive WHERE {IDS_IN}', (ids,))
+        moved = [row[0] for row in self.cursor.fetchall()]
+        self.cursor.execute(f'DELETE FROM tasks_archive WHERE {IDS_IN}', (ids,))
+        return moved, {'archive': moved}
+
+    def archivable_ids(self, statuses, days, limit=None):
+        """Ids of tasks in `statuses` completed (or, without a date, last changed) more than `days` ago."""
+        placeholders = ', '.join('?' * len(statuses))
+        self.cursor.execute(f'''
+        SELECT id FROM tasks
+        WHERE status IN ({placeholders})
+        AND COALESCE(completion_date, date(updated_at, 'unixepoch')) <= date('now', ?)
+        LIMIT ?
+        ''', (*statuses, f'-{days} days', -1 if limit is None else limit))
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def record_batch(self, description, inverse):
+        """Store the inverse of a bulk change so `undo_batch` can revert it; returns the batch id."""
+        self.cursor.execute('INSERT INTO task_batches (description, inverse) VALUES (?, ?)',
+                            (description, json.dumps(inverse)))
+        batch_id = self.cursor.lastrowid
+        self.cursor.execute('DELETE FROM task_batches WHERE id <= ?', (batch_id - UNDO_LIMIT,))
+        return batch_id
+
+    def undo_batch(self, batch_id=None):
+        """Revert the latest (or the given) batch; returns (description, affected ids), or None if there is none.
+
+        Tasks edited again since the batch are overwritten with their values
+        from before it; deleted tasks whose id has been reused come back under
+        a new id. Does not commit.
+        """
+        if batch_id is None:
+            self.cursor.execute('SELECT id, description, inverse FROM task_batches ORDER BY id DESC LIMIT 1')
+        else:
+            self.cursor.execute('SELECT id, description, inverse FROM task_batches WHERE id = ?', (batch_id,))
+        batch = self.cursor.fetchone()
+        if batch is None:
+            return None
+        batch_id, description, inverse = batch
+        inverse = json.loads(inverse)
+        ids = []
+        if 'delete' in inverse:
+            ids.extend(self.delete_tasks(inverse['delete'])[0])
+        if 'insert' in inverse:
+            rows = inverse['insert']
+            self.cursor.execute(f'SELECT id FROM tasks WHERE {IDS_IN}',
+                                (json.dumps([row[0] for row in rows]),))
+            # Ids are reused once the highest one is deleted; a task whose id
+            # has since gone to a new task comes back under a fresh id.
+            taken = {task_id for task_id, in self.cursor.fetchall()}
+            self.cursor.execute(RESTORE_TASKS, (json.dumps([row for row in rows if row[0] not in taken]),))
+            ids.extend(row[0] for row in rows if row[0] not in taken)
+            moved = {}
+            for row in rows:
+                if row[0] in taken:
+                    self.cursor.execute(RESTORE_TASKS, (json.dumps([[None, *row[1:]]]),))
+                    moved[row[0]] = self.cursor.lastrowid
+            ids.extend(moved.values())
+            if moved:
+                self.renumber_batches(moved)
+        if 'archive' in inverse:
+            ids.extend(self.archive_tasks(inverse['archive'])[0])
+        if 'unarchive' in inverse:
+            ids.extend(self.unarchive_tasks(inverse['unarchive'])[0])
+        if 'update' in inverse:
+            rows = inverse['update']['rows']
+            self.restore_fields(inverse['update']['fields'], rows)
+            ids.extend(row[0] for row in rows)
+        self.cursor.execute('DELETE FROM task_batches WHERE id = ?', (batch_id,))
+        return description, ids
+
+    def restore_fields(self, fields, rows):
+        """Set `fields` from [id, created_at, *values] rows. Does not commit.
+
+        One set-wise statement: per-row UPDATEs are several times slower with
+        the change-log and search triggers. Matching created_at too skips a
+        task that has since been deleted and had its id reused.
+        """
+        assignments = ', '.join(f"{field} = json_extract(old.value, '$[{i}]')"
+                                for i, field in enumerate(fields, start=2))
+        self.cursor.execute(f'''
+        UPDATE tasks SET {assignments}, updated_at = {NOW}
+        FROM json_each(?) AS old
+        WHERE tasks.id = json_extract(old.value, '$[0]') AND tasks.created_at = json_extract(old.value, '$[1]')
+        ''', (json.dumps(rows),))
+
+    def renumber_batches(self, moved):
+        """Point the remaining undo batches at the new ids of restored tasks."""
+        self.cursor.execute('SELECT id, inverse FROM task_batches')
+        for batch_id, inverse in self.cursor.fetchall():
+            inverse = json.loads(inverse)
+            for row in (*inverse.get('insert', ()), *inverse.get('update', {}).get('rows', ())):
+                row[0] = moved.get(row[0], row[0])
+            if 'delete' in inverse:
+                inverse['delete'] = [moved.get(task_id, task_id) for task_id in inverse['delete']]
+            self.cursor.execute('UPDATE task_batches SET inverse = ? WHERE id = ?', (json.dumps(inverse), batch_id))
+
+    def artifact_paths(self):
+        """Every distinct test-result path the active tasks reference."""
+        self.cursor.execute("SELECT DISTINCT test_result_path FROM tasks WHERE test_result_path != ''")
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def artifact_signatures(self):
+        """{path: (kind, size, mtime_ns)} of the indexed artifacts, to tell which changed."""
+        self.cursor.execute('SELECT path, kind, size, mtime_ns FROM artifacts')
+        return {path: (kind, size, mtime_ns) for path, kind, size, mtime_ns in self.cursor.fetchall()}
+
+    def artifact_index(self):
+        """{path: (kind, mtime_ns, result)}, what artifacts.artifact_status needs per task."""
+        self.cursor.execute('SELECT path, kind, mtime_ns, result FROM artifacts')
+        return {path: (kind, mtime_ns, result) for path, kind, mtime_ns, result in self.cursor.fetchall()}
+
+    def save_artifacts(self, rows, removed=()):
+        """Store scanned artifacts rows and drop the paths no task references any more."""
+        self.cursor.executemany('INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        if removed:
+            self.cursor.execute('DELETE FROM artifacts WHERE path IN (SELECT value FROM json_each(?))',
+                                (json.dumps(list(removed)),))
+
+    def artifact_status_counts(self):
+        """{status: active task count}; tasks without a path are left out."""
+        self.cursor.execute(f"SELECT {ARTIFACT_STATUS} AS result, COUNT(*) FROM tasks "
+                            f"WHERE test_result_path != '' GROUP BY result")
+        return dict(self.cursor.fetchall())
+
+    def undo_history(self, limit=UNDO_LIMIT):
+        """(id, created_at, description) of the batches that can still be undone, newest first."""
+        self.cursor.execute('SELECT id, created_at, description FROM task_batches ORDER BY id DESC LIMIT ?', (limit,))
+        return self.cursor.fetchall()
 
     def fetch_data(self):
-        self.cursor.execute('SELECT * FROM tasks')
+        self.cursor.execute(f'SELECT {TASK_COLUMNS} FROM tasks')
+        return self.cursor.fetchall()
+
+    def query(self, order_by='id', descending=False, limit=None, offset=0, after=None, **filters):
+        """Return tasks matching `filters`, filtered, sorted and paged in SQL.
+
+        Filters are status, exclude_status, text (substring), match (full-text),
+        assigned_to, priority, ids and artifact (a test-result status). `order_by` is a field or a list of
+        (field, descending) pairs, most significant first.
+        `after` is a sort key from `page_bounds`; only rows ordered after it are
+        returned, so a page is an index seek rather than an OFFSET scan.
+        """
+        spec = sort_spec(order_by, descending)
+        terms = self._order_terms(spec)
+        where, params = self._filter_clause(**filters)
+        if after is not None:
+            clause, after_params = self._after_clause(terms, after)
+            where += (' AND ' if where else 'WHERE ') + clause
+            params.extend(after_params)
+        order = self._order_clause(spec)
+        self.cursor.execute(
+            f'SELECT {TASK_COLUMNS} FROM {task_source(filters.get("include_archive"))} {where} '
+            f'ORDER BY {order} LIMIT ? OFFSET ?',
+            (*params, -1 if limit is None else limit, offset)
+        )
+        return self.cursor.fetchall()
+
+    def page_bounds(self, page_size, order_by='id', descending=False, **filters):
+        """(row count, sort keys) for paging `query` results by keyset.
+
+        Key n is the sort key of the last row of page n, so page n + 1 is
+        ``query(limit=page_size, after=keys[n], ...)``. One pass on the reader
+        finds them all, and jumping anywhere in the result needs no OFFSET.
+        """
+        spec = sort_spec(order_by, descending)
+        terms = self._order_terms(spec)
+        where, params = self._filter_clause(**filters)
+        source = task_source(filters.get("include_archive"))
+        keys = ', '.join(f'{key} AS k{i}' for i, (key, _) in enumerate(terms))
+        self.cursor.execute(
+            f'SELECT * FROM (SELECT ROW_NUMBER() OVER (ORDER BY {self._order_clause(spec)}) AS n, {keys} '
+            f'FROM {source} {where}) WHERE n % ? = 0 ORDER BY n',
+            (*params, page_size)
+        )
+        bounds = [tuple(row[1:]) for row in self.cursor.fetchall()]
+        self.cursor.execute(f'SELECT COUNT(*) FROM {source} {where}', params)
+        return self.cursor.fetchone()[0], bounds
+
+    def load_tasks(self, rows):
+        """Task objects for `rows`, through the shared identity map."""
+        return [self.tasks.load(row) for row in rows]
+
+    def get_task(self, task_id):
+        task = self.tasks.get(task_id)
+        if task is None:
+            rows = self.query(ids=[task_id])
+            task = self.tasks.load(rows[0]) if rows else None
+        return task
+
+    def query_tasks(self, **kwargs):
+        return self.load_tasks(self.query(**kwargs))
+
+    def search_tasks(self, text, **kwargs):
+        return self.load_tasks(self.search(text, **kwargs))
+
+    def search(self, text, limit=None, offset=0, with_rank=False, **filters):
+        """Full-text search over task, issue, remark and status, best matches first.
+
+        With `with_rank` each row starts with its bm25 score (lower is better).
+        With `include_archive` archived tasks are searched too.
+        """
+        expression = match_expression(text)
+        if not expression:
+            return []
+        include_archive = filters.get('include_archive')
+        where, params = self._filter_clause(**filters)
+        hits = 'SELECT rowid, bm25(tasks_fts) AS rank FROM tasks_fts WHERE tasks_fts MATCH ?'
+        if include_archive:
+            hits += (' UNION ALL SELECT rowid, bm25(tasks_archive_fts) FROM tasks_archive_fts'
+                     ' WHERE tasks_archive_fts MATCH ?')
+        self.cursor.execute(f'''
+        SELECT {'hits.rank, ' if with_rank else ''}{qualified_columns('tasks')}
+        FROM ({hits}) AS hits
+        JOIN {task_source(include_archive)} ON tasks.id = hits.rowid
+        {where}
+        ORDER BY hits.rank
+        LIMIT ? OFFSET ?
+        ''', (expression, *([expression] if include_archive else []), *params, -1 if limit is None else limit, offset))
+        return self.cursor.fetchall()
+
+    def similar_candidates(self, text, limit=50, max_matches=SIMILAR_MAX_MATCHES):
+        """(id, task, status) of active tasks whose title shares words with `text`, best bm25 match first.
+
+        The words are ORed, so titles missing some of them, or with one
+        misspelled, still come back for the caller to compare; the last word
+        may be unfinished and matches as a prefix. Ranking scores every
+        matching row, so only the rarest words are used: as many as keep
+        the matches under `max_matches` (always at least one).
+        """
+        words = list(dict.fromkeys(word.casefold() for word in re.findall(r'\w+', text)))
+        if not words:
+            return []
+        self.cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.tasks_fts_terms USING fts5vocab(main, tasks_fts, 'col')")
+        counted = []
+        for word in words:
+            prefix = word == words[-1]
+            # For a prefix this sums the matching terms' counts, which can only overestimate.
+            self.cursor.execute("SELECT COALESCE(SUM(doc), 0) FROM temp.tasks_fts_terms "
+                                "WHERE col = 'task' AND term >= ? AND term < ?",
+                                (word, word + '\U0010ffff') if prefix else (word, word + '\0'))
+            counted.append((self.cursor.fetchone()[0], word, prefix))
+        terms, total = [], 0
+        for matches, word, prefix in sorted(counted):
+            if matches and (not terms or total + matches <= max_matches):
+                terms.append(f'"{word}"*' if prefix else f'"{word}"')
+                total += matches
+        if not terms:
+            return []
+        self.cursor.execute('''
+        SELECT tasks.id, tasks.task, tasks.status
+        FROM (SELECT rowid, rank FROM tasks_fts WHERE tasks_fts MATCH ? ORDER BY rank LIMIT ?) AS hits
+        JOIN tasks ON tasks.id = hits.rowid
+        ORDER BY hits.rank
+        ''', ('task : ({})'.format(' OR '.join(terms)), limit))
+        return self.cursor.fetchall()
+
+    def value_counts(self, field):
+        """(value, count) of every distinct non-empty `field`, over active and archived tasks."""
+        if field not in TASK_FIELDS:
+            raise ValueError(f"Unknown column: {field}")
+        self.cursor.execute(f'''
+        SELECT {field}, COUNT(*) FROM (SELECT {field} FROM tasks UNION ALL SELECT {field} FROM tasks_archive)
+        WHERE {field} != '' GROUP BY {field}
+        ''')
+        return self.cursor.fetchall()
+
+    def stream(self, fields=TASK_FIELDS, batch_size=1000, order_by='id', descending=False, **filters):
+        """Yield matching rows in batches of `batch_size` without loading the whole result."""
+        unknown = [field for field in fields if field not in TASK_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown column: {unknown[0]}")
+        spec = sort_spec(order_by, descending)
+        where, params = self._filter_clause(**filters)
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(
+                f'SELECT {", ".join(fields)} FROM {task_source(filters.get("include_archive"))} {where} '
+                f'ORDER BY {self._order_clause(spec)}',
+                params
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+    def count_tasks(self, **filters):
+        where, params = self._filter_clause(**filters)
+        self.cursor.execute(f'SELECT COUNT(*) FROM {task_source(filters.get("include_archive"))} {where}', params)
+        return self.cursor.fetchone()[0]
+
+    @staticmethod
+    def _order_terms(spec):
+        """[(SQL sort expression, descending)] for `spec`, ending with the id as the tie-break."""
+        # Ties end on the id: in its own direction if it is sorted on, else in the first field's.
+        terms = []
+        for field, descending in spec:
+            if field == 'id':
+                terms.append(('id', descending))
+                break
+            if field in RANKED_FIELDS:
+                key = f'(SELECT rank FROM {RANKED_FIELDS[field]} WHERE name = tasks.{field})'
+            else:
+                key = field
+            terms.append((key, descending))
+        else:
+            terms.append(('id', spec[0][1]))
+        return terms
+
+    @classmethod
+    def _order_clause(cls, spec):
+        return ', '.join(f"{key} {'DESC' if desc else 'ASC'}" for key, desc in cls._order_terms(spec))
+
+    @staticmethod
+    def _after_clause(terms, values):
+        """WHERE clause and params for rows ordered after sort key `values`.
+
+        SQLite sorts NULL first ascending and last descending, which a row
+        value comparison does not follow, so the clause is spelled out per
+        term. The leading bound on the first term lets SQLite seek its index.
+        """
+        alternatives, params = [], []
+        equal, equal_params = [], []
+        for (key, descending), value in zip(terms, values):
+            if value is None:
+                after, after_params = (None, []) if descending else (f'{key} IS NOT NULL', [])
+            elif descending:
+                after, after_params = f'({key} < ? OR {key} IS NULL)', [value]
+            else:
+                after, after_params = f'{key} > ?', [value]
+            if after is not None:
+                alternatives.append(' AND '.join([*equal, after]))
+                params.extend([*equal_params, *after_params])
+            equal.append(f'{key} IS NULL' if value is None else f'{key} = ?')
+            equal_params.extend([] if value is None else [value])
+        clause = '(' + ' OR '.join(f'({alternative})' for alternative in alternatives) + ')' if alternatives else '0'
+        (key, descending), value = terms[0], values[0]
+        if value is not None and not descending:
+            clause, params = f'{key} >= ? AND {clause}', [value, *params]
+        return clause, params
+
+    @staticmethod
+    def _filter_clause(status=None, exclude_status=None, text=None, match=None, assigned_to=None, priority=None,
+                       ids=None, include_archive=False, artifact=None):
+        clauses, params = [], []
+        for column, value in (('status', status), ('assigned_to', assigned_to), ('priority', priority)):
+            if value is not None:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        if exclude_status is not None:
+            clauses.append('status != ?')
+            params.append(exclude_status)
+        if text:
+            pattern = '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            clauses.append("(task LIKE ? ESCAPE '\\' OR status LIKE ? ESCAPE '\\')")
+            params.extend([pattern, pattern])
+        if match:
+            expression = match_expression(match) or '""'
+            if include_archive:
+                clauses.append('id IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ? '
+                               'UNION ALL SELECT rowid FROM tasks_archive_fts WHERE tasks_archive_fts MATCH ?)')
+                params.extend([expression, expression])
+            else:
+                clauses.append('id IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?)')
+                params.append(expression)
+        if ids is not None:
+            clauses.append(IDS_IN)
+            params.append(json.dumps(list(ids)))
+        if artifact is not None:
+            clauses.append(f'({ARTIFACT_STATUS}) = ?')
+            params.append(artifact)
+        return ('WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def add_reminder(self, task_id, message, due_at, repeat_seconds=None):
+        return self.execute_write(
+            'INSERT INTO reminders (task_id, message, due_at, repeat_seconds) VALUES (?, ?, ?, ?)',
+            (task_id, message, due_at, repeat_seconds)
+        ).lastrowid
+
+    # Both return whether the reminder still existed; deleting or archiving a
+    # task deletes its reminders (see migrations.py), so a False means do not fire.
+    def reschedule_reminder(self, reminder_id, due_at):
+        return self.execute_write('UPDATE reminders SET due_at = ? WHERE id = ?', (due_at, reminder_id)).rowcount > 0
+
+    def delete_reminder(self, reminder_id):
+        return self.execute_write('DELETE FROM reminders WHERE id = ?', (reminder_id,)).rowcount > 0
+
+    def fetch_reminders(self):
+        self.cursor.execute('SELECT id, due_at, task_id, message, repeat_seconds FROM reminders')
+        return self.cursor.fetchall()
+
+    def change_cursor(self):
+        self.cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM task_changes')
+        return self.cursor.fetchone()[0]
+
+    def fetch_changes(self, since, **filters):
+        """Return (cursor, changed rows, removed ids) for changes after `since`.
+
+        Rows that were deleted or no longer match `filters` come back as removed ids.
+        """
+        where, params = self._filter_clause(**filters)
+        match = where.replace('WHERE', 'AND', 1)
+        self.cursor.execute(f'''
+        SELECT c.seq, c.task_id, {qualified_columns('t')}
+        FROM task_changes c LEFT JOIN tasks t ON t.id = c.task_id {match}
+        WHERE c.seq > ?
+        ORDER BY c.seq
+        ''', (*params, since))
+        cursor, rows, deleted = since, [], []
+        for seq, task_id, *row in self.cursor.fetchall():
+            cursor = seq
+            if row[0] is None:
+                deleted.append(task_id)
+            else:
+                rows.append(tuple(row))
+        return cursor, rows, deleted
+
+    def fetch_task_changes(self, since, **filters):
+        """fetch_changes, with the changed rows as Task objects."""
+        cursor, rows, removed = self.fetch_changes(since, **filters)
+        return cursor, self.load_tasks(rows), removed
+
+    def changes_since(self, since, limit=None):
+        """(seq, task_id, op) entries of the change log after `since`; op is I, U or D."""
+        self.cursor.execute('SELECT seq, task_id, op FROM task_changes WHERE seq > ? ORDER BY seq LIMIT ?',
+                            (since, -1 if limit is None else limit))
         return self.cursor.fetchall()
 
-    def notify_change(self):
-        pass
+    def data_version(self):
+        """SQLite's counter that moves whenever another connection or process commits."""
+        self.cursor.execute('PRAGMA data_version')
+        return self.cursor.fetchone()[0]
 
     def close(self):
         self.conn.close()
+
+
+def match_expression(text):
+    """Turn user input into an FTS5 query: quoted text is a phrase, bare words are prefixes."""
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text):
+        if phrase.strip():
+            terms.append('"{}"'.format(phrase.replace('"', '""')))
+        elif word.strip('"'):
+            terms.append('"{}"*'.format(word.strip('"').replace('"', '""')))
+    return ' '.join(terms)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Task database maintenance")
+    parser.add_argument('command', choices=['rebuild-search', 'migrate'])
+    parser.add_argument('db_names', nargs='+', help="database names, without the .db suffix")
+    parser.add_argument('--dry-run', action='store_true', help="migrate: run and time the upgrade, then roll it back")
+    args = parser.parse_args()
+    for db_name in args.db_names:
+        if args.command == 'migrate':
+            from migrations import migrate, schema_version
+            db = Database(db_name, upgrade=False)
+            print(f"{db_name}.db: schema version {schema_version(db)}")
+            for version, description, seconds, details in migrate(db, dry_run=args.dry_run):
+                print(f"  {version}: {description} - {seconds:.3f}s{f' ({details})' if details else ''}")
+            print(f"  {'rolled back (dry run)' if args.dry_run else 'now at version'} {schema_version(db)}")
+            db.close()
+            continue
+        db = Database(db_name)
+        db.rebuild_search_index()
+        db.close()
+        print(f"Rebuilt search index for {db_name}.db")
@@ -0,0 +1,137 @@
+# db_executor.py
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from database import Database
+from instrumentation import profiler
+
+# How often (ms) the Tk thread checks whether a background job has finished.
+POLL_INTERVAL = 20
+
+
+class DatabaseExecutor:
+    """Runs database work on dedicated threads, each with its own connection.
+
+    `submit(func, *args)` queues `func(db, *args)` and returns a Future, so
+    unbound methods work directly: ``executor.submit(Database.fetch_data)``.
+    Submitted jobs run one at a time in order on the writer thread, which is
+    the single writer for its database. `submit_read` sends read-only
+    jobs (view loads, exports, scans) to a pool of reader threads instead, so
+    reads and writes never wait for each other; WAL mode lets both proceed at once.
+
+    The threads' connections do not migrate the schema; the database must
+    already be current (TaskStore upgrades it before starting one). If a
+    thread cannot open its connection, every queued job fails with that
+    error, and so does every job submitted afterwards.
+    """
+
+    def __init__(self, db_name, readers=1):
+        self.db_name = db_name
+        self.jobs = queue.Queue()
+        self.read_jobs = queue.Queue()
+        # Why a worker could not open its connection; set once, never cleared.
+        self.error = None
+        self.threads = [threading.Thread(target=self.run, args=(self.jobs,), name=f"db-{db_name}", daemon=True)]
+        self.threads += [
+            threading.Thread(target=self.run, args=(self.read_jobs,), name=f"db-{db_name}-read{i}", daemon=True)
+            for i in range(readers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        return self.queue_job(self.jobs, func, args, kwargs)
+
+    def submit_read(self, func, *args, **kwargs):
+        return self.queue_job(self.read_jobs, func, args, kwargs)
+
+    def queue_job(self, jobs, func, args, kwargs):
+        future = Future()
+        if self.error is not None:
+            future.set_exception(self.error)
+            return future
+        jobs.put((future, func, args, kwargs, time.perf_counter()))
+        if self.error is not None:
+            # The worker failed while this job was being queued.
+            self.fail_pending()
+        return future
+
+    def fail_pending(self):
+        for jobs in (self.jobs, self.read_jobs):
+            stops = 0
+            while True:
+                try:
+                    job = jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stops += 1
+                elif job[0].set_running_or_notify_cancel():
+                    job[0].set_exception(self.error)
+            # Shutdown requests are left for the threads that are still running.
+            for _ in range(stops):
+                jobs.put(None)
+
+    def run(self, jobs):
+        db = None
+        try:
+            db = Database(self.db_name, upgrade=False)
+            db.check_schema()
+        except Exception as e:
+            if db is not None:
+                db.close()
+            self.open_failed(e)
+            return
+        try:
+            while True:
+                job = jobs.get()
+                if job is None:
+                    break
+                future, func, args, kwargs, submitted = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                start = time.perf_counter()
+                try:
+                    future.set_result(func(db, *args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+                if profiler.enabled:
+                    # Queue wait shows a busy writer; run time shows a slow job.
+                    profiler.record('executor.wait', start - submitted)
+                    profiler.record(f"job.{getattr(func, '__qualname__', 'job')}", time.perf_counter() - start)
+        finally:
+            db.close()
+
+    def open_failed(self, error):
+        profiler.error('executor', f"{self.db_name}: {error}")
+        self.error = error
+        self.fail_pending()
+
+    def shutdown(self, wait=True):
+        self.jobs.put(None)
+        for _ in self.threads[1:]:
+            self.read_jobs.put(None)
+        if wait:
+            for thread in self.threads:
+                thread.join()
+
+
+def deliver(widget, future, callback, on_error=None):
+    """Call `callback(result)` on the Tk thread once `future` has finished.
+
+    Tk must only be touched from its own thread, so the future is polled with
+    `after` rather than signalled from the worker. Cancelled futures are dropped.
+    """
+    def poll():
+        if not future.done():
+            widget.after(POLL_INTERVAL, poll)
+        elif not future.cancelled():
+            error = future.exception()
+            if error is None:
+                callback(future.result())
+            elif on_error is not None:
+                on_error(error)
+
+    widget.after(POLL_INTERVAL, poll)
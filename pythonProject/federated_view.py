@@ -0,0 +1,184 @@
+# federated_view.py
+
+import os
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import ttk, filedialog
+from db_executor import deliver
+from federation import Federation, DATABASE_FIELD
+from models import STATUSES
+from task_manager import COLUMNS, COLUMN_FIELDS, SEARCH_DELAY, STATUS_TAGS, TAG_COLORS, PROGRESS_INTERVAL
+from ui_components import create_button, create_entry, create_frame, create_combobox
+
+ALL_PROJECTS = "All projects"
+STATUS_CHOICES = ['Open', 'All', *STATUSES]
+
+# Database first, then the task columns without the seq no and hidden id.
+VIEW_COLUMNS = ['Database', *COLUMNS[1:-1]]
+
+
+class FederatedView:
+    """The "All projects" tab: search, filter, sort, analyze and export every database together.
+
+    Federation calls fan out and block until every database answers, so they
+    run on a single background thread; results reach the tree through
+    `deliver`, and a reload that finishes after a newer one is dropped.
+    """
+
+    def __init__(self, parent, db_names, open_task=None):
+        self.parent = parent
+        self.db_names = list(db_names)
+        self.federation = Federation(self.db_names)
+        self.runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix='all-projects')
+        self.open_task = open_task
+        self.sort_field = 'assigned_date'
+        self.sort_reverse = True
+        self.generation = 0
+        self.rows = {}
+        self.search_job = None
+        self.setup_ui()
+        self.reload()
+
+    def setup_ui(self):
+        self.parent.grid_rowconfigure(0, weight=1)
+        self.parent.grid_columnconfigure(0, weight=1)
+        tree = ttk.Treeview(self.parent, columns=VIEW_COLUMNS, show='headings')
+        for col in VIEW_COLUMNS:
+            tree.heading(col, text=col, command=lambda _col=col: self.sort_column(_col))
+            tree.column(col, width=150)
+        for tag, color in TAG_COLORS.items():
+            tree.tag_configure(tag, background=color)
+        tree.grid(row=0, column=0, sticky='nsew')
+        tree.bind('<Double-1>', self.on_double_click)
+        scrollbar = ttk.Scrollbar(self.parent, orient='vertical', command=tree.yview)
+        scrollbar.grid(row=0, column=1, sticky='ns')
+        tree.configure(yscrollcommand=scrollbar.set)
+        self.tree = tree
+
+        toolbar = create_frame(self.parent, 1, 0, columnspan=2)
+        self.status_choice = create_combobox(toolbar, 0, 0, STATUS_CHOICES, font=("Helvetica", 10), ipady=2)
+        self.status_choice.set(STATUS_CHOICES[0])
+        self.status_choice.configure(state='readonly')
+        self.status_choice.bind('<<ComboboxSelected>>', lambda event: self.reload())
+        self.search_var = tk.StringVar()
+        search_entry = create_entry(toolbar, 0, 1, font=("Helvetica", 10), ipady=2)
+        search_entry.config(textvariable=self.search_var)
+        self.search_var.trace_add('write', self.on_search_typed)
+        self.include_archive = tk.BooleanVar(value=False)
+        ttk.Checkbutton(toolbar, text="Include archive", variable=self.include_archive,
+                        command=self.reload).grid(row=0, column=2, padx=5)
+        for i, (text, command) in enumerate((("Refresh", self.reload), ("Analyze", self.analyze_data),
+                                              ("Download", self.download_data)), start=3):
+            create_button(toolbar, text, command, 0, i)
+        self.cancel_button = create_button(toolbar, "Cancel", None, 0, 6)
+        self.cancel_button.grid_remove()
+
+        self.status_var = tk.StringVar()
+        ttk.Label(self.parent, textvariable=self.status_var, anchor='w').grid(row=2, column=0, columnspan=2,
+                                                                              sticky='ew')
+
+    def filters(self):
+        choice = self.status_choice.get()
+        filters = {'include_archive': True} if self.include_archive.get() else {}
+        if choice == 'Open':
+            filters['exclude_status'] = 'Closed'
+        elif choice != 'All':
+            filters['status'] = choice
+        return filters
+
+    def on_search_typed(self, *args):
+        if self.search_job is not None:
+            self.parent.after_cancel(self.search_job)
+        self.search_job = self.parent.after(SEARCH_DELAY, self.reload)
+
+    def reload(self):
+        self.search_job = None
+        self.generation += 1
+        generation = self.generation
+        term = self.search_var.get().strip()
+        filters = self.filters()
+
+        def fetch():
+            if term:
+                rows = self.federation.search(term, **filters)
+                return rows, self.federation.count_tasks(match=term, **filters)
+            rows = self.federation.query(order_by=self.sort_field, descending=self.sort_reverse, **filters)
+            return rows, self.federation.count_tasks(**filters)
+
+        self.status_var.set(f"Loading {len(self.db_names)} databases...")
+        deliver(self.parent, self.runner.submit(fetch), lambda result: self.show_rows(generation, *result),
+                lambda e: self.status_var.set(f"Load error: {e}"))
+
+    def show_rows(self, generation, rows, total):
+        if generation != self.generation:
+            return
+        self.tree.delete(*self.tree.get_children())
+        self.rows.clear()
+        for index, (db_name, task_id, *values) in enumerate(rows):
+            iid = str(index)
+            self.rows[iid] = (db_name, task_id)
+            self.tree.insert('', 'end', iid=iid, values=(os.path.basename(db_name), *values),
+                             tags=(STATUS_TAGS.get(values[2], ''),))
+        shown = f"first {len(rows)} of {total}" if total > len(rows) else f"{total}"
+        self.status_var.set(f"Showing {shown} tasks across {len(self.db_names)} databases")
+
+    def sort_column(self, col):
+        if col == 'Database':
+            return
+        field = COLUMN_FIELDS[col]
+        self.sort_reverse = not self.sort_reverse if field == self.sort_field else False
+        self.sort_field = field
+        self.reload()
+
+    def on_double_click(self, event):
+        selection = self.tree.selection()
+        if selection and self.open_task is not None:
+            self.open_task(*self.rows[selection[0]])
+
+    def analyze_data(self):
+        from dashboard import Dashboard
+        Dashboard(self.parent, [(ALL_PROJECTS, self.runner.submit(self.federation.stats)),
+                                ("With archive", self.runner.submit(self.federation.stats, True))])
+
+    def download_data(self):
+        from data_export import FILE_TYPES, ExportCancelled, export_tasks
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=FILE_TYPES)
+        if not file_path:
+            return
+        columns = [('Database', DATABASE_FIELD), ('ID', 'id'), *((col, COLUMN_FIELDS[col]) for col in COLUMNS[1:-1])]
+        filters = self.filters()
+        term = self.search_var.get().strip()
+        if term:
+            filters['match'] = term
+        written = [0]
+        cancel = threading.Event()
+        future = self.runner.submit(
+            export_tasks, self.federation, file_path, columns, progress=lambda count: written.__setitem__(0, count),
+            cancel=cancel, order_by=self.sort_field, descending=self.sort_reverse, **filters
+        )
+        self.cancel_button.configure(command=cancel.set)
+        self.cancel_button.grid()
+
+        def poll():
+            if not future.done():
+                self.status_var.set(f"Exporting... {written[0]} rows")
+                self.parent.after(PROGRESS_INTERVAL, poll)
+            else:
+                self.cancel_button.grid_remove()
+
+        def failed(error):
+            self.status_var.set("Export cancelled" if isinstance(error, ExportCancelled) else f"Download error: {error}")
+
+        poll()
+        deliver(self.parent, future, lambda count: self.status_var.set(f"Exported {count} rows to {file_path}"), failed)
+
+    def activate(self):
+        self.reload()
+
+    def stop_auto_refresh(self):
+        pass
+
+    def close(self):
+        self.runner.shutdown(wait=False)
+        self.federation.close()
@@ -0,0 +1,107 @@
+# federation.py
+
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from analytics import cached_stats, combine_stats
+from database import Database, TASK_FIELDS
+from sorting import value_key
+
+# Rows the "All projects" view shows at once; exports are not limited.
+FEDERATED_LIMIT = 1000
+MAX_THREADS = 8
+
+# The pseudo-column naming the database a federated row came from.
+DATABASE_FIELD = 'database'
+
+class Federation:
+    """Query several task databases as one.
+
+    Every database is read with its own connection. Interactive calls
+    (query, search, count, stats) fan out over a thread pool; each
+    database's result comes back sorted from SQLite and the lists are merged
+    by sort key, so nothing is re-sorted in Python. `stream` has the same
+    interface as Database.stream, so data_export.export_tasks works on a
+    Federation, and it merges lazily with one batch per database in memory.
+    Rows are prefixed with their database name.
+    """
+
+    def __init__(self, db_names, threads=None):
+        self.db_names = list(db_names)
+        self.pool = ThreadPoolExecutor(max_workers=threads or min(MAX_THREADS, len(self.db_names) or 1),
+                                       thread_name_prefix='federation')
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+
+    def connection(self, db_name):
+        """This thread's connection to `db_name`."""
+        databases = getattr(self.local, 'databases', None)
+        if databases is None:
+            databases = self.local.databases = {}
+        if db_name not in databases:
+            databases[db_name] = Database(db_name)
+            with self.lock:
+                self.connections.append(databases[db_name])
+        return databases[db_name]
+
+    def map(self, func, *args, **kwargs):
+        """[(db_name, func(db, *args, **kwargs))] for every database, run in parallel."""
+        futures = [
+            (name, self.pool.submit(lambda name=name: func(self.connection(name), *args, **kwargs)))
+            for name in self.db_names
+        ]
+        return [(name, future.result()) for name, future in futures]
+
+    def query(self, order_by='id', descending=False, limit=FEDERATED_LIMIT, **filters):
+        """The first `limit` matching tasks across all databases, as (db_name, *row)."""
+        results = self.map(Database.query, order_by=order_by, descending=descending, limit=limit, **filters)
+        index = TASK_FIELDS.index(order_by)
+        key = value_key(order_by)
+        merged = heapq.merge(
+            *([(name, *row) for row in rows] for name, rows in results),
+            key=lambda row: (key(row[index + 1]), row[1]), reverse=descending
+        )
+        return list(islice(merged, limit))
+
+    def search(self, text, limit=FEDERATED_LIMIT, **filters):
+        """Full-text matches across all databases, best bm25 score first."""
+        results = self.map(Database.search, text, limit=limit, with_rank=True, **filters)
+        merged = heapq.merge(*([(rank, name, *row) for rank, *row in rows] for name, rows in results))
+        return [row[1:] for row in islice(merged, limit)]
+
+    def count_tasks(self, **filters):
+        return sum(count for _, count in self.map(Database.count_tasks, **filters))
+
+    def stats(self, include_archive=False):
+        return combine_stats([stats for _, stats in self.map(cached_stats, include_archive)])
+
+    def stream(self, fields=TASK_FIELDS, batch_size=1000, order_by='id', descending=False, **filters):
+        """Yield merged batches of rows; `fields` may include 'database'."""
+        columns = [field for field in fields if field != DATABASE_FIELD]
+        key = value_key(order_by)
+
+        def rows(name):
+            db = self.connection(name)
+            for batch in db.stream((order_by, 'id', *columns), batch_size, order_by, descending, **filters):
+                for row in batch:
+                    yield (key(row[0]), row[1]), name, row[2:]
+
+        positions = [None if field == DATABASE_FIELD else columns.index(field) for field in fields]
+        merged = heapq.merge(*(rows(name) for name in self.db_names), key=lambda item: item[0], reverse=descending)
+        while True:
+            batch = [
+                tuple(name if position is None else row[position] for position in positions)
+                for _, name, row in islice(merged, batch_size)
+            ]
+            if not batch:
+                return
+            yield batch
+
+    def close(self):
+        self.pool.shutdown()
+        with self.lock:
+            for db in self.connections:
+                db.close()
+            self.connections.clear()
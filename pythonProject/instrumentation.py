@@ -0,0 +1,225 @@
+# instrumentation.py
+"""Opt-in timing of database queries, background jobs and the Tk event loop.
+
+Everything records into the process-wide `profiler`. While it is disabled
+each hook costs one attribute check, so the instrumented paths stay in
+place permanently. Enable it from Debug > Profiler, or start the app with
+TASK_MANAGER_PROFILE=1 (TASK_MANAGER_PROFILE_LOG names the log file).
+
+Metrics keep their last SAMPLES timings for percentiles. Queries slower
+than SLOW_QUERY_SECONDS are kept with their EXPLAIN QUERY PLAN. Slow
+queries, errors and a counter snapshot every EXPORT_INTERVAL seconds are
+written as JSON lines to a rotating log file.
+"""
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+
+SAMPLES = 1000
+SLOW_QUERY_SECONDS = 0.05
+SLOW_QUERIES_KEPT = 50
+EXPORT_INTERVAL = 60
+LOG_FILE = 'task_manager_profile.log'
+LOG_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+# Milliseconds between Tk event-loop latency samples.
+TK_SAMPLE_INTERVAL = 100
+
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'REPLACE')
+
+# Where errors go while there is no profile log; unconfigured, logging prints warnings to stderr.
+logger = logging.getLogger(__name__)
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.counters = Counter()
+        self.slow_queries = deque(maxlen=SLOW_QUERIES_KEPT)
+        self.plans = {}
+        self.logger = None
+        self.exporter = None
+        self.stopped = threading.Event()
+
+    def enable(self, log_path=LOG_FILE):
+        if self.enabled:
+            return
+        if log_path and self.logger is None:
+            self.logger = logging.getLogger('task_manager.profile')
+            self.logger.propagate = False
+            handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=LOG_BYTES, backupCount=LOG_BACKUPS)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self.logger.addHandler(handler)
+            self.logger.setLevel(logging.INFO)
+        self.stopped.clear()
+        self.enabled = True
+        if self.logger is not None:
+            self.exporter = threading.Thread(target=self.export_periodically, name='profile-export', daemon=True)
+            self.exporter.start()
+
+    def disable(self):
+        self.enabled = False
+        self.stopped.set()
+        self.export()
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.counters.clear()
+            self.slow_queries.clear()
+
+    def record(self, name, seconds):
+        with self.lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=SAMPLES)
+            samples.append(seconds)
+            self.counters[name] += 1
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def log(self, event, **fields):
+        if self.logger is not None:
+            self.logger.info(json.dumps({'time': time.time(), 'event': event, **fields}, default=str))
+
+    def error(self, source, error):
+        """Count an error and log it; called whether or not profiling is on.
+
+        Without a profile log the error is reported as a warning instead, so
+        background failures are never silent.
+        """
+        self.count(f'errors.{source}')
+        if self.logger is None:
+            logger.warning("%s: %s", source, error)
+        else:
+            self.log('error', source=source, error=str(error))
+
+    def query(self, connection, sql, params, seconds):
+        self.record('db.query', seconds)
+        if seconds < SLOW_QUERY_SECONDS:
+            return
+        statement = ' '.join(sql.split())
+        plan = self.plans.get(statement)
+        if plan is None and statement.upper().startswith(_EXPLAINABLE):
+            try:
+                rows = connection.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+                plan = self.plans[statement] = '\n'.join(row[-1] for row in rows)
+            except sqlite3.Error as e:
+                plan = f"(no plan: {e})"
+        entry = {'sql': statement, 'seconds': seconds, 'plan': plan or '', 'thread': threading.current_thread().name}
+        with self.lock:
+            self.slow_queries.append(entry)
+            self.counters['db.slow_queries'] += 1
+        self.log('slow_query', **entry)
+
+    def summary(self):
+        """{name: (count, p50, p90, p99, max)} in seconds over the kept samples."""
+        with self.lock:
+            snapshot = {name: sorted(samples) for name, samples in self.samples.items()}
+            counters = dict(self.counters)
+        return {
+            name: (counters.get(name, len(ordered)), percentile(ordered, 0.5), percentile(ordered, 0.9),
+                   percentile(ordered, 0.99), ordered[-1])
+            for name, ordered in snapshot.items() if ordered
+        }
+
+    def export(self):
+        if self.logger is None:
+            return
+        with self.lock:
+            counters = dict(self.counters)
+        self.log('snapshot', counters=counters, timings={
+            name: dict(zip(('count', 'p50', 'p90', 'p99', 'max'), values)) for name, values in self.summary().items()
+        })
+
+    def export_periodically(self):
+        while not self.stopped.wait(EXPORT_INTERVAL):
+            self.export()
+
+
+profiler = Profiler()
+
+
+def timed(name):
+    """Decorator recording each call's duration under `name` while profiling is on."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """A cursor that reports statement and fetch times to the profiler."""
+
+    def execute(self, sql, parameters=()):
+        if not profiler.enabled:
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            profiler.query(self.connection, sql, parameters, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not profiler.enabled:
+            return super().executemany(sql, seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            profiler.record('db.executemany', time.perf_counter() - start)
+
+    def fetchall(self):
+        if not profiler.enabled:
+            return super().fetchall()
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            profiler.record('db.fetch', time.perf_counter() - start)
+
+
+class ProfiledConnection(sqlite3.Connection):
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+
+def sample_event_loop(widget, interval=TK_SAMPLE_INTERVAL):
+    """Measure how late Tk runs an `after` callback, as a proxy for UI stalls."""
+    expected = [time.perf_counter() + interval / 1000]
+
+    def tick():
+        now = time.perf_counter()
+        if profiler.enabled:
+            profiler.record('tk.latency', max(0.0, now - expected[0]))
+        expected[0] = time.perf_counter() + interval / 1000
+        widget.after(interval, tick)
+
+    widget.after(interval, tick)
+
+
+def enable_from_environment():
+    if os.environ.get('TASK_MANAGER_PROFILE', '') not in ('', '0'):
+        profiler.enable(os.environ.get('TASK_MANAGER_PROFILE_LOG', LOG_FILE))
@@ -1,8 +1,14 @@
 # main.py
 
+import os
+import sys
 import tkinter as tk
 from tkinter import ttk, messagebox
-from task_manager import TaskManager
+
+DEFAULT_DB_NAMES = ["test", "test1", "test2", "test3"]
+
+# Milliseconds after startup before the reminder schedulers of unopened tabs start.
+STARTUP_SERVICES_DELAY = 1000
 
 def create_menu(root):
     """Create the menu bar for the main window."""
@@ -13,20 +19,119 @@ def create_menu(root):
     menu_bar.add_cascade(label="File", menu=file_menu)
     file_menu.add_command(label="Exit", command=root.quit)
 
+    debug_menu = tk.Menu(menu_bar, tearoff=0)
+    menu_bar.add_cascade(label="Debug", menu=debug_menu)
+    debug_menu.add_command(label="Profiler", command=lambda: open_profiler(root))
+
     help_menu = tk.Menu(menu_bar, tearoff=0)
     menu_bar.add_cascade(label="Help", menu=help_menu)
     help_menu.add_command(label="About", command=lambda: messagebox.showinfo("About", "Task Manager v1.0"))
 
+def open_profiler(root):
+    from profiler_window import ProfilerWindow
+    ProfilerWindow(root)
+
+def discover_db_names(argv=(), directory='.'):
+    """Database names from the command line, $TASK_MANAGER_DATABASES, or the *.db files in `directory`."""
+    if argv:
+        return list(argv)
+    configured = os.environ.get('TASK_MANAGER_DATABASES', '')
+    if configured.strip():
+        return [name.strip() for name in configured.split(',') if name.strip()]
+    found = sorted(name[:-3] for name in os.listdir(directory) if name.endswith('.db'))
+    return found or DEFAULT_DB_NAMES
+
+class TabLoader:
+    """Builds each tab's TaskManager the first time the tab is shown.
+
+    Only the visible tab runs its auto-refresh timer. Reminder, maintenance
+    and snapshot schedulers for every database start shortly after the window
+    appears, so reminders fire, upkeep runs and snapshots are taken for tabs
+    that were never opened. Maintenance archives old tasks only with
+    TASK_MANAGER_AUTO_ARCHIVE=1; see archive.py.
+    """
+
+    def __init__(self, notebook, db_names):
+        self.notebook = notebook
+        self.db_names = db_names
+        self.frames = {}
+        self.managers = {}
+        self.services = {}
+        self.maintenance = {}
+        self.snapshots = {}
+        self.active = None
+        notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+
+    def add(self, frame, db_name):
+        self.frames[str(frame)] = db_name
+
+    def show_task(self, db_name, task_id):
+        """Switch to `db_name`'s tab and select `task_id` there."""
+        frame = next(frame for frame, name in self.frames.items() if name == db_name)
+        self.notebook.select(frame)
+        self.on_tab_changed()
+        self.managers[frame].select_task(task_id)
+
+    def service(self, db_name):
+        """The (task store, reminder scheduler) pair for `db_name`, started on first use."""
+        if db_name not in self.services:
+            from task_store import TaskStore
+            from reminders import ReminderScheduler
+            from task_manager import poll_reminders
+            from archive import MaintenanceScheduler, auto_archive_enabled
+            from snapshots import SnapshotScheduler
+            store = TaskStore(db_name)
+            reminders = ReminderScheduler(store.executor)
+            poll_reminders(self.notebook, reminders)
+            self.maintenance[db_name] = MaintenanceScheduler(store.executor, archive=auto_archive_enabled())
+            self.snapshots[db_name] = SnapshotScheduler(db_name)
+            self.services[db_name] = (store, reminders)
+        return self.services[db_name]
+
+    def start_services(self):
+        for db_name in self.db_names:
+            self.service(db_name)
+
+    def on_tab_changed(self, event=None):
+        frame = self.notebook.select()
+        if not frame:
+            return
+        if self.active is not None:
+            self.active.stop_auto_refresh()
+        manager = self.managers.get(frame)
+        if manager is None and frame not in self.frames:
+            from federated_view import FederatedView
+            manager = FederatedView(self.notebook.nametowidget(frame), self.db_names, open_task=self.show_task)
+            self.managers[frame] = manager
+        elif manager is None:
+            from task_manager import TaskManager
+            db_name = self.frames[frame]
+            store, reminders = self.service(db_name)
+            manager = TaskManager(self.notebook.nametowidget(frame), db_name, db_names=self.db_names,
+                                  store=store, reminders=reminders)
+            self.managers[frame] = manager
+        elif manager is not self.active:
+            manager.activate()
+        self.active = manager
+
 def create_notebook(root, db_names):
-    """Create a notebook with tabs for each database."""
+    """Create a notebook with a lazily loaded tab for each database, plus "All projects" when there are several."""
     notebook = ttk.Notebook(root)
     notebook.grid(row=0, column=0, sticky='nsew')
+    loader = TabLoader(notebook, db_names)
     for db_name in db_names:
         frame = ttk.Frame(notebook)
         frame.grid_rowconfigure(0, weight=1)
         frame.grid_columnconfigure(0, weight=1)
         notebook.add(frame, text=db_name)
-        TaskManager(frame, db_name)
+        loader.add(frame, db_name)
+    if len(db_names) > 1:
+        from federated_view import ALL_PROJECTS
+        notebook.add(ttk.Frame(notebook), text=ALL_PROJECTS)
+    notebook.loader = loader
+    # Build the first tab once the window is up rather than before it is drawn.
+    root.after(0, loader.on_tab_changed)
+    root.after(STARTUP_SERVICES_DELAY, loader.start_services)
     return notebook
 
 def main():
@@ -37,8 +142,12 @@ def main():
     root.grid_rowconfigure(0, weight=1)
     root.grid_columnconfigure(0, weight=1)
 
+    from instrumentation import enable_from_environment, sample_event_loop
+    enable_from_environment()
+    sample_event_loop(root)
+
     create_menu(root)
-    db_names = ["test", "test1", "test2", "test3"]
+    db_names = discover_db_names(sys.argv[1:])
     create_notebook(root, db_names)
 
     root.mainloop()
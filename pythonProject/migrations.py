@@ -0,0 +1,347 @@
+# migrations.py
+"""Versioned schema upgrades, tracked in PRAGMA user_version.
+
+A Database opened with `upgrade=True` runs `migrate`; a TaskStore does so
+once, before its executor threads and change feed open their own
+connections, which only `check_version` and refuse a file that is behind.
+Pending migrations run in order inside one write transaction, so a file is
+either fully upgraded or left as it was. `python database.py migrate <db_names> [--dry-run]` upgrades files
+explicitly and prints how long each step took.
+"""
+import re
+import time
+from bulk_import import parse_date, parse_status, parse_priority, parse_progress
+from database import NOW
+from models import STATUSES, PRIORITIES
+
+
+def create_baseline(db):
+    """The schema as it was before versioning; a no-op on existing files."""
+    db.cursor.execute('''
+    CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER PRIMARY KEY,
+        assigned_date TEXT,
+        task TEXT,
+        status TEXT,
+        completion_date TEXT,
+        issue TEXT,
+        remark TEXT,
+        test_result_path TEXT,
+        assigned_to TEXT,
+        priority TEXT,
+        progress_percentage INTEGER
+    )
+    ''')
+    for column in ('status', 'assigned_to', 'priority', 'assigned_date'):
+        db.cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_tasks_{column} ON tasks ({column})')
+    db.create_change_log()
+    db.create_search_index()
+    db.cursor.execute('''
+    CREATE TABLE IF NOT EXISTS reminders (
+        id INTEGER PRIMARY KEY,
+        task_id INTEGER,
+        message TEXT,
+        due_at REAL NOT NULL,
+        repeat_seconds INTEGER
+    )
+    ''')
+
+
+def repaired_values(values):
+    """Clean one legacy row; returns (cleaned values, whether anything had to be moved to the remark)."""
+    (task_id, assigned_date, task, status, completion_date, issue, remark,
+     test_result_path, assigned_to, priority, progress) = values
+    notes = []
+
+    def clean(field, parse, value, fallback):
+        text = '' if value is None else str(value).strip()
+        try:
+            return parse(text)
+        except ValueError:
+            notes.append(f"{field} was '{text}'")
+            return fallback
+
+    assigned_date = clean('assigned_date', parse_date, assigned_date, '')
+    status = clean('status', parse_status, status or 'Pending', 'Pending')
+    completion_date = clean('completion_date', parse_date, completion_date, '')
+    priority = clean('priority', parse_priority, priority, '')
+    progress = clean('progress_percentage', parse_progress, progress, 0)
+    remark = remark or ''
+    if notes:
+        note = f"[migrated] {'; '.join(notes)}"
+        remark = f"{remark}\n{note}" if remark else note
+    return (
+        task_id, assigned_date or None, task or '', status, completion_date or None, issue or '', remark,
+        test_result_path or '', assigned_to or '', priority or None, progress
+    ), bool(notes)
+
+
+def create_typed_tasks(db):
+    """Typed, constrained columns, lookup tables, timestamps and covering indexes."""
+    def in_list(values):
+        return ', '.join(f"'{value}'" for value in values)
+
+    for table, names in (('statuses', STATUSES), ('priorities', PRIORITIES)):
+        db.cursor.execute(f'''
+        CREATE TABLE {table} (
+            name TEXT PRIMARY KEY,
+            rank INTEGER NOT NULL UNIQUE
+        ) WITHOUT ROWID
+        ''')
+        db.cursor.executemany(f'INSERT INTO {table} (name, rank) VALUES (?, ?)',
+                              [(name, rank) for rank, name in enumerate(names, start=1)])
+
+    db.cursor.execute(f'''
+    CREATE TABLE tasks_typed (
+        id INTEGER PRIMARY KEY,
+        assigned_date TEXT CHECK (assigned_date IS NULL OR date(assigned_date) IS assigned_date),
+        task TEXT NOT NULL DEFAULT '',
+        status TEXT NOT NULL DEFAULT 'Pending' REFERENCES statuses (name) CHECK (status IN ({in_list(STATUSES)})),
+        completion_date TEXT CHECK (completion_date IS NULL OR date(completion_date) IS completion_date),
+        issue TEXT NOT NULL DEFAULT '',
+        remark TEXT NOT NULL DEFAULT '',
+        test_result_path TEXT NOT NULL DEFAULT '',
+        assigned_to TEXT NOT NULL DEFAULT '',
+        priority TEXT REFERENCES priorities (name) CHECK (priority IS NULL OR priority IN ({in_list(PRIORITIES)})),
+        progress_percentage INTEGER NOT NULL DEFAULT 0 CHECK (progress_percentage BETWEEN 0 AND 100),
+        created_at INTEGER NOT NULL DEFAULT ({NOW}),
+        updated_at INTEGER NOT NULL DEFAULT ({NOW})
+    )
+    ''')
+
+    # Rows that are already clean are copied set-wise; only the rest go
+    # through Python to be parsed and annotated.
+    clean = f"""COALESCE(
+        (assigned_date IS NULL OR assigned_date = '' OR date(assigned_date) IS assigned_date)
+        AND status IN ({in_list(STATUSES)})
+        AND (completion_date IS NULL OR completion_date = '' OR date(completion_date) IS completion_date)
+        AND (priority IS NULL OR priority = '' OR priority IN ({in_list(PRIORITIES)}))
+        AND typeof(progress_percentage) IN ('integer', 'null') AND COALESCE(progress_percentage, 0) BETWEEN 0 AND 100,
+    0)"""
+    columns = ('id, assigned_date, task, status, completion_date, issue, remark, test_result_path, '
+               'assigned_to, priority, progress_percentage')
+    db.cursor.execute(f'''
+    INSERT INTO tasks_typed ({columns})
+    SELECT id, NULLIF(assigned_date, ''), COALESCE(task, ''), status, NULLIF(completion_date, ''), COALESCE(issue, ''),
+           COALESCE(remark, ''), COALESCE(test_result_path, ''), COALESCE(assigned_to, ''), NULLIF(priority, ''),
+           COALESCE(progress_percentage, 0)
+    FROM tasks WHERE {clean}
+    ''')
+    copied, repaired = db.cursor.rowcount, []
+    read = db.conn.cursor()
+    read.execute(f'SELECT {columns} FROM tasks WHERE NOT {clean}')
+    while True:
+        rows = read.fetchmany(5000)
+        if not rows:
+            break
+        cleaned = [repaired_values(row) for row in rows]
+        db.cursor.executemany(f'INSERT INTO tasks_typed ({columns}) VALUES ({", ".join("?" * 11)})',
+                              [values for values, _ in cleaned])
+        repaired.extend(values[0] for values, note in cleaned if note)
+        copied += len(rows)
+    read.close()
+
+    # Dropping the old table takes its indexes and triggers with it; they are
+    # recreated against the new one below.
+    db.cursor.execute('DROP TABLE tasks')
+    db.cursor.execute('ALTER TABLE tasks_typed RENAME TO tasks')
+    for name, columns in (
+        ('idx_tasks_status_completion', 'status, completion_date'),
+        ('idx_tasks_assigned_to', 'assigned_to, status'),
+        ('idx_tasks_priority', 'priority, status'),
+        ('idx_tasks_assigned_date', 'assigned_date'),
+        ('idx_tasks_updated_at', 'updated_at'),
+    ):
+        db.cursor.execute(f'CREATE INDEX {name} ON tasks ({columns})')
+    db.cursor.execute(f'''
+    CREATE TRIGGER tasks_touch AFTER UPDATE ON tasks
+    WHEN NEW.updated_at IS OLD.updated_at
+    BEGIN
+        UPDATE tasks SET updated_at = {NOW} WHERE id = NEW.id;
+    END
+    ''')
+    db.create_change_log()
+    db.create_search_index()
+    db.cursor.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+    db.cursor.executemany("INSERT OR REPLACE INTO task_changes (task_id, op) VALUES (?, 'U')",
+                          [(task_id,) for task_id in repaired])
+    return f"{copied} rows, {len(repaired)} with values moved to the remark"
+
+
+def create_task_batches(db):
+    """Inverse batches of bulk edits and deletes, for undo."""
+    db.cursor.execute(f'''
+    CREATE TABLE task_batches (
+        id INTEGER PRIMARY KEY,
+        created_at INTEGER NOT NULL DEFAULT ({NOW}),
+        description TEXT NOT NULL,
+        inverse TEXT NOT NULL
+    )
+    ''')
+
+
+def rebuild_tasks_table(db, transform):
+    """Recreate `tasks` from its own CREATE TABLE after `transform(sql)`, keeping rows, indexes and triggers."""
+    db.cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'tasks'")
+    sql = re.sub(r'^CREATE TABLE\s+"?tasks"?', 'CREATE TABLE tasks_rebuilt', db.cursor.fetchone()[0])
+    db.cursor.execute("SELECT sql FROM sqlite_master WHERE tbl_name = 'tasks' AND type IN ('index', 'trigger') "
+                      "AND sql IS NOT NULL")
+    dependents = [row[0] for row in db.cursor.fetchall()]
+    db.cursor.execute(transform(sql))
+    db.cursor.execute('INSERT INTO tasks_rebuilt SELECT * FROM tasks')
+    db.cursor.execute('DROP TABLE tasks')
+    db.cursor.execute('ALTER TABLE tasks_rebuilt RENAME TO tasks')
+    for sql in dependents:
+        db.cursor.execute(sql)
+
+
+def create_archive(db):
+    """Never-reused task ids, the tasks_archive tier with its own search index, and a maintenance log."""
+    # Archived tasks keep their ids, so a new task must never get one of
+    # them back: AUTOINCREMENT stops SQLite reusing the highest id.
+    rebuild_tasks_table(db, lambda sql: sql.replace('id INTEGER PRIMARY KEY', 'id INTEGER PRIMARY KEY AUTOINCREMENT', 1))
+    db.cursor.execute(f'''
+    CREATE TABLE tasks_archive (
+        id INTEGER PRIMARY KEY,
+        assigned_date TEXT,
+        task TEXT NOT NULL,
+        status TEXT NOT NULL,
+        completion_date TEXT,
+        issue TEXT NOT NULL,
+        remark TEXT NOT NULL,
+        test_result_path TEXT NOT NULL,
+        assigned_to TEXT NOT NULL,
+        priority TEXT,
+        progress_percentage INTEGER NOT NULL,
+        created_at INTEGER NOT NULL,
+        updated_at INTEGER NOT NULL,
+        archived_at INTEGER NOT NULL DEFAULT ({NOW})
+    )
+    ''')
+    db.cursor.execute('CREATE INDEX idx_archive_status_completion ON tasks_archive (status, completion_date)')
+    db.cursor.execute('CREATE INDEX idx_archive_archived_at ON tasks_archive (archived_at)')
+    # Archived rows are only ever inserted or deleted, never edited.
+    db.cursor.execute('''
+    CREATE VIRTUAL TABLE tasks_archive_fts USING fts5(
+        task, issue, remark, status, content='tasks_archive', content_rowid='id'
+    )
+    ''')
+    db.cursor.execute('''
+    CREATE TRIGGER tasks_archive_fts_insert AFTER INSERT ON tasks_archive
+    BEGIN
+        INSERT INTO tasks_archive_fts (rowid, task, issue, remark, status)
+        VALUES (NEW.id, NEW.task, NEW.issue, NEW.remark, NEW.status);
+    END
+    ''')
+    db.cursor.execute('''
+    CREATE TRIGGER tasks_archive_fts_delete AFTER DELETE ON tasks_archive
+    BEGIN
+        INSERT INTO tasks_archive_fts (tasks_archive_fts, rowid, task, issue, remark, status)
+        VALUES ('delete', OLD.id, OLD.task, OLD.issue, OLD.remark, OLD.status);
+    END
+    ''')
+    db.cursor.execute('''
+    CREATE TABLE maintenance (
+        name TEXT PRIMARY KEY,
+        ran_at INTEGER NOT NULL
+    ) WITHOUT ROWID
+    ''')
+
+
+def create_sort_indexes(db):
+    """Indexes for the sortable columns that had none, so a sorted page of a large view is an index scan."""
+    for name, column in (('idx_tasks_completion_date', 'completion_date'),
+                         ('idx_tasks_progress', 'progress_percentage')):
+        db.cursor.execute(f'CREATE INDEX {name} ON tasks ({column})')
+
+
+def create_artifacts(db):
+    """Index of the files behind test_result_path; see artifacts.py."""
+    db.cursor.execute('''
+    CREATE TABLE artifacts (
+        path TEXT PRIMARY KEY,
+        kind TEXT NOT NULL CHECK (kind IN ('file', 'dir', 'missing', 'error')),
+        size INTEGER,
+        mtime_ns INTEGER,
+        hash TEXT,
+        result TEXT CHECK (result IS NULL OR result IN ('pass', 'fail')),
+        summary TEXT NOT NULL DEFAULT '',
+        scanned_at INTEGER NOT NULL
+    ) WITHOUT ROWID
+    ''')
+
+
+def create_reminder_cleanup(db):
+    """Delete a task's reminders when the task is deleted or archived, and drop those already orphaned."""
+    db.cursor.execute('DELETE FROM reminders WHERE task_id NOT IN (SELECT id FROM tasks)')
+    db.cursor.execute('CREATE INDEX idx_reminders_task ON reminders (task_id)')
+    db.cursor.execute('''
+    CREATE TRIGGER tasks_reminders_delete AFTER DELETE ON tasks
+    BEGIN
+        DELETE FROM reminders WHERE task_id = OLD.id;
+    END
+    ''')
+
+
+MIGRATIONS = [
+    (1, "baseline schema", create_baseline),
+    (2, "typed task columns, lookup tables, timestamps and covering indexes", create_typed_tasks),
+    (3, "undo history for bulk operations", create_task_batches),
+    (4, "archive tier, never-reused task ids and maintenance log", create_archive),
+    (5, "indexes for sorting by completion date and progress", create_sort_indexes),
+    (6, "test-result artifact index", create_artifacts),
+    (7, "reminders deleted with their task", create_reminder_cleanup),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# Milliseconds a migration waits for other connections' write locks; a large
+# upgrade holds the lock for minutes, far past the connection default of 5s.
+MIGRATE_BUSY_TIMEOUT = 30 * 60 * 1000
+
+
+def schema_version(db):
+    return db.conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(db, dry_run=False):
+    """Apply pending migrations in one transaction and return [(version, description, seconds, details)].
+
+    With `dry_run` everything runs, then is rolled back.
+    """
+    if schema_version(db) >= LATEST_VERSION and not dry_run:
+        return []
+    db.conn.commit()
+    busy_timeout = db.conn.execute('PRAGMA busy_timeout').fetchone()[0]
+    db.conn.execute(f'PRAGMA busy_timeout = {MIGRATE_BUSY_TIMEOUT}')
+    try:
+        db.cursor.execute('BEGIN IMMEDIATE')
+    finally:
+        db.conn.execute(f'PRAGMA busy_timeout = {busy_timeout}')
+    report = []
+    try:
+        # Re-read under the write lock: another connection may have just migrated.
+        current = schema_version(db)
+        for version, description, func in MIGRATIONS:
+            if version <= current:
+                continue
+            start = time.perf_counter()
+            details = func(db)
+            db.cursor.execute(f'PRAGMA user_version = {version}')
+            report.append((version, description, time.perf_counter() - start, details or ''))
+    except BaseException:
+        db.conn.rollback()
+        raise
+    if dry_run:
+        db.conn.rollback()
+    else:
+        db.conn.commit()
+    return report
+
+
+def check_version(db):
+    """Raise RuntimeError if `db` has not been migrated to LATEST_VERSION."""
+    version = schema_version(db)
+    if version < LATEST_VERSION:
+        raise RuntimeError(f"{db.db_name}.db is at schema version {version}, expected {LATEST_VERSION}; "
+                           f"run: python database.py migrate {db.db_name}")
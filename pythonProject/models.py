@@ -0,0 +1,157 @@
+# models.py
+
+import sys
+import threading
+import weakref
+from dataclasses import dataclass
+from datetime import date
+from enum import Enum
+from functools import lru_cache
+
+
+class Status(Enum):
+    DONE = 'Done'
+    PENDING = 'Pending'
+    DESCOPED = 'Descoped'
+    BLOCKER = 'Blocker'
+    INPROGRESS = 'Inprogress'
+    CLOSED = 'Closed'
+
+
+class Priority(Enum):
+    HIGH = 'High'
+    MEDIUM = 'Medium'
+    LOW = 'Low'
+
+
+STATUSES = tuple(status.value for status in Status)
+PRIORITIES = tuple(priority.value for priority in Priority)
+
+_STATUSES = {status.value: status for status in Status}
+_PRIORITIES = {priority.value.lower(): priority for priority in Priority}
+
+
+@lru_cache(maxsize=8192)
+def parse_date(value):
+    # Cached, so every task due on the same day shares one date object.
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return value
+
+
+def text(value):
+    """The stored/displayed text of a Task field value."""
+    if value is None:
+        return ''
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+@dataclass(slots=True, weakref_slot=True, eq=False)
+class Task:
+    """One task with typed fields.
+
+    Dates are `date` objects, status and priority are enums and progress is
+    an int. Values that do not parse (legacy free text) are kept as strings
+    so nothing is lost; `row()` turns a Task back into its stored columns.
+    """
+    id: int
+    assigned_date: date | str | None
+    task: str
+    status: Status | str
+    completion_date: date | str | None
+    issue: str
+    remark: str
+    test_result_path: str
+    assigned_to: str
+    priority: Priority | str | None
+    progress_percentage: int
+
+    @classmethod
+    def from_row(cls, row):
+        task = cls.__new__(cls)
+        task.refresh(row)
+        return task
+
+    def refresh(self, row):
+        (self.id, assigned_date, self.task, status, completion_date, self.issue, self.remark,
+         self.test_result_path, assigned_to, priority, progress) = row
+        self.assigned_date = parse_date(assigned_date)
+        self.completion_date = parse_date(completion_date)
+        self.status = _STATUSES.get(status, status)
+        self.priority = _PRIORITIES.get(priority.lower(), priority) if priority else None
+        self.assigned_to = sys.intern(assigned_to) if assigned_to else ''
+        try:
+            self.progress_percentage = int(progress or 0)
+        except (TypeError, ValueError):
+            self.progress_percentage = 0
+
+    def row(self):
+        return (self.id, *self.values())
+
+    def values(self):
+        """Column values without the id, as stored and as shown in the table."""
+        return (
+            text(self.assigned_date), self.task, text(self.status), text(self.completion_date), self.issue,
+            self.remark, self.test_result_path, self.assigned_to, text(self.priority), self.progress_percentage
+        )
+
+    @property
+    def status_text(self):
+        return text(self.status)
+
+
+class TaskCache:
+    """Identity map from task id to the one Task object for that id.
+
+    Entries are weak, so the cache holds only tasks something else (a view,
+    a form) still uses. Loading an unchanged row returns the existing object;
+    a changed row gets a new one, so a Task the UI holds (and has sorted on)
+    never changes under it from another thread. Ids written since they were
+    loaded are marked stale and re-read by the next `Database.get_task`.
+    """
+
+    def __init__(self):
+        self.tasks = weakref.WeakValueDictionary()
+        self.stale = set()
+        self.lock = threading.Lock()
+
+    def load(self, row):
+        task = Task.from_row(row)
+        with self.lock:
+            cached = self.tasks.get(row[0])
+            if cached is not None and cached.row() == task.row():
+                task = cached
+            else:
+                self.tasks[task.id] = task
+            self.stale.discard(task.id)
+        return task
+
+    def get(self, task_id):
+        with self.lock:
+            return None if task_id in self.stale else self.tasks.get(task_id)
+
+    def invalidate(self, task_ids):
+        with self.lock:
+            self.stale.update(task_id for task_id in task_ids if task_id in self.tasks)
+
+    def __len__(self):
+        return len(self.tasks)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def task_cache(db_name):
+    """The TaskCache shared by every connection to `db_name` in this process."""
+    with _caches_lock:
+        if db_name not in _caches:
+            _caches[db_name] = TaskCache()
+        return _caches[db_name]
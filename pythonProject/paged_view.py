@@ -0,0 +1,221 @@
+# paged_view.py
+
+from collections import OrderedDict
+from tkinter import ttk
+from db_executor import deliver
+
+
+class PagedTreeview:
+    """Shows a window of a large result set in a Treeview.
+
+    Only the rows that fit on screen exist as Tk items; they are reused and
+    refilled as the user scrolls. Nothing is queried on the Tk thread:
+    `fetch_bounds(page_size)` returns a future of (row count, the sort key
+    ending each page), which drives the scrollbar, and `fetch_page(limit,
+    after)` a future of the rows after one of those keys (None for the first
+    page). Pages are kept in a small LRU cache; rows not loaded yet show
+    blank until their page arrives.
+    """
+
+    def __init__(self, tree, scrollbar, fetch_page, fetch_bounds, make_item, on_error=None,
+                 page_size=200, cache_pages=16):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.fetch_page = fetch_page
+        self.fetch_bounds = fetch_bounds
+        self.make_item = make_item
+        self.on_error = on_error
+        self.page_size = page_size
+        self.cache_pages = cache_pages
+        self.pages = OrderedDict()
+        # Pages from before the last reload, shown until their replacement arrives.
+        self.stale = {}
+        self.loading = set()
+        self.keys = None
+        self.bounds_future = None
+        self.bounds_due = False
+        # Bumped when the query changes (bounds in flight are dropped) and when
+        # new bounds replace the pages (pages in flight are dropped).
+        self.query = 0
+        self.generation = 0
+        self.slots = []
+        self.slot_rows = {}
+        self.total = 0
+        self.top = 0
+        self.rows_visible = 1
+        self.prefetch_job = None
+
+        scrollbar.configure(command=self.yview)
+        tree.configure(yscrollcommand='')
+        tree.bind('<Configure>', self.on_configure, add='+')
+        tree.bind('<MouseWheel>', self.on_wheel)
+        tree.bind('<Button-4>', lambda event: self.scroll(-3))
+        tree.bind('<Button-5>', lambda event: self.scroll(3))
+
+    def reset(self):
+        """Reload the row count and pages after the data changed, keeping the scroll position.
+
+        The rows on screen stay until the new ones arrive. Resets while a
+        reload is running are folded into one more reload after it.
+        """
+        self.bounds_due = True
+        if self.bounds_future is None:
+            self.load_bounds()
+
+    def restart(self):
+        """Reload from scratch after the query itself (sort or filter) changed."""
+        self.query += 1
+        self.drop_pages()
+        self.keys = None
+        self.reset()
+
+    def drop_pages(self):
+        self.generation += 1
+        self.stale = dict(self.pages) or self.stale
+        self.pages.clear()
+        self.loading.clear()
+
+    def load_bounds(self):
+        self.bounds_due = False
+        query = self.query
+        self.bounds_future = future = self.fetch_bounds(self.page_size)
+        deliver(self.tree, future, lambda bounds: self.bounds_loaded(query, bounds), self.bounds_failed)
+
+    def bounds_loaded(self, query, bounds):
+        self.bounds_future = None
+        if query == self.query:
+            self.total, self.keys = bounds
+            self.drop_pages()
+            self.render()
+        if self.bounds_due:
+            self.load_bounds()
+
+    def bounds_failed(self, error):
+        self.bounds_future = None
+        if self.on_error is not None:
+            self.on_error(error)
+
+    def row_for(self, item):
+        """The row currently shown in Treeview item `item`, or None."""
+        return self.slot_rows.get(item)
+
+    def load_page(self, number):
+        if number in self.pages or number in self.loading:
+            return
+        if number == 0:
+            after = None
+        elif self.keys is not None and number <= len(self.keys):
+            after = self.keys[number - 1]
+        else:
+            return
+        self.loading.add(number)
+        generation = self.generation
+        future = self.fetch_page(self.page_size, after)
+        deliver(self.tree, future, lambda rows: self.page_loaded(generation, number, rows),
+                lambda error: self.page_failed(generation, number, error))
+
+    def page_loaded(self, generation, number, rows):
+        if generation != self.generation:
+            return
+        self.loading.discard(number)
+        self.stale.pop(number, None)
+        self.pages[number] = rows
+        while len(self.pages) > self.cache_pages:
+            self.pages.popitem(last=False)
+        if number in self.visible_pages():
+            self.render()
+
+    def page_failed(self, generation, number, error):
+        if generation == self.generation:
+            self.loading.discard(number)
+        if self.on_error is not None:
+            self.on_error(error)
+
+    def visible_pages(self):
+        if not self.total:
+            return range(0)
+        stop = min(self.top + self.rows_visible, self.total)
+        return range(self.top // self.page_size, (stop - 1) // self.page_size + 1)
+
+    def rows(self, start, stop):
+        """Rows `start` to `stop`, with None for those whose page has not arrived."""
+        result = []
+        for number in range(start // self.page_size, (stop - 1) // self.page_size + 1):
+            base = number * self.page_size
+            if number in self.pages:
+                self.pages.move_to_end(number)
+                rows = self.pages[number]
+            else:
+                rows = self.stale.get(number, ())
+            wanted = min(stop, base + self.page_size) - max(start, base)
+            shown = rows[max(start - base, 0):stop - base]
+            result.extend(shown)
+            result.extend([None] * (wanted - len(shown)))
+        return result
+
+    def render(self):
+        self.top = max(0, min(self.top, self.total - self.rows_visible))
+        rows = self.rows(self.top, min(self.top + self.rows_visible, self.total)) if self.total else []
+
+        while len(self.slots) > len(rows):
+            self.slot_rows.pop(self.slots[-1], None)
+            self.tree.delete(self.slots.pop())
+        while len(self.slots) < len(rows):
+            self.slots.append(self.tree.insert('', 'end'))
+        for index, (slot, row) in enumerate(zip(self.slots, rows), start=self.top):
+            if row is None:
+                self.tree.item(slot, values=(), tags=())
+            else:
+                values, tags = self.make_item(row, index)
+                self.tree.item(slot, values=values, tags=tags)
+            self.slot_rows[slot] = row
+
+        if self.total:
+            self.scrollbar.set(self.top / self.total, min(self.top + self.rows_visible, self.total) / self.total)
+        else:
+            self.scrollbar.set(0, 1)
+        self.schedule_prefetch()
+
+    def schedule_prefetch(self):
+        # After idle, so dragging the scrollbar asks only for the pages it stops on.
+        if self.prefetch_job is not None:
+            self.tree.after_cancel(self.prefetch_job)
+        self.prefetch_job = self.tree.after_idle(self.prefetch)
+
+    def prefetch(self):
+        self.prefetch_job = None
+        visible = self.visible_pages()
+        if not visible:
+            return
+        last_page = (self.total - 1) // self.page_size
+        for number in (*visible, visible[-1] + 1, visible[0] - 1):
+            if 0 <= number <= last_page:
+                self.load_page(number)
+
+    def scroll(self, rows):
+        self.jump(self.top + rows)
+        return 'break'
+
+    def jump(self, top):
+        top = max(0, min(top, self.total - self.rows_visible))
+        if top != self.top:
+            self.tree.selection_remove(self.tree.selection())
+            self.top = top
+            self.render()
+
+    def yview(self, *args):
+        if args[0] == 'moveto':
+            self.jump(int(float(args[1]) * self.total))
+        elif args[0] == 'scroll':
+            step = self.rows_visible if args[2] == 'pages' else 1
+            self.jump(self.top + int(args[1]) * step)
+
+    def on_wheel(self, event):
+        return self.scroll(-3 if event.delta > 0 else 3)
+
+    def on_configure(self, event):
+        row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        rows_visible = max(1, (event.height - row_height) // row_height)
+        if rows_visible != self.rows_visible:
+            self.rows_visible = rows_visible
+            self.render()
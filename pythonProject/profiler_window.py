@@ -0,0 +1,93 @@
+# profiler_window.py
+
+import tkinter as tk
+from tkinter import ttk
+from instrumentation import profiler
+
+# How often (ms) the window re-reads the profiler.
+REFRESH_INTERVAL = 1000
+
+METRIC_COLUMNS = ('Metric', 'Count', 'p50 ms', 'p90 ms', 'p99 ms', 'Max ms')
+
+
+class ProfilerWindow(tk.Toplevel):
+    """Live percentiles for every timed path, plus the slow-query log with plans."""
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Profiler")
+        self.geometry('900x600')
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_rowconfigure(2, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        toolbar = ttk.Frame(self)
+        toolbar.grid(row=0, column=0, sticky='ew', padx=5, pady=5)
+        self.enabled = tk.BooleanVar(value=profiler.enabled)
+        ttk.Checkbutton(toolbar, text="Profiling on", variable=self.enabled, command=self.toggle).pack(side='left')
+        ttk.Button(toolbar, text="Reset", command=self.reset).pack(side='left', padx=5)
+        self.summary_var = tk.StringVar()
+        ttk.Label(toolbar, textvariable=self.summary_var).pack(side='left', padx=10)
+
+        self.metrics = ttk.Treeview(self, columns=METRIC_COLUMNS, show='headings')
+        for col in METRIC_COLUMNS:
+            self.metrics.heading(col, text=col)
+            self.metrics.column(col, width=220 if col == 'Metric' else 90, anchor='w' if col == 'Metric' else 'e')
+        self.metrics.grid(row=1, column=0, sticky='nsew', padx=5)
+
+        slow = ttk.Panedwindow(self, orient='horizontal')
+        slow.grid(row=2, column=0, sticky='nsew', padx=5, pady=5)
+        self.slow_list = ttk.Treeview(slow, columns=('ms', 'sql'), show='headings')
+        self.slow_list.heading('ms', text='Slow query ms')
+        self.slow_list.heading('sql', text='SQL')
+        self.slow_list.column('ms', width=90, anchor='e')
+        self.slow_list.bind('<<TreeviewSelect>>', self.show_plan)
+        self.plan_text = tk.Text(slow, height=8, wrap='word', state='disabled')
+        slow.add(self.slow_list, weight=3)
+        slow.add(self.plan_text, weight=2)
+
+        self.slow_entries = []
+        self.refresh()
+
+    def toggle(self):
+        if self.enabled.get():
+            profiler.enable()
+        else:
+            profiler.disable()
+
+    def reset(self):
+        profiler.reset()
+        self.refresh_now()
+
+    def refresh(self):
+        if not self.winfo_exists():
+            return
+        self.refresh_now()
+        self.after(REFRESH_INTERVAL, self.refresh)
+
+    def refresh_now(self):
+        self.metrics.delete(*self.metrics.get_children())
+        for name, (count, p50, p90, p99, worst) in sorted(profiler.summary().items()):
+            self.metrics.insert('', 'end', values=(
+                name, count, *(f"{seconds * 1000:.2f}" for seconds in (p50, p90, p99, worst))
+            ))
+        with profiler.lock:
+            entries = list(profiler.slow_queries)
+            errors = sum(count for name, count in profiler.counters.items() if name.startswith('errors.'))
+        if entries != self.slow_entries:
+            self.slow_entries = entries
+            self.slow_list.delete(*self.slow_list.get_children())
+            for index, entry in enumerate(reversed(entries)):
+                self.slow_list.insert('', 'end', iid=str(index), values=(f"{entry['seconds'] * 1000:.1f}", entry['sql']))
+        state = "on" if profiler.enabled else "off"
+        self.summary_var.set(f"Profiling {state}; {len(entries)} slow queries kept, {errors} errors")
+
+    def show_plan(self, event=None):
+        selection = self.slow_list.selection()
+        if not selection:
+            return
+        entry = list(reversed(self.slow_entries))[int(selection[0])]
+        self.plan_text.config(state='normal')
+        self.plan_text.delete('1.0', tk.END)
+        self.plan_text.insert('1.0', f"{entry['sql']}\n\nThread: {entry['thread']}\n\n{entry['plan']}")
+        self.plan_text.config(state='disabled')
@@ -0,0 +1,146 @@
+# reminders.py
+
+import heapq
+import queue
+import re
+import threading
+import time
+from database import Database
+from instrumentation import profiler
+
+UNIT_SECONDS = {'m': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_duration(text):
+    """Seconds for 'H:M', 'N' or 'Nm' (minutes), 'Nh' (hours) or 'Nd' (days)."""
+    text = text.strip().lower()
+    if ':' in text:
+        hours, minutes = map(int, text.split(':'))
+        return hours * 3600 + minutes * 60
+    match = re.fullmatch(r'(\d+)\s*([mhd]?)', text)
+    if not match:
+        raise ValueError(f"Invalid time: {text}")
+    return int(match.group(1)) * UNIT_SECONDS[match.group(2) or 'm']
+
+
+def parse_reminder(text):
+    """Return (delay, repeat) seconds for input like '30m' or '2h every 1d'."""
+    delay, _, repeat = text.lower().partition('every')
+    seconds = parse_duration(delay)
+    repeat_seconds = parse_duration(repeat) if repeat.strip() else None
+    if repeat_seconds == 0:
+        raise ValueError("Repeat interval must be positive")
+    return seconds, repeat_seconds
+
+
+class ReminderScheduler:
+    """Fires persisted reminders from one thread, ordered by a heap of due times.
+
+    Reminders live in the `reminders` table and are reloaded when the thread
+    starts, so they survive restarts; overdue ones fire straight away. All
+    table writes go through the database executor. Due reminders are put on
+    `notifications` as (task_id, message) for the Tk thread to pick up.
+    A reminder whose task was deleted or archived meanwhile is dropped instead.
+    """
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.notifications = queue.Queue()
+        self.heap = []
+        self.entries = {}
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, name=f"reminders-{executor.db_name}", daemon=True)
+        self.thread.start()
+
+    def add(self, task_id, message, delay, repeat_seconds=None):
+        due_at = time.time() + delay
+        future = self.executor.submit(Database.add_reminder, task_id, message, due_at, repeat_seconds)
+
+        def stored(done):
+            if done.exception() is None:
+                self.schedule(done.result(), due_at, task_id, message, repeat_seconds)
+
+        future.add_done_callback(stored)
+        return future
+
+    def schedule(self, reminder_id, due_at, task_id, message, repeat_seconds):
+        with self.condition:
+            # Rescheduling just pushes a new heap entry; the old one is
+            # recognised as stale when it reaches the top and skipped.
+            self.entries[reminder_id] = (due_at, task_id, message, repeat_seconds)
+            heapq.heappush(self.heap, (due_at, reminder_id))
+            self.condition.notify()
+
+    def cancel(self, reminder_id):
+        with self.condition:
+            self.entries.pop(reminder_id, None)
+        return self.executor.submit(Database.delete_reminder, reminder_id)
+
+    def pending(self):
+        with self.condition:
+            return len(self.entries)
+
+    def drain(self):
+        """Return the notifications that are due, without blocking."""
+        due = []
+        while True:
+            try:
+                due.append(self.notifications.get_nowait())
+            except queue.Empty:
+                return due
+
+    def run(self):
+        try:
+            for row in self.executor.submit(Database.fetch_reminders).result():
+                self.schedule(*row)
+        except Exception as e:
+            profiler.error('reminders', f"could not load reminders: {e}")
+        with self.condition:
+            while not self.stopped:
+                if not self.heap:
+                    self.condition.wait()
+                    continue
+                due_at, reminder_id = self.heap[0]
+                entry = self.entries.get(reminder_id)
+                if entry is None or entry[0] != due_at:
+                    heapq.heappop(self.heap)
+                    continue
+                delay = due_at - time.time()
+                if delay > 0:
+                    self.condition.wait(delay)
+                    continue
+                heapq.heappop(self.heap)
+                self.fire(reminder_id, entry)
+
+    def fire(self, reminder_id, entry):
+        due_at, task_id, message, repeat_seconds = entry
+        if repeat_seconds:
+            # Skip occurrences missed while the app was closed.
+            now = time.time()
+            missed = max(0, int((now - due_at) // repeat_seconds))
+            next_due = due_at + (missed + 1) * repeat_seconds
+            self.entries[reminder_id] = (next_due, task_id, message, repeat_seconds)
+            heapq.heappush(self.heap, (next_due, reminder_id))
+            future = self.executor.submit(Database.reschedule_reminder, reminder_id, next_due)
+        else:
+            del self.entries[reminder_id]
+            future = self.executor.submit(Database.delete_reminder, reminder_id)
+
+        def notify(done):
+            # The row is gone when its task was deleted or archived since the reminder was loaded.
+            if done.exception() is not None:
+                profiler.error('reminders', f"reminder {reminder_id}: {done.exception()}")
+                self.notifications.put((task_id, message))
+            elif done.result():
+                self.notifications.put((task_id, message))
+            else:
+                with self.condition:
+                    self.entries.pop(reminder_id, None)
+
+        future.add_done_callback(notify)
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
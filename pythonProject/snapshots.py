@@ -0,0 +1,253 @@
+# snapshots.py
+"""Point-in-time snapshots of a task database.
+
+`create_snapshot` copies the live file with SQLite's online backup API a
+few hundred pages per step on its own connection, pausing between steps,
+so the app and its writer keep running while a large database is copied.
+The backup holds one read transaction for its whole run: in WAL mode
+commits from other connections then neither block it nor restart it, and
+the copy is the database as of the moment it started.
+
+Each snapshot is a gzip-compressed database file in SNAPSHOT_DIR next to
+the database, named after the database, the time and the change-log
+cursor it was taken at. A snapshot whose cursor equals the newest one's
+would hold the same tasks and is not taken again, so the scheduler only
+copies databases that changed. `prune_snapshots` keeps the newest few.
+
+`compare_snapshot` diffs a snapshot's active tasks against the live table
+by id. `restore_snapshot` applies that diff as one undoable batch through
+the normal write path, so the change feed, search index and open views
+see a restore like any other edit, and `undo` takes it back.
+"""
+import gzip
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from database import TASK_FIELDS, TASK_COLUMNS, IDS_IN, RESTORE_TASKS
+from instrumentation import profiler
+
+SNAPSHOT_DIR = 'snapshots'
+# Pages copied per backup step (4 KiB each); a step takes about a millisecond.
+BACKUP_PAGES = 256
+# Seconds slept between backup steps, so other threads get the GIL and the disk.
+BACKUP_PAUSE = 0.001
+# Bytes compressed per chunk.
+COMPRESS_CHUNK = 256 * 1024
+COMPRESS_LEVEL = 6
+
+SNAPSHOT_INTERVAL = 6 * 3600
+# Snapshots kept per database by the scheduler; older ones are deleted.
+SNAPSHOT_KEEP = 10
+# How often (seconds) the scheduler checks whether a snapshot is due.
+SNAPSHOT_CHECK = 600
+
+_SNAPSHOT_NAME = re.compile(r'^(?P<name>.+)-(?P<stamp>\d{8}-\d{6})-(?P<cursor>\d+)\.db(?:\.gz)?$')
+
+
+def snapshot_dir(db_name, directory=None):
+    return directory or os.path.join(os.path.dirname(os.path.abspath(f"{db_name}.db")), SNAPSHOT_DIR)
+
+
+def list_snapshots(db_name, directory=None):
+    """(path, taken at, change cursor) of every snapshot of `db_name`, newest first."""
+    directory = snapshot_dir(db_name, directory)
+    if not os.path.isdir(directory):
+        return []
+    found = []
+    for entry in os.scandir(directory):
+        match = _SNAPSHOT_NAME.match(entry.name)
+        if match and match['name'] == os.path.basename(db_name):
+            taken_at = time.mktime(time.strptime(match['stamp'], '%Y%m%d-%H%M%S'))
+            found.append((entry.path, taken_at, int(match['cursor'])))
+    return sorted(found, key=lambda snapshot: (snapshot[1], snapshot[2]), reverse=True)
+
+
+def backup(source, target_path, pages=BACKUP_PAGES, pause=BACKUP_PAUSE, progress=None):
+    """Copy `source` (a connection already inside a read transaction) to a plain database file."""
+    def step(status, remaining, total):
+        if progress is not None:
+            progress(total - remaining, total)
+        time.sleep(pause)
+
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target, pages=pages, progress=step)
+        # The copy keeps the source's WAL flag; a standalone file is simpler without it.
+        target.execute('PRAGMA journal_mode=DELETE')
+    finally:
+        target.close()
+
+
+def compress(source_path, target_path, level=COMPRESS_LEVEL, pause=BACKUP_PAUSE):
+    with open(source_path, 'rb') as source, gzip.open(target_path, 'wb', compresslevel=level) as target:
+        while True:
+            chunk = source.read(COMPRESS_CHUNK)
+            if not chunk:
+                break
+            target.write(chunk)
+            time.sleep(pause)
+
+
+def create_snapshot(db_name, directory=None, if_changed=True, compressed=True, pages=BACKUP_PAGES,
+                    pause=BACKUP_PAUSE, progress=None):
+    """Snapshot `db_name` and return its path, or None when `if_changed` and nothing changed since the last one.
+
+    `progress(pages copied, total pages)` is called after every backup step.
+    """
+    directory = snapshot_dir(db_name, directory)
+    os.makedirs(directory, exist_ok=True)
+    source = sqlite3.connect(f"{db_name}.db", isolation_level=None)
+    try:
+        # Reading inside the transaction pins the snapshot the backup copies.
+        source.execute('BEGIN')
+        cursor = source.execute('SELECT COALESCE(MAX(seq), 0) FROM task_changes').fetchone()[0]
+        latest = list_snapshots(db_name, directory)
+        if if_changed and latest and latest[0][2] == cursor:
+            return None
+        name = f"{os.path.basename(db_name)}-{time.strftime('%Y%m%d-%H%M%S')}-{cursor}.db"
+        path = os.path.join(directory, name + ('.gz' if compressed else ''))
+        partial = os.path.join(directory, f".{name}.partial")
+        try:
+            backup(source, partial, pages, pause, progress)
+            source.execute('COMMIT')
+            if compressed:
+                compress(partial, f"{partial}.gz", pause=pause)
+                os.remove(partial)
+                partial += '.gz'
+            os.replace(partial, path)
+        except BaseException:
+            for leftover in (partial, f"{partial}.gz"):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            raise
+        return path
+    finally:
+        source.close()
+
+
+def prune_snapshots(db_name, keep=SNAPSHOT_KEEP, directory=None):
+    """Delete all but the newest `keep` snapshots of `db_name`; returns the deleted paths."""
+    removed = [path for path, _, _ in list_snapshots(db_name, directory)[keep:]]
+    for path in removed:
+        os.remove(path)
+    return removed
+
+
+def read_snapshot(path):
+    """The active tasks in a snapshot file, as [*TASK_FIELDS, created_at] rows ordered by id."""
+    with tempfile.TemporaryDirectory(prefix='task-snapshot-') as scratch:
+        if path.endswith('.gz'):
+            plain = os.path.join(scratch, 'snapshot.db')
+            with gzip.open(path, 'rb') as source, open(plain, 'wb') as target:
+                shutil.copyfileobj(source, target, COMPRESS_CHUNK)
+        else:
+            plain = path
+        conn = sqlite3.connect(f"file:{plain}?mode=ro", uri=True)
+        try:
+            return conn.execute(f'SELECT {TASK_COLUMNS}, created_at FROM tasks ORDER BY id').fetchall()
+        finally:
+            conn.close()
+
+
+def diff_tasks(db, rows):
+    """(snapshot-only rows, live-only rows, [(snapshot row, live row)] that differ) against the live tasks."""
+    snapshot = {row[0]: row for row in rows}
+    db.cursor.execute(f'SELECT {TASK_COLUMNS}, created_at FROM tasks')
+    live = {row[0]: row for row in db.cursor.fetchall()}
+    fields = len(TASK_FIELDS)
+    only_snapshot = [row for task_id, row in snapshot.items() if task_id not in live]
+    only_live = [row for task_id, row in live.items() if task_id not in snapshot]
+    changed = [(row, live[task_id]) for task_id, row in snapshot.items()
+               if task_id in live and row[:fields] != live[task_id][:fields]]
+    return only_snapshot, only_live, changed
+
+
+def compare_snapshot(db, path, rows=None):
+    """How the live tasks differ from the snapshot at `path`, as a JSON-ready dict.
+
+    `added` and `removed` are ids added or removed since the snapshot,
+    `changed` maps the other ids to {field: [snapshot value, live value]},
+    and `archived` lists removed ids that now live in the archive.
+    """
+    only_snapshot, only_live, changed = diff_tasks(db, read_snapshot(path) if rows is None else rows)
+    removed = [row[0] for row in only_snapshot]
+    db.cursor.execute(f'SELECT id FROM tasks_archive WHERE {IDS_IN}', (json.dumps(removed),))
+    return {
+        'snapshot': path,
+        'added': [row[0] for row in only_live],
+        'removed': removed,
+        'archived': [row[0] for row in db.cursor.fetchall()],
+        'changed': {
+            old[0]: {field: [old[i], new[i]] for i, field in enumerate(TASK_FIELDS) if old[i] != new[i]}
+            for old, new in changed
+        },
+    }
+
+
+def restore_tasks(db, rows):
+    """Make the active tasks match snapshot `rows`; returns (affected ids, inverse batch). Does not commit.
+
+    Tasks archived since the snapshot stay archived; unarchive them to get
+    them back. Everything else is put back by id.
+    """
+    only_snapshot, only_live, changed = diff_tasks(db, rows)
+    ids, inverse = [], {}
+    if only_live:
+        deleted, reinsert = db.delete_tasks([row[0] for row in only_live])
+        ids.extend(deleted)
+        inverse.update(reinsert)
+    if changed:
+        fields = list(TASK_FIELDS[1:])
+        inverse['update'] = {'fields': fields, 'rows': [[new[0], new[-1], *new[1:-1]] for _, new in changed]}
+        db.restore_fields(fields, [[new[0], new[-1], *old[1:-1]] for old, new in changed])
+        ids.extend(new[0] for _, new in changed)
+    db.cursor.execute(f'SELECT id FROM tasks_archive WHERE {IDS_IN}', (json.dumps([row[0] for row in only_snapshot]),))
+    archived = {task_id for task_id, in db.cursor.fetchall()}
+    restored = [list(row) for row in only_snapshot if row[0] not in archived]
+    if restored:
+        db.cursor.execute(RESTORE_TASKS, (json.dumps(restored),))
+        inverse['delete'] = [row[0] for row in restored]
+        ids.extend(inverse['delete'])
+    return ids, inverse
+
+
+class SnapshotScheduler:
+    """Snapshots a database every `interval` seconds (when it changed) and keeps the newest `keep`.
+
+    The backup runs on this thread with its own connection, so it ties up
+    neither the writer nor the reader pool.
+    """
+
+    def __init__(self, db_name, interval=SNAPSHOT_INTERVAL, keep=SNAPSHOT_KEEP, check=SNAPSHOT_CHECK,
+                 directory=None):
+        self.db_name = db_name
+        self.interval = interval
+        self.keep = keep
+        self.check = check
+        self.directory = directory
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=f"snapshots-{db_name}", daemon=True)
+        self.thread.start()
+
+    def due(self):
+        latest = list_snapshots(self.db_name, self.directory)
+        return not latest or latest[0][1] <= time.time() - self.interval
+
+    def run(self):
+        while not self.stopped.wait(self.check):
+            try:
+                if self.due():
+                    path = create_snapshot(self.db_name, self.directory)
+                    if path is not None:
+                        profiler.log('snapshot', db=self.db_name, path=path)
+                    prune_snapshots(self.db_name, self.keep, self.directory)
+            except Exception as e:
+                profiler.error('snapshots', f"{self.db_name}: {e}")
+
+    def stop(self):
+        self.stopped.set()
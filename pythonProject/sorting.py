@@ -0,0 +1,98 @@
+# sorting.py
+"""Typed sort keys that order tasks the way Database.query does in SQL.
+
+A sort is a list of (field, descending) pairs, most significant first, as
+returned by `sort_spec`. SQLite orders the stored values: NULLs first, ISO
+dates and text by their bytes, progress as a number and priority by its
+rank. The keys here reproduce that on raw values (`value_key`, used to
+merge federated results) and on Task objects (`sort_tasks`, used to re-sort
+a loaded view without another query). Ties fall back to the task id, so the
+order is the same row for row wherever it is computed.
+"""
+from bisect import bisect
+from operator import attrgetter
+from database import RANKED_FIELDS
+from models import PRIORITIES, text
+
+_RANKS = {'priorities': {name: rank for rank, name in enumerate(PRIORITIES, start=1)}}
+
+_task_id = attrgetter('id')
+
+
+def value_key(field):
+    """A key for stored values of `field`, in SQL order (NULLs first)."""
+    ranks = _RANKS[RANKED_FIELDS[field]] if field in RANKED_FIELDS else None
+
+    def key(value):
+        if ranks is not None:
+            value = ranks.get(value)
+        return (0, 0) if value is None else (1, value)
+
+    return key
+
+
+def task_key(field):
+    """A key for Task objects on `field`, in SQL order."""
+    if field in ('id', 'progress_percentage'):
+        return attrgetter(field)
+    if field in RANKED_FIELDS:
+        ranks = _RANKS[RANKED_FIELDS[field]]
+        return lambda task: ranks.get(text(getattr(task, field)), 0)
+    # Dates are compared in their stored ISO form; a missing value is '', which sorts first like NULL.
+    return lambda task: text(getattr(task, field))
+
+
+def split_id(spec):
+    """(fields before the id, direction of the id) for `spec`.
+
+    Ids are unique, so nothing after an id field matters; without one, ties
+    take the direction of the first field, as in Database._order_clause.
+    """
+    for index, (field, descending) in enumerate(spec):
+        if field == 'id':
+            return spec[:index], descending
+    return spec, bool(spec) and spec[0][1]
+
+
+def sort_tasks(tasks, spec):
+    """`tasks` as a new list in `spec` order.
+
+    One stable sort per field, least significant first, so fields can mix
+    directions without composite keys.
+    """
+    fields, id_descending = split_id(spec)
+    ordered = sorted(tasks, key=_task_id, reverse=id_descending)
+    for field, descending in reversed(fields):
+        ordered.sort(key=task_key(field), reverse=descending)
+    return ordered
+
+
+class _Descending:
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def composite_key(spec):
+    """A single key for `spec`, for bisecting into an already sorted list."""
+    fields, id_descending = split_id(spec)
+    keys = [(task_key(field), descending) for field, descending in fields]
+    keys.append((_task_id, id_descending))
+
+    def key(task):
+        return tuple(_Descending(get(task)) if descending else get(task) for get, descending in keys)
+
+    return key
+
+
+def insert_position(ordered, task, spec, lookup=None):
+    """Where `task` belongs in `ordered` (sorted by `spec`); `lookup` maps its items to tasks."""
+    key = composite_key(spec)
+    return bisect(ordered, key(task), key=(lambda item: key(lookup(item))) if lookup else key)
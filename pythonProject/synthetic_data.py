@@ -0,0 +1,103 @@
+# synthetic_data.py
+"""Seeded synthetic task databases for benchmarks and manual testing.
+
+The same seed and anchor date always give the same rows. The distributions
+follow a real tracker rather than uniform noise:
+
+- most tasks are finished (Done or Closed);
+- a few assignees own most of the work (Zipf-like weights);
+- completion dates follow the assigned date, and only finished work has one;
+- progress matches the status;
+- issue and remark text is often empty and varies in length.
+
+    python synthetic_data.py bench_100k --count 100000 --seed 1
+"""
+import argparse
+import random
+import sys
+from datetime import date, timedelta
+from database import Database, INSERT_TASK
+
+STATUS_WEIGHTS = {'Done': 38, 'Closed': 22, 'Pending': 15, 'Inprogress': 12, 'Descoped': 8, 'Blocker': 5}
+PRIORITY_WEIGHTS = {'High': 20, 'Medium': 45, 'Low': 25, '': 10}
+ASSIGNEES = [
+    'Alice', 'Bob', 'Carol', 'Dave', 'Erin', 'Frank', 'Grace', 'Heidi', 'Ivan', 'Judy', 'Mallory', 'Niaj',
+    'Olivia', 'Peggy', 'Rupert', 'Sybil', 'Trent', 'Uma', 'Victor', 'Walter', 'Xena', 'Yusuf', 'Zoe', '', ''
+]
+VERBS = ['Fix', 'Add', 'Review', 'Test', 'Deploy', 'Investigate', 'Refactor', 'Document', 'Update', 'Remove']
+AREAS = ['login', 'report', 'export', 'sync', 'deploy', 'billing', 'search', 'dashboard', 'import', 'api',
+         'cache', 'scheduler', 'notifications', 'settings', 'backup']
+DETAILS = ['timeout', 'crash on save', 'slow query', 'wrong totals', 'missing translation', 'flaky test',
+           'memory leak', 'race condition', 'permission error', 'broken link', 'null value', 'encoding issue']
+# How far back assigned dates reach.
+HISTORY_DAYS = 730
+# Generated rows inserted per executemany.
+INSERT_BATCH = 10000
+
+
+def synthetic_rows(count, seed=0, anchor=None):
+    """Yield `count` rows of the ten non-id task columns."""
+    rnd = random.Random(seed)
+    anchor = anchor or date.today()
+    statuses, status_weights = zip(*STATUS_WEIGHTS.items())
+    priorities, priority_weights = zip(*PRIORITY_WEIGHTS.items())
+    assignee_weights = [1 / rank for rank in range(1, len(ASSIGNEES) + 1)]
+    for i in range(count):
+        status = rnd.choices(statuses, status_weights)[0]
+        area = rnd.choice(AREAS)
+        # Older tasks are more likely finished, so assigned dates skew recent for open work.
+        age = int(rnd.random() ** (0.5 if status in ('Done', 'Closed', 'Descoped') else 2) * HISTORY_DAYS)
+        assigned = anchor - timedelta(days=age)
+        if status in ('Done', 'Closed'):
+            completion = min(anchor, assigned + timedelta(days=int(rnd.expovariate(1 / 14))))
+            progress = 100
+        else:
+            # Open tasks carry a due date, some of them already past.
+            completion = assigned + timedelta(days=rnd.randint(7, 60)) if rnd.random() < 0.4 else None
+            progress = {'Pending': 0, 'Descoped': rnd.randint(0, 50)}.get(status, rnd.randint(5, 95))
+        issue = f"{rnd.choice(DETAILS)} in {area}" if rnd.random() < 0.35 else ''
+        remark = ' '.join(rnd.choice(DETAILS) for _ in range(rnd.randint(1, 6))) if rnd.random() < 0.25 else ''
+        yield (
+            assigned.isoformat(),
+            f"{rnd.choice(VERBS)} {area} {rnd.choice(DETAILS)} #{i + 1}",
+            status,
+            completion.isoformat() if completion else '',
+            issue,
+            remark,
+            f"/results/{area}/run_{i + 1}.log" if rnd.random() < 0.5 else '',
+            rnd.choices(ASSIGNEES, assignee_weights)[0],
+            rnd.choices(priorities, priority_weights)[0],
+            progress,
+        )
+
+
+def generate_database(db_name, count, seed=0, anchor=None):
+    """Append `count` synthetic tasks to `db_name` in one bulk transaction."""
+    db = Database(db_name)
+    try:
+        watermark = db.begin_bulk_insert()
+        rows = synthetic_rows(count, seed, anchor)
+        while True:
+            batch = [row for _, row in zip(range(INSERT_BATCH), rows)]
+            if not batch:
+                break
+            db.cursor.executemany(INSERT_TASK, batch)
+        db.finish_bulk_insert(watermark)
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic task database")
+    parser.add_argument('db_name', help="database name, without the .db suffix")
+    parser.add_argument('--count', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--anchor', type=date.fromisoformat, help="the 'today' dates are generated around")
+    args = parser.parse_args(argv)
+    generate_database(args.db_name, args.count, args.seed, args.anchor)
+    print(f"Added {args.count} tasks to {args.db_name}.db")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,22 +2,97 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
+from autocomplete import COMPLETION_LIMIT, completions, similar_tasks
+from database import TASK_FIELDS
+from db_executor import deliver
+from models import text, STATUSES, PRIORITIES
 from ui_components import create_label, create_entry, create_text, create_combobox, create_button
 
+# Form fields offered completions, by label.
+COMPLETED_LABELS = {"Task": 'task', "Assigned To": 'assigned_to'}
+# Milliseconds after the last key press in Task before looking for duplicates.
+DUPLICATE_DELAY = 150
+DUPLICATE_MIN_CHARS = 4
+
+
+class SuggestionList:
+    """Completions shown under an entry: Up/Down pick one, Return or a click takes it, Escape closes."""
+
+    def __init__(self, entry, complete):
+        self.entry = entry
+        self.complete = complete
+        self.listbox = tk.Listbox(entry.winfo_toplevel(), font=("Helvetica", 12), activestyle='none',
+                                  exportselection=False, takefocus=0)
+        self.listbox.bind('<Button-1>', self.on_click)
+        entry.bind('<KeyRelease>', self.on_key, add='+')
+        entry.bind('<Down>', lambda event: self.move(1))
+        entry.bind('<Up>', lambda event: self.move(-1))
+        entry.bind('<Return>', self.accept)
+        entry.bind('<Escape>', self.hide)
+        entry.bind('<FocusOut>', self.hide, add='+')
+
+    def shown(self):
+        return bool(self.listbox.winfo_manager())
+
+    def on_key(self, event):
+        if event.keysym in ('Up', 'Down', 'Return', 'Escape', 'Tab') or not event.char and event.keysym != 'BackSpace':
+            return
+        values = self.complete(self.entry.get())
+        if not values:
+            self.hide()
+            return
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *values)
+        self.listbox.config(height=len(values))
+        self.listbox.place(in_=self.entry, x=0, rely=1.0, relwidth=1.0)
+        self.listbox.lift()
+
+    def move(self, step):
+        if not self.shown():
+            return None
+        selection = self.listbox.curselection()
+        index = max(0, min(self.listbox.size() - 1, selection[0] + step if selection else 0))
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(index)
+        self.listbox.see(index)
+        return 'break'
+
+    def accept(self, event=None):
+        selection = self.listbox.curselection()
+        if not self.shown() or not selection:
+            self.hide()
+            return None
+        self.entry.delete(0, tk.END)
+        self.entry.insert(0, self.listbox.get(selection[0]))
+        self.hide()
+        return 'break'
+
+    def on_click(self, event):
+        # Handled here rather than by the Listbox bindings, so the entry keeps the focus.
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(self.listbox.nearest(event.y))
+        self.accept()
+        return 'break'
+
+    def hide(self, event=None):
+        self.listbox.place_forget()
+
 
 class TaskForm(tk.Toplevel):
-    def __init__(self, parent, task_manager, db, values=None, selected_item=None):
+    def __init__(self, parent, task_manager, task=None):
         super().__init__(parent)
         self.task_manager = task_manager
-        self.db = db
-        self.values = values
-        self.selected_item = selected_item
+        self.task = task
+        self.completions = {}
+        self.duplicate_job = None
         self.create_widgets()
         self.populate_fields()
+        deliver(task_manager.parent, completions(task_manager.executor), self.set_completions,
+                lambda e: task_manager.log_error(f"Completion index error: {e}"))
 
     def create_widgets(self):
         self.title("Task Form")
-        self.geometry('730x610')
+        self.geometry('730x650')
         self.configure(bg='lightgrey')
         self.entries = {}
 
@@ -33,17 +108,56 @@ class TaskForm(tk.Toplevel):
                 entry.bind('<KeyRelease>', self.adjust_text_height)
             elif label == "Status":
                 status_options = ["Done", "Pending", "Descoped", "Blocker", "Inprogress"]
-                if self.values:
+                if self.task:
                     status_options.append("Closed")
                 entry = create_combobox(self, i, 1, status_options)
+            elif label == "Priority":
+                entry = create_combobox(self, i, 1, list(PRIORITIES))
             else:
                 entry = create_entry(self, i, 1)
                 entry.bind('<KeyRelease>', self.adjust_entry_width)
+            if label in COMPLETED_LABELS:
+                SuggestionList(entry, lambda prefix, field=COMPLETED_LABELS[label]: self.complete(field, prefix))
             self.entries[label] = entry
+        self.entries["Task"].bind('<KeyRelease>', self.schedule_duplicate_check, add='+')
 
         save_button = create_button(self, "Save", self.save_task, len(labels), 0, columnspan=2)
+        self.duplicates_var = tk.StringVar()
+        tk.Label(self, textvariable=self.duplicates_var, fg='darkred', bg='lightgrey', wraplength=700,
+                 justify='left').grid(row=len(labels) + 1, column=0, columnspan=2, sticky='w', padx=10)
         self.style_buttons()
 
+    def set_completions(self, indexes):
+        self.completions = indexes
+
+    def complete(self, field, prefix):
+        index = self.completions.get(field)
+        return index.complete(prefix, COMPLETION_LIMIT) if index is not None else []
+
+    def schedule_duplicate_check(self, event=None):
+        if self.duplicate_job is not None:
+            self.after_cancel(self.duplicate_job)
+        self.duplicate_job = self.after(DUPLICATE_DELAY, self.check_duplicates)
+
+    def check_duplicates(self):
+        """Look up tasks whose title nearly matches the one being typed, off the Tk thread."""
+        self.duplicate_job = None
+        title = self.entries["Task"].get().strip()
+        if len(title) < DUPLICATE_MIN_CHARS:
+            self.duplicates_var.set('')
+            return
+        future = self.task_manager.executor.submit_read(similar_tasks, title, self.task.id if self.task else None)
+        deliver(self.task_manager.parent, future, lambda matches: self.show_duplicates(title, matches),
+                lambda e: self.task_manager.log_error(f"Duplicate check error: {e}"))
+
+    def show_duplicates(self, title, matches):
+        # The form may have closed, or the title changed, while the lookup ran.
+        if not self.winfo_exists() or title != self.entries["Task"].get().strip():
+            return
+        self.duplicates_var.set("Possible duplicates: " + "; ".join(
+            f"#{task_id} {task} ({status})" for _, task_id, task, status in matches
+        ) if matches else '')
+
     def adjust_entry_width(self, event):
         entry = event.widget
         text_length = len(entry.get())
@@ -58,13 +172,13 @@ class TaskForm(tk.Toplevel):
         text_widget.config(height=max(line_count, 2))
 
     def populate_fields(self):
-        if self.values:
-            for i, key in enumerate(self.entries.keys()):
-                widget = self.entries[key]
+        if self.task:
+            for field, widget in zip(TASK_FIELDS[1:], self.entries.values()):
+                value = text(getattr(self.task, field))
                 if isinstance(widget, tk.Entry):
-                    widget.insert(0, self.values[i + 1])
+                    widget.insert(0, value)
                 elif isinstance(widget, tk.Text):
-                    widget.insert("1.0", self.values[i + 1])
+                    widget.insert("1.0", value)
 
     def validate_entries(self):
         for label, entry in self.entries.items():
@@ -89,15 +203,66 @@ class TaskForm(tk.Toplevel):
             elif isinstance(entry, tk.Text):
                 data.append(entry.get("1.0", "end-1c").strip())
 
-        if self.values:
-            data.append(self.values[-1])
-            self.db.update_data(data)
-        else:
-            self.db.insert_data(data)
+        task = dict(zip(TASK_FIELDS[1:], data))
+        if 'assigned_to' in self.completions:
+            # "john " is saved as the "John" already in use, so names do not drift apart.
+            task['assigned_to'] = self.completions['assigned_to'].canonical(task['assigned_to'])
+        store = self.task_manager.store
+        try:
+            future = store.replace(self.task.id, task) if self.task else store.create(task)
+        except ValueError as e:
+            messagebox.showerror("Validation Error", str(e), parent=self)
+            return
+        self.task_manager.submit_write(future)
+        for field, index in self.completions.items():
+            if self.task is None or text(getattr(self.task, field)) != task[field]:
+                index.add(task[field])
 
-        self.task_manager.load_data()
         self.destroy()
 
     def style_buttons(self):
         style = ttk.Style()
         style.configure("TButton", font=("Helvetica", 10), padding=5)
+
+
+class BulkEditForm(tk.Toplevel):
+    """Set the same columns on many tasks at once; fields left blank are not changed."""
+
+    FIELDS = [
+        ("Status", 'status'),
+        ("Assigned To", 'assigned_to'),
+        ("Priority", 'priority'),
+        ("Progress percentage", 'progress_percentage'),
+        ("Completion Date (YYYY-MM-DD)", 'completion_date'),
+    ]
+
+    def __init__(self, parent, task_manager, tasks):
+        super().__init__(parent)
+        self.task_manager = task_manager
+        self.task_ids = [task.id for task in tasks]
+        self.title(f"Edit {len(self.task_ids)} Tasks")
+        self.configure(bg='lightgrey')
+        self.entries = {}
+        for i, (label, field) in enumerate(self.FIELDS):
+            create_label(self, label, i, 0)
+            if field == 'status':
+                entry = create_combobox(self, i, 1, ['', *STATUSES])
+            elif field == 'priority':
+                entry = create_combobox(self, i, 1, ['', *PRIORITIES])
+            else:
+                entry = create_entry(self, i, 1)
+            self.entries[field] = entry
+        create_button(self, "Apply", self.apply, len(self.FIELDS), 0, columnspan=2)
+
+    def apply(self):
+        changes = {field: entry.get().strip() for field, entry in self.entries.items() if entry.get().strip()}
+        if not changes:
+            messagebox.showerror("Validation Error", "Fill in at least one field to change.", parent=self)
+            return
+        try:
+            future = self.task_manager.store.bulk_update(self.task_ids, changes)
+        except ValueError as e:
+            messagebox.showerror("Validation Error", str(e), parent=self)
+            return
+        self.task_manager.submit_batch(future, f"Updated {len(self.task_ids)} task(s)", "Bulk edit error")
+        self.destroy()
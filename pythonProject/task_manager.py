@@ -1,24 +1,143 @@
 # task_manager.py
 
+import os
 import tkinter as tk
 from tkinter import ttk, simpledialog, filedialog, messagebox
-import csv
-from database import Database
-from task_form import TaskForm
-from playsound import playsound
+from artifacts import ARTIFACT_STATUSES, artifact_status
+from database import Database, TASK_FIELDS
+from db_executor import deliver
+from task_form import TaskForm, BulkEditForm
 import threading
-from ui_components import create_button, create_frame
-from advanced_features import analyze_tasks, search_tasks
+from ui_components import create_button, create_combobox, create_entry, create_frame
+from paged_view import PagedTreeview
+from reminders import ReminderScheduler, parse_reminder
+from sorting import insert_position, sort_tasks
+from task_store import TaskStore
+from instrumentation import profiler, timed
+import time
+
+COLUMNS = [
+    'Seq No', 'Assigned Date', 'Task', 'Status', 'Completion Date', 'Issue',
+    'Remark', 'Test Result Path', 'Assigned To', 'Priority', 'Progress percentage', 'ID'
+]
+COLUMN_FIELDS = {'Seq No': 'id', 'ID': 'id', **dict(zip(COLUMNS[1:-1], TASK_FIELDS[1:]))}
+
+# The test-result status column, derived from the artifact index rather than stored on the task.
+RESULT_COLUMN = 'Result'
+RESULT_FILTERS = ['All results', *ARTIFACT_STATUSES]
+
+# Tables larger than this open in windowed mode, where only the visible rows
+# are materialized as Treeview items.
+WINDOWED_THRESHOLD = 5000
+
+# How often (ms) the status bar re-reads the progress of a background job.
+PROGRESS_INTERVAL = 200
+MAX_LOGGED_ERRORS = 20
+
+REMINDER_POLL_INTERVAL = 500
+SNOOZE_MINUTES = 10
+NOTIFICATION_SOUND = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'notification_sound.mp3')
+
+# How often (ms) the visible tab checks whether the change feed has moved.
+CHANGE_POLL_INTERVAL = 100
+
+# Milliseconds of typing pause before the live search box queries the index.
+SEARCH_DELAY = 250
+
+STATUS_TAGS = {
+    'Done': 'done',
+    'Pending': 'pending',
+    'Descoped': 'descoped',
+    'Blocker': 'blocker',
+    'Inprogress': 'inprogress',
+    'Closed': 'closed'
+}
+
+TAG_COLORS = {
+    'done': '#d4edda',
+    'pending': '#d1ecf1',
+    'descoped': '#fff3cd',
+    'blocker': '#f8d7da',
+    'inprogress': '#fff3e0',
+    'closed': '#f5f5f5'
+}
+
+def play_notification_sound():
+    try:
+        from playsound import playsound
+        playsound(NOTIFICATION_SOUND)
+    except Exception as e:
+        profiler.error('ui', f"could not play notification sound: {e}")
+
+
+def poll_reminders(widget, reminders):
+    """Show due reminders from `reminders` on the Tk thread, checking every REMINDER_POLL_INTERVAL ms."""
+    for task_id, task in reminders.drain():
+        reminder_notification(reminders, task_id, task)
+    widget.after(REMINDER_POLL_INTERVAL, poll_reminders, widget, reminders)
+
+
+def reminder_notification(reminders, task_id, task):
+    threading.Thread(target=play_notification_sound, daemon=True).start()
+    if messagebox.askyesno("Reminder", f"Reminder for task: {task}\n\nSnooze for {SNOOZE_MINUTES} minutes?"):
+        reminders.add(task_id, task, SNOOZE_MINUTES * 60)
+
 
 class TaskManager:
-    def __init__(self, parent, db_name):
+    def __init__(self, parent, db_name, windowed=None, db_names=(), store=None, reminders=None):
         self.parent = parent
-        self.db = Database(db_name)
+        self.db_names = db_names
+        self.store = store if store is not None else TaskStore(db_name)
+        self.executor = self.store.executor
+        # None until the row count, read on a reader, picks the mode; see start_view.
+        self.windowed = windowed
+        self.tasks = {}
+        self.change_cursor = 0
+        # False until the first load has set change_cursor; refreshing from 0 would re-read every row.
+        self.loaded = False
+        self.filter_status = None
+        self.search_term = None
+        self.result_filter = None
+        # {path: (kind, mtime_ns, result)} from the artifacts table.
+        self.artifacts = {}
+        # [(field, descending), ...], most significant first; empty means id order (or rank for a search).
+        self.sort_keys = []
+        # Task ids in tree order, for placing changed rows without reading the tree back.
+        self.order = []
+        self.view_generation = 0
+        self.reload_future = None
+        self.pending_selection = None
         self.setup_ui()
         self.log_text = self.create_log_text()
-        self.db.notify_change = self.load_data
-        self.refresh_interval = 30000
+        self.status_var = self.create_status_bar()
+        self.refresh_interval = CHANGE_POLL_INTERVAL
+        self.refresh_job = None
+        self.refresh_future = None
+        self.feed_cursor = 0
+        self.store.subscribe(self.on_feed_change)
         self.start_auto_refresh()
+        self.load_artifacts()
+        # A shared scheduler is polled by its owner; a private one is polled here.
+        self.reminders = reminders
+        if reminders is None:
+            self.reminders = ReminderScheduler(self.executor)
+            poll_reminders(self.parent, self.reminders)
+        if windowed is None:
+            deliver(self.parent, self.executor.submit_read(Database.count_tasks),
+                    lambda count: self.start_view(count > WINDOWED_THRESHOLD),
+                    lambda e: self.log_error(f"Load error: {e}"))
+        else:
+            self.start_view(windowed)
+
+    def start_view(self, windowed):
+        """Show the full table, or a PagedTreeview over it for large tables, and load the rows."""
+        self.windowed = windowed
+        if windowed:
+            self.view = PagedTreeview(
+                self.tree, self.vsb, self.fetch_window_page, self.fetch_window_bounds, self.window_item,
+                lambda e: self.log_error(f"Load error: {e}")
+            )
+        self.load_data()
 
     def setup_ui(self):
         self.parent.grid_rowconfigure(0, weight=1)
@@ -26,38 +145,50 @@ class TaskManager:
         self.tree = self.create_treeview()
         self.create_scrollbars()
         self.create_buttons()
-        self.load_data()
+        self.color_rows()
         self.setup_event_bindings()
 
     def create_treeview(self):
-        columns = [
-            'Seq No', 'Assigned Date', 'Task', 'Status', 'Completion Date', 'Issue',
-            'Remark', 'Test Result Path', 'Assigned To', 'Priority', 'Progress percentage', 'ID'
-        ]
+        columns = [*COLUMNS[:-1], RESULT_COLUMN, COLUMNS[-1]]
         tree = ttk.Treeview(self.parent, columns=columns, show='headings')
         for col in columns[:-1]:
-            tree.heading(col, text=col, command=lambda _col=col: self.sort_column(_col, False))
             tree.column(col, width=150)
         tree.column('ID', width=0, stretch=tk.NO)
         tree.grid(row=0, column=0, sticky='nsew')
         self.bind_column_resize(tree)
         tree.bind('<Double-1>', self.on_double_click)
         tree.bind('<Control-c>', self.copy_selected_row)  # Bind Ctrl+C to the treeview
+        tree.bind('<Shift-Button-1>', self.on_heading_shift_click)
         return tree
 
     def on_double_click(self, event):
-        selected_item = self.tree.selection()
-        if selected_item:
-            item = self.tree.item(selected_item)
-            TaskForm(self.parent, self, self.db, item['values'], selected_item)
+        self.edit_task()
+
+    def selected_task(self):
+        """The Task behind the selected row, or None."""
+        selection = self.tree.selection()
+        if not selection:
+            return None
+        if self.windowed:
+            return self.view.row_for(selection[0])
+        return self.tasks.get(int(selection[0]))
+
+    def selected_tasks(self):
+        """The Tasks behind every selected row, in tree order."""
+        if self.windowed:
+            tasks = [self.view.row_for(item) for item in self.tree.selection()]
+            return [task for task in tasks if task is not None]
+        return [self.tasks[int(item)] for item in self.tree.selection() if int(item) in self.tasks]
+
+    def select_all(self, event=None):
+        self.tree.selection_set(self.tree.get_children())
+        return 'break'
 
     def copy_selected_row(self, event):
-        selected_item = self.tree.selection()
-        if selected_item:
-            item = self.tree.item(selected_item)
-            values = item['values']
+        task = self.selected_task()
+        if task is not None:
             self.parent.clipboard_clear()
-            self.parent.clipboard_append(','.join(str(v) for v in values))
+            self.parent.clipboard_append(','.join(str(value) for value in task.row()))
             messagebox.showinfo("Copy", "Selected row copied to clipboard")
 
 
@@ -69,7 +200,11 @@ class TaskManager:
             self.parent.grid_columnconfigure(0, weight=1)
 
         for col in tree['columns']:
-            tree.heading(col, text=col, command=lambda _col=col: self.sort_column(_col, False))
+            # The Result column is derived from the artifact index, not a task field, so it does not sort.
+            if col in COLUMN_FIELDS:
+                tree.heading(col, text=col, command=lambda _col=col: self.sort_column(_col))
+            else:
+                tree.heading(col, text=col)
             tree.column(col, width=150, minwidth=50, stretch=True)
 
         tree.bind('<Configure>', handle_column_resize)
@@ -77,7 +212,7 @@ class TaskManager:
         tree.bind('<<TreeviewColumnMoved>>', handle_column_resize)
 
     def create_scrollbars(self):
-        vsb = ttk.Scrollbar(self.parent, orient="vertical", command=self.tree.yview)
+        self.vsb = vsb = ttk.Scrollbar(self.parent, orient="vertical", command=self.tree.yview)
         vsb.grid(row=0, column=1, sticky='ns')
         hsb = ttk.Scrollbar(self.parent, orient="horizontal", command=self.tree.xview)
         hsb.grid(row=1, column=0, sticky='ew')
@@ -93,6 +228,27 @@ class TaskManager:
         self.tree.bind('<ButtonRelease-1>', adjust_scroll_region)
         self.tree.bind('<<TreeviewColumnMoved>>', adjust_scroll_region)
 
+    def view_filters(self):
+        filters = {'artifact': self.result_filter} if self.result_filter else {}
+        if self.search_term:
+            filters['match'] = self.search_term
+        elif self.filter_status is None:
+            filters['exclude_status'] = 'Closed'
+        else:
+            filters['status'] = self.filter_status
+        return filters
+
+    def fetch_window_page(self, limit, after):
+        return self.executor.submit_read(
+            Database.query_tasks, limit=limit, after=after, order_by=self.sort_order(), **self.view_filters()
+        )
+
+    def fetch_window_bounds(self, page_size):
+        return self.executor.submit_read(Database.page_bounds, page_size, self.sort_order(), **self.view_filters())
+
+    def window_item(self, task, index):
+        return self.item_values(index + 1, task), (self.status_tag(task.status_text),)
+
     def create_buttons(self):
         button_frame = create_frame(self.parent, 2, 0, columnspan=2)
 
@@ -100,74 +256,270 @@ class TaskManager:
             ("Add", self.add_task),
             ("Edit", self.edit_task),
             ("Delete", self.delete_task),
+            ("Bulk Edit", self.bulk_edit),
+            ("Archive", self.archive_tasks),
+            ("Undo", self.undo_last),
             ("Filter", self.filter_tasks),
             ("Reset Filter", self.reset_filter),
             ("Download", self.download_data),
             ("Import", self.import_data),
             ("Reminder", self.set_reminder),
             ("Analyze", self.analyze_data),
+            ("Check Results", self.scan_results),
             ("Search", self.search_tasks)
         ]
 
         for i, (text, command) in enumerate(buttons):
             create_button(button_frame, text, command, 0, i, columnspan=1)
 
-    def load_data(self, filter_status=None):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        data = self.db.fetch_data()
-        visible_data = [row for row in data if row[3] != 'Closed'] if filter_status is None else data
-
-        for seq_no, row in enumerate(visible_data, start=1):
-            if filter_status and row[3] != filter_status:
-                continue
-            self.tree.insert('', 'end', values=(seq_no, *row[1:], row[0]))
-
-        self.color_rows()
+        self.search_var = tk.StringVar()
+        self.search_job = None
+        self.search_entry = create_entry(button_frame, 0, len(buttons), font=("Helvetica", 10), ipady=2)
+        self.search_entry.config(textvariable=self.search_var)
+        self.search_var.trace_add('write', self.on_search_typed)
+        self.result_choice = create_combobox(button_frame, 0, len(buttons) + 1, RESULT_FILTERS,
+                                             font=("Helvetica", 10), ipady=2)
+        self.result_choice.set(RESULT_FILTERS[0])
+        self.result_choice.configure(state='readonly', width=12)
+        self.result_choice.bind('<<ComboboxSelected>>', self.on_result_filter)
+
+    def on_result_filter(self, event=None):
+        choice = self.result_choice.get()
+        self.result_filter = None if choice == RESULT_FILTERS[0] else choice
+        self.reload_rows()
+
+    def on_search_typed(self, *args):
+        # Debounce: only the last keystroke in a burst runs a query.
+        if self.search_job is not None:
+            self.parent.after_cancel(self.search_job)
+        self.search_job = self.parent.after(SEARCH_DELAY, self.run_live_search)
+
+    def run_live_search(self):
+        self.search_job = None
+        self.apply_search(self.search_var.get().strip() or None)
+
+    def apply_search(self, term):
+        self.search_term = term
+        self.reload_rows()
 
+    def load_data(self, filter_status=None):
+        self.filter_status = filter_status
+        self.search_term = None
+        if self.search_var.get():
+            self.search_var.set('')
+            self.parent.after_cancel(self.search_job)
+            self.search_job = None
+        self.reload_rows()
+
+    def reload_rows(self):
+        # Any result still in flight for the previous view is now stale.
+        self.view_generation += 1
+        self.reload_started = time.perf_counter()
+        if self.reload_future is not None:
+            self.reload_future.cancel()
+        if self.windowed:
+            # The view loads its own pages; only the change cursor is read here.
+            self.reload_future = self.executor.submit_read(Database.change_cursor)
+            self.when_done(self.reload_future, self.restart_window, "Load error")
+            return
+
+        search_term, filters, sort_keys = self.search_term, self.view_filters(), list(self.sort_keys)
+        result_filter = {'artifact': self.result_filter} if self.result_filter else {}
+
+        def fetch(db):
+            cursor = db.change_cursor()
+            if search_term:
+                tasks = db.search_tasks(search_term, **result_filter)
+                return cursor, sort_tasks(tasks, sort_keys) if sort_keys else tasks
+            return cursor, db.query_tasks(order_by=sort_keys or 'id', **filters)
+
+        self.reload_future = self.executor.submit_read(fetch)
+        self.when_done(self.reload_future, self.show_rows, "Load error")
+
+    def restart_window(self, cursor):
+        self.change_cursor = cursor
+        self.loaded = True
+        self.view.restart()
+
+    @timed('ui.show_rows')
+    def show_rows(self, result):
+        self.change_cursor, tasks = result
+        self.loaded = True
+        self.tree.delete(*self.tree.get_children())
+        self.tasks.clear()
+        for task in tasks:
+            self.insert_row(task)
+        self.order = [task.id for task in tasks]
+        if self.pending_selection is not None:
+            self.select_task(self.pending_selection)
+        if profiler.enabled:
+            # From asking for the rows to having them on screen, including the query.
+            profiler.record('ui.load_data', time.perf_counter() - self.reload_started)
+
+    def select_task(self, task_id):
+        """Select and scroll to `task_id`, or do so once the rows have loaded."""
+        self.pending_selection = None
+        if task_id in self.tasks:
+            iid = str(task_id)
+            self.tree.selection_set(iid)
+            self.tree.focus(iid)
+            self.tree.see(iid)
+        elif self.windowed:
+            self.status_var.set(f"Task {task_id} is not in the loaded page")
+        else:
+            self.pending_selection = task_id
+
+    def when_done(self, future, callback, error_label):
+        """Run `callback` on the Tk thread with the job's result, unless the view changed meanwhile."""
+        generation = self.view_generation
+
+        def apply(result):
+            if generation == self.view_generation:
+                callback(result)
+
+        deliver(self.parent, future, apply, lambda e: self.log_error(f"{error_label}: {e}"))
+
+    def submit_write(self, future, error_label="Save error"):
+        """Pick up the change once a TaskStore write has been committed."""
+        deliver(self.parent, future, lambda result: self.refresh_data(),
+                lambda e: self.log_error(f"{error_label}: {e}"))
+        return future
+
+    def refresh_data(self):
+        """Apply only the rows changed since the last refresh to the tree."""
+        if not self.loaded:
+            return
+        self.refresh_future = self.executor.submit_read(
+            Database.fetch_task_changes, self.change_cursor, **self.view_filters()
+        )
+        self.when_done(self.refresh_future, self.apply_changes, "Refresh error")
+
+    @timed('ui.apply_changes')
+    def apply_changes(self, changes):
+        cursor, tasks, removed = changes
+        if cursor <= self.change_cursor:
+            return
+        self.change_cursor = cursor
+        if self.windowed:
+            self.view.reset()
+            return
+        previous = list(self.order)
+        removed = [task_id for task_id in removed if self.tasks.pop(task_id, None) is not None]
+        if removed:
+            self.tree.delete(*map(str, removed))
+            self.order = [task_id for task_id in self.order if task_id in self.tasks]
+        if self.sort_keys and tasks:
+            # Take every changed row out of the order before placing any, so
+            # each bisect searches rows that are all in sorted position.
+            changed = {task.id for task in tasks}
+            self.order = [task_id for task_id in self.order if task_id not in changed]
+        for task in tasks:
+            if task.id in self.tasks:
+                item = str(task.id)
+                self.tasks[task.id] = task
+                seq_no = self.tree.set(item, 'Seq No')
+                self.tree.item(item, values=self.item_values(seq_no, task), tags=(self.status_tag(task.status_text),))
+            else:
+                self.insert_row(task)
+                if not self.sort_keys:
+                    self.order.append(task.id)
+        if self.sort_keys and len(tasks) == 1:
+            self.tree.move(str(tasks[0].id), '', self.place(tasks[0]))
+        elif self.sort_keys and tasks:
+            for task in tasks:
+                self.place(task)
+            self.tree.set_children('', *map(str, self.order))
+        # Seq No is the row's position: renumber from the first row that moved.
+        first = next((index for index, (old, new) in enumerate(zip(previous, self.order)) if old != new),
+                     min(len(previous), len(self.order)))
+        self.renumber_rows(first)
+
+    def place(self, task):
+        """Add `task` to self.order at its sorted position and return that position."""
+        index = insert_position(self.order, task, self.sort_keys, self.tasks.__getitem__)
+        self.order.insert(index, task.id)
+        return index
+
+    def item_values(self, seq_no, task):
+        return (seq_no, *task.values(), self.result_status(task), task.id)
+
+    def result_status(self, task):
+        return artifact_status(task, self.artifacts.get(task.test_result_path))
+
+    def insert_row(self, task, index='end'):
+        # Items are named after the task id, so a selection maps straight back to its Task.
+        self.tasks[task.id] = task
+        self.tree.insert('', index, iid=str(task.id), values=self.item_values(len(self.tasks), task),
+                         tags=(self.status_tag(task.status_text),))
+
+    def renumber_rows(self, start=0):
+        for seq_no, task_id in enumerate(self.order[start:], start=start + 1):
+            self.tree.set(str(task_id), 'Seq No', seq_no)
+
+    @staticmethod
+    def status_tag(status):
+        return STATUS_TAGS.get(status, '')
+
+    @timed('ui.color_rows')
     def color_rows(self):
-        for item in self.tree.get_children():
-            status = self.tree.item(item, 'values')[3]
-            tags = {
-                'Done': 'done',
-                'Pending': 'pending',
-                'Descoped': 'descoped',
-                'Blocker': 'blocker',
-                'Inprogress': 'inprogress',
-                'Closed': 'closed'
-            }.get(status, '')
-
-            self.tree.item(item, tags=tags)
-
         style = ttk.Style()
         style.configure("Treeview", rowheight=35)
 
-        self.tree.tag_configure('done', background='#d4edda')
-        self.tree.tag_configure('pending', background='#d1ecf1')
-        self.tree.tag_configure('descoped', background='#fff3cd')
-        self.tree.tag_configure('blocker', background='#f8d7da')
-        self.tree.tag_configure('inprogress', background='#fff3e0')
-        self.tree.tag_configure('closed', background='#f5f5f5')
+        for tag, color in TAG_COLORS.items():
+            self.tree.tag_configure(tag, background=color)
 
     def add_task(self):
-        TaskForm(self.parent, self, self.db)
+        TaskForm(self.parent, self)
 
     def edit_task(self):
-        selected_item = self.tree.selection()
-        if selected_item:
-            item = self.tree.item(selected_item)
-            TaskForm(self.parent, self, self.db, item['values'], selected_item)
-
-    def delete_task(self):
-        selected_item = self.tree.selection()
-        if selected_item:
-            item = self.tree.item(selected_item)
-            try:
-                self.db.delete_data(item['values'][-1])
-                self.load_data()
-            except Exception as e:
-                self.log_error(f"Delete error: {e}")
+        tasks = self.selected_tasks()
+        if len(tasks) > 1:
+            self.bulk_edit()
+        elif tasks:
+            TaskForm(self.parent, self, tasks[0])
+
+    def bulk_edit(self):
+        tasks = self.selected_tasks()
+        if tasks:
+            BulkEditForm(self.parent, self, tasks)
+
+    def delete_task(self, event=None):
+        tasks = self.selected_tasks()
+        if len(tasks) > 1 and not messagebox.askyesno("Delete", f"Delete {len(tasks)} tasks?"):
+            return
+        if tasks:
+            self.submit_batch(self.store.bulk_delete([task.id for task in tasks]),
+                              f"Deleted {len(tasks)} task(s)", "Delete error")
+
+    def archive_tasks(self):
+        tasks = self.selected_tasks()
+        if tasks:
+            self.submit_batch(self.store.archive([task.id for task in tasks]),
+                              f"Archived {len(tasks)} task(s)", "Archive error")
+
+    def submit_batch(self, future, done_text, error_label):
+        """Like submit_write, for an undoable TaskStore bulk operation."""
+        def done(batch_id):
+            self.status_var.set(f"{done_text}. Ctrl+Z to undo.")
+            self.refresh_data()
+
+        deliver(self.parent, future, done, lambda e: self.log_error(f"{error_label}: {e}"))
+        return future
+
+    def undo_last(self, event=None):
+        # Ctrl+Z is bound app-wide. In a text field, or in a form window, it
+        # belongs to what is being typed, not to the last database batch.
+        if event is not None:
+            widget = event.widget
+            if isinstance(widget, str) or isinstance(widget, (tk.Entry, tk.Text, tk.Spinbox)) \
+                    or widget.winfo_toplevel() is not self.parent.winfo_toplevel():
+                return None
+
+        def done(result):
+            self.status_var.set("Nothing to undo" if result is None else f"Undid: {result[0]}")
+            self.refresh_data()
+
+        deliver(self.parent, self.store.undo(), done, lambda e: self.log_error(f"Undo error: {e}"))
 
     def filter_tasks(self):
         search_term = simpledialog.askstring(
@@ -177,109 +529,202 @@ class TaskManager:
         if search_term:
             search_term = search_term.lower()
             self.load_data(filter_status=search_term.capitalize())
-            self.color_rows()
 
     def reset_filter(self):
         self.load_data()
 
-    def sort_column(self, col, reverse):
-        l = [(self.tree.set(k, col), k) for k in self.tree.get_children('')]
-        l.sort(reverse=reverse)
-        for index, (val, k) in enumerate(l):
-            self.tree.move(k, '', index)
-        self.tree.heading(col, command=lambda _col=col: self.sort_column(_col, not reverse))
-        self.color_rows()
-
-    '''def download_data(self):
-        columns_to_export = simpledialog.askstring("Select Columns", "Enter columns to export (comma-separated):")
-        if columns_to_export:
-            columns = [col.strip() for col in columns_to_export.split(',')]
-            file_path = filedialog.asksaveasfilename(
-                defaultextension=".csv", filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
-            )
-            if file_path:
-                with open(file_path, 'w', newline='') as csvfile:
-                    writer = csv.writer(csvfile)
-                    writer.writerow(columns)
-                    data = self.db.fetch_data()
-                    for row in data:
-                        writer.writerow([row[self.tree['columns'].index(col)] for col in columns])'''
+    def sort_order(self):
+        return self.sort_keys or 'id'
+
+    def on_heading_shift_click(self, event):
+        if self.tree.identify_region(event.x, event.y) != 'heading':
+            return None
+        column = self.tree.identify_column(event.x)
+        self.sort_column(self.tree.column(column, 'id'), extend=True)
+        return 'break'
+
+    @timed('ui.sort_column')
+    def sort_column(self, col, extend=False):
+        """Sort by `col`, or add it as the next sort key with `extend` (Shift-click).
+
+        Clicking the column the view is already sorted by reverses it. The
+        windowed view re-queries with the sort in SQL; otherwise the loaded
+        tasks are sorted on typed keys and the tree is relinked in one call.
+        """
+        field = COLUMN_FIELDS.get(col)
+        if field is None:
+            return
+        directions = dict(self.sort_keys)
+        if extend and field in directions:
+            self.sort_keys = [(name, not desc if name == field else desc) for name, desc in self.sort_keys]
+        elif extend:
+            self.sort_keys = [*self.sort_keys, (field, False)]
+        else:
+            primary = self.sort_keys[0] if self.sort_keys else ('id', False)
+            self.sort_keys = [(field, not primary[1] if primary[0] == field else False)]
+        self.show_sort_headings()
+        if self.windowed:
+            self.view.top = 0
+            self.view.restart()
+            return
+        if self.reload_future is not None and not self.reload_future.done():
+            # The rows on their way were fetched in the old order.
+            self.reload_rows()
+            return
+        ordered = sort_tasks(self.tasks.values(), self.sort_keys)
+        self.order = [task.id for task in ordered]
+        self.tree.set_children('', *map(str, self.order))
+        self.renumber_rows()
+
+    def show_sort_headings(self):
+        """Mark sorted columns with their direction, and their rank when sorting on several."""
+        ranks = {field: (index, desc) for index, (field, desc) in enumerate(self.sort_keys, start=1)}
+        for col in COLUMNS[:-1]:
+            rank = ranks.get(COLUMN_FIELDS[col])
+            if rank is None:
+                self.tree.heading(col, text=col)
+            else:
+                index, desc = rank
+                arrow = '\u25bc' if desc else '\u25b2'
+                self.tree.heading(col, text=f"{col} {arrow}{index if len(ranks) > 1 else ''}")
 
     def download_data(self):
-        file_path = filedialog.asksaveasfilename(
-            defaultextension=".csv", filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+        from data_export import FILE_TYPES, export_tasks
+        headers = COLUMNS[:-1]
+        selection = simpledialog.askstring(
+            "Select Columns", "Enter columns to export (comma-separated):", initialvalue=', '.join(headers)
         )
+        if not selection:
+            return
+        by_name = {header.lower(): header for header in headers}
+        names = list(dict.fromkeys(name.strip().lower() for name in selection.split(',') if name.strip()))
+        unknown = [name for name in names if name not in by_name]
+        if unknown or not names:
+            messagebox.showerror("Export", f"Unknown columns: {', '.join(unknown)}" if unknown else "No columns selected")
+            return
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=FILE_TYPES)
         if file_path:
-            with open(file_path, 'w', newline='') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow([
-                    'Seq No', 'Assigned Date', 'Task', 'Status', 'Completion Date', 'Issue',
-                    'Remark', 'Test Result Path', 'Assigned To', 'Priority', 'Progress percentage'
-                ])
-                data = self.db.fetch_data()
-                for seq_no, row in enumerate(data, start=1):
-                    writer.writerow([seq_no, *row[1:]])
+            columns = [(by_name[name], None if name == 'seq no' else COLUMN_FIELDS[by_name[name]]) for name in names]
+            written = [0]
+            cancel = threading.Event()
+            future = self.executor.submit_read(
+                export_tasks, file_path, columns, progress=lambda count: written.__setitem__(0, count), cancel=cancel,
+                order_by=self.sort_order(), **self.view_filters()
+            )
+            self.watch_progress(future, lambda: f"Exporting... {written[0]} rows", cancel)
+            deliver(self.parent, future, lambda count: self.status_var.set(f"Exported {count} rows to {file_path}"),
+                    self.export_failed)
+
+    def export_failed(self, error):
+        from data_export import ExportCancelled
+        if isinstance(error, ExportCancelled):
+            self.status_var.set("Export cancelled")
+        else:
+            self.log_error(f"Download error: {error}")
 
     def import_data(self):
         file_path = filedialog.askopenfilename(
             defaultextension=".csv", filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
         )
         if file_path:
-            try:
-                with open(file_path, 'r') as csvfile:
-                    reader = csv.reader(csvfile)
-                    next(reader)
-                    for row in reader:
-                        self.db.insert_data(row[1:])
-                self.load_data()
-            except Exception as e:
-                self.log_error(f"Import error: {e}")
+            from bulk_import import import_csv
+            counts = [0, 0]
+
+            def progress(inserted, rejected):
+                counts[:] = inserted, rejected
+
+            future = self.executor.submit(import_csv, file_path, progress=progress)
+            self.watch_progress(future, lambda: f"Importing... {counts[0]} rows, {counts[1]} rejected")
+            deliver(self.parent, future, self.import_finished, lambda e: self.log_error(f"Import error: {e}"))
+
+    def import_finished(self, result):
+        inserted, errors = result
+        self.status_var.set(f"Imported {inserted} rows, {len(errors)} rejected")
+        for line_num, message in errors[:MAX_LOGGED_ERRORS]:
+            self.log_error(f"Import line {line_num}: {message}")
+        if len(errors) > MAX_LOGGED_ERRORS:
+            self.log_error(f"... and {len(errors) - MAX_LOGGED_ERRORS} more rejected rows")
+        self.refresh_data()
+
+    def watch_progress(self, future, progress_text, cancel=None):
+        """Mirror `progress_text()` into the status bar until `future` finishes.
+
+        With a `cancel` event, a Cancel button is shown that sets it.
+        """
+        if cancel is not None:
+            self.cancel_button.configure(command=cancel.set)
+            self.cancel_button.grid()
+
+        def poll():
+            if not future.done():
+                self.status_var.set(progress_text())
+                self.parent.after(PROGRESS_INTERVAL, poll)
+            elif cancel is not None:
+                self.cancel_button.grid_remove()
+
+        poll()
+
+    def scan_results(self):
+        """Re-index the files behind Test Result Path in the background and show what was found."""
+        scanned = [0]
+        cancel = threading.Event()
+        future = self.store.scan_artifacts(progress=lambda count: scanned.__setitem__(0, count), cancel=cancel)
+        self.watch_progress(future, lambda: f"Checking results... {scanned[0]} paths", cancel)
+        deliver(self.parent, future, self.scan_finished, lambda e: self.log_error(f"Result check error: {e}"))
+
+    def scan_finished(self, summary):
+        counts = ', '.join(f"{summary['statuses'][status]} {status.lower()}"
+                           for status in ARTIFACT_STATUSES if summary['statuses'].get(status))
+        state = "Cancelled after checking" if summary['cancelled'] else "Checked"
+        self.status_var.set(f"{state} {summary['paths']} result paths in {summary['seconds']:.1f}s"
+                            f"{': ' + counts if counts else ''}")
+        self.load_artifacts()
+        if self.result_filter:
+            self.reload_rows()
+
+    def load_artifacts(self):
+        future = self.executor.submit_read(Database.artifact_index)
+        deliver(self.parent, future, self.show_artifacts, lambda e: self.log_error(f"Result index error: {e}"))
+
+    def show_artifacts(self, index):
+        self.artifacts = index
+        if self.windowed:
+            self.view.render()
+            return
+        for task_id, task in self.tasks.items():
+            self.tree.set(str(task_id), RESULT_COLUMN, self.result_status(task))
 
     def set_reminder(self):
-        selected_item = self.tree.selection()
-        if selected_item:
-            item = self.tree.item(selected_item)
-            time = simpledialog.askstring("Reminder",
-                                          "Enter reminder time in the format 'H:M' (hours:minutes), 'M' (minutes) or 'D' (days):")
+        task = self.selected_task()
+        if task is not None:
+            time = simpledialog.askstring(
+                "Reminder",
+                "Remind me in 'H:M' (hours:minutes), 'N' or 'Nm' (minutes), 'Nh' (hours) or 'Nd' (days).\n"
+                "Add 'every <interval>' to repeat, e.g. '30m every 1d':"
+            )
             if time:
                 try:
-                    total_seconds = self.parse_time(time)
-                    task_details = item['values'][2]
-                    threading.Timer(total_seconds, self.reminder_notification, args=[task_details]).start()
+                    delay, repeat_seconds = parse_reminder(time)
                 except ValueError:
-                    messagebox.showerror("Error", "Invalid time format. Please enter in 'H:M', 'M', or 'D' format.")
-
-    def parse_time(self, time):
-        if ':' in time:
-            hours, minutes = map(int, time.split(':'))
-            total_seconds = hours * 3600 + minutes * 60
-        elif 'm' in time.lower():
-            minutes = int(time.lower().replace('m', '').strip())
-            total_seconds = minutes * 60
-        else:
-            days = int(time)
-            total_seconds = days * 86400
-        return total_seconds
-
-    def reminder_notification(self, task):
-        playsound(r"C:\Task_Manager_12\pythonProject\notification_sound.mp3")
-        messagebox.showinfo("Reminder", f"Reminder for task: {task}")
+                    messagebox.showerror("Error", "Invalid time format. Please enter e.g. '1:30', '45m', '2h', '1d' "
+                                                  "or '1d every 7d'.")
+                    return
+                deliver(self.parent, self.reminders.add(task.id, task.task, delay, repeat_seconds),
+                        lambda reminder_id: None, lambda e: self.log_error(f"Reminder error: {e}"))
 
     def analyze_data(self):
-        analyze_tasks(self.db)
+        from analytics import cached_stats, all_databases_stats
+        from dashboard import Dashboard
+        pages = [(self.executor.db_name, self.executor.submit_read(cached_stats)),
+                 ("With archive", self.executor.submit_read(cached_stats, True))]
+        if len(self.db_names) > 1:
+            pages.append(("All databases", self.executor.submit_read(all_databases_stats, list(self.db_names))))
+        Dashboard(self.parent, pages)
 
     def search_tasks(self, event=None):
         search_term = simpledialog.askstring("Search Tasks", "Enter task keyword or status to search:")
         if search_term:
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-
-            data = self.db.fetch_data()
-            search_results = [row for row in data if
-                              search_term.lower() in row[2].lower() or search_term.lower() in row[3].lower()]
-
-            for seq_no, row in enumerate(search_results, start=1):
-                self.tree.insert('', 'end', values=(seq_no, *row[1:], row[0]))
+            self.search_var.set(search_term)
 
     def setup_event_bindings(self):
         self.tree.bind('<Double-1>', self.on_double_click)
@@ -287,6 +732,7 @@ class TaskManager:
         self.parent.bind_all('<Control-f>', self.search_tasks)
 
     def log_error(self, message):
+        profiler.error('ui', message)
         self.log_text.config(state='normal')
         self.log_text.insert(tk.END, f"{message}\n")
         self.log_text.config(state='disabled')
@@ -298,11 +744,44 @@ class TaskManager:
         log_text.config(state='normal')
         return log_text
 
+    def create_status_bar(self):
+        status_var = tk.StringVar()
+        ttk.Label(self.parent, textvariable=status_var, anchor='w').grid(row=4, column=0, sticky='ew')
+        self.cancel_button = ttk.Button(self.parent, text="Cancel")
+        self.cancel_button.grid(row=4, column=1, sticky='e')
+        self.cancel_button.grid_remove()
+        return status_var
+
+    def on_feed_change(self, cursor, changes):
+        # Called on the feed thread, so only record how far the log has moved.
+        self.feed_cursor = cursor
+
     def start_auto_refresh(self):
-        self.load_data()
-        self.parent.after(self.refresh_interval, self.start_auto_refresh)
+        self.refresh_data()
+        self.refresh_job = self.parent.after(self.refresh_interval, self.poll_changes)
+
+    def poll_changes(self):
+        """Fetch changed rows when another connection has committed, otherwise do nothing."""
+        if self.feed_cursor > self.change_cursor and (self.refresh_future is None or self.refresh_future.done()):
+            self.refresh_data()
+        self.refresh_job = self.parent.after(self.refresh_interval, self.poll_changes)
+
+    def stop_auto_refresh(self):
+        if self.refresh_job is not None:
+            self.parent.after_cancel(self.refresh_job)
+            self.refresh_job = None
+
+    def activate(self):
+        """Called when this tab becomes visible: catch up on changes and keep refreshing."""
+        self.stop_auto_refresh()
+        self.start_auto_refresh()
+        self.parent.bind_all('<Control-f>', self.search_tasks)
+        self.parent.bind_all('<Control-z>', self.undo_last)
 
     def setup_event_bindings(self):
         self.tree.bind('<Double-1>', self.on_double_click)
         self.tree.bind('<Control-c>', self.copy_selected_row)
+        self.tree.bind('<Control-a>', self.select_all)
+        self.tree.bind('<Delete>', self.delete_task)
         self.parent.bind_all('<Control-f>', self.search_tasks)
+        self.parent.bind_all('<Control-z>', self.undo_last)
@@ -0,0 +1,658 @@
+# task_store.py
+"""Task database access without the GUI.
+
+`TaskStore` is what the Tk app, the command line and the HTTP API all go
+through. Reads run concurrently on a pool of reader connections; writes are
+queued and committed in groups by the single writer thread.
+
+    python task_store.py test list --status Pending --limit 20
+    python task_store.py test add --task "Check logs" --assigned-date 2024-05-01
+    python task_store.py test serve --port 8765
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import date, datetime
+from concurrent.futures import Future
+from urllib.parse import urlsplit, parse_qs
+from database import Database, TASK_FIELDS, INSERT_TASK, UPDATE_TASK, DELETE_TASK, update_fields_query
+from db_executor import DatabaseExecutor
+from change_feed import ChangeFeed
+from models import task_cache
+from bulk_import import normalize_row, parse_date, parse_status, parse_priority, parse_progress
+
+READERS = 4
+DEFAULT_PORT = 8765
+# Rows returned by GET /tasks when the request gives no limit.
+API_PAGE_SIZE = 100
+# Longest a GET /changes request waits for a change, in seconds.
+MAX_CHANGE_WAIT = 30
+FILTERS = ('status', 'exclude_status', 'text', 'match', 'assigned_to', 'priority', 'artifact')
+
+
+def task_dict(row):
+    return dict(zip(TASK_FIELDS, row))
+
+
+def task_values(task):
+    """Validated column values for a task, by the same rules as CSV import.
+
+    A missing status defaults to Pending and a missing assigned date to today.
+    """
+    task = {'status': 'Pending', 'assigned_date': date.today().isoformat(),
+            **{field: value for field, value in task.items() if value not in (None, '')}}
+    unknown = set(task) - set(TASK_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown column: {', '.join(sorted(unknown))}")
+    return normalize_row(['', *(str(task.get(field, '')) for field in TASK_FIELDS[1:])])
+
+
+def normalize_changes(changes):
+    """Validate a partial update and return it with dates, status and progress normalised."""
+    changes = {field: '' if value is None else value for field, value in changes.items()}
+    update_fields_query(list(changes))
+    if 'task' in changes and not str(changes['task']).strip():
+        raise ValueError("task is required")
+    if 'status' in changes:
+        changes['status'] = parse_status(str(changes['status']).strip())
+    if 'priority' in changes:
+        changes['priority'] = parse_priority(str(changes['priority']).strip())
+    for field in ('assigned_date', 'completion_date'):
+        if field in changes:
+            changes[field] = parse_date(str(changes[field]).strip(), required=field == 'assigned_date')
+    if 'progress_percentage' in changes:
+        changes['progress_percentage'] = parse_progress(str(changes['progress_percentage']).strip())
+    return changes
+
+
+class TaskStore:
+    """CRUD, queries and bulk operations on one task database.
+
+    Every method returns a concurrent.futures.Future; call `.result()` to
+    block. Writes submitted while the writer is busy are committed together
+    in one transaction, each inside its own savepoint, so a failing write
+    only fails its own future. Futures resolve after the commit.
+    """
+
+    def __init__(self, db_name, readers=READERS):
+        self.db_name = db_name
+        # Migrate once on one connection; the executor's and the feed's only check the version.
+        Database(db_name).close()
+        self.executor = DatabaseExecutor(db_name, readers=readers)
+        self.pending = []
+        self.lock = threading.Lock()
+        self.feed = None
+
+    def subscribe(self, callback):
+        """Call `callback(cursor, [(task_id, op), ...])` after commits from any process; see ChangeFeed."""
+        with self.lock:
+            if self.feed is None:
+                self.feed = ChangeFeed(self.db_name)
+                self.feed.subscribe(self.invalidate_cached)
+        self.feed.subscribe(callback)
+
+    def invalidate_cached(self, cursor, changes):
+        # Commits from other processes make their cached Task objects stale.
+        task_cache(self.db_name).invalidate(task_id for task_id, op in changes if op != 'I')
+
+    def unsubscribe(self, callback):
+        if self.feed is not None:
+            self.feed.unsubscribe(callback)
+
+    def changes_since(self, since, limit=None):
+        return self.executor.submit_read(Database.changes_since, since, limit)
+
+    def get(self, task_id):
+        """The Task with `task_id`, or None; served from the identity map when it is current."""
+        return self.executor.submit_read(Database.get_task, task_id)
+
+    def query(self, **kwargs):
+        return self.executor.submit_read(Database.query, **kwargs)
+
+    def search(self, text, **kwargs):
+        return self.executor.submit_read(Database.search, text, **kwargs)
+
+    def count(self, **filters):
+        return self.executor.submit_read(Database.count_tasks, **filters)
+
+    def stats(self):
+        from analytics import cached_stats
+        return self.executor.submit_read(cached_stats)
+
+    def create(self, task):
+        """Insert a task dict; the future's result is the new id."""
+        return self.write(INSERT_TASK, task_values(task), returns_id=True)
+
+    def create_many(self, tasks):
+        return self.write(INSERT_TASK, [task_values(task) for task in tasks], many=True)
+
+    def replace(self, task_id, task):
+        """Overwrite every column of a task; the future's result is the number of rows changed."""
+        return self.write(UPDATE_TASK, (*task_values(task), task_id))
+
+    def update(self, task_id, changes):
+        changes = normalize_changes(changes)
+        return self.write(update_fields_query(list(changes)), (*changes.values(), task_id))
+
+    def update_many(self, task_ids, changes):
+        changes = normalize_changes(changes)
+        values = tuple(changes.values())
+        return self.write(update_fields_query(list(changes)), [(*values, task_id) for task_id in task_ids], many=True)
+
+    def delete(self, task_id):
+        return self.write(DELETE_TASK, (task_id,))
+
+    def delete_many(self, task_ids):
+        return self.write(DELETE_TASK, [(task_id,) for task_id in task_ids], many=True)
+
+    def bulk_update(self, task_ids, changes, description=None):
+        """Apply `changes` to all of `task_ids` in one transaction that can be undone; the result is the batch id."""
+        changes = normalize_changes(changes)
+        task_ids = list(task_ids)
+        description = description or f"Set {', '.join(changes)} on {len(task_ids)} task(s)"
+        return self.write(self.undoable, (Database.update_tasks, description, task_ids, changes))
+
+    def bulk_delete(self, task_ids, description=None):
+        task_ids = list(task_ids)
+        description = description or f"Delete {len(task_ids)} task(s)"
+        return self.write(self.undoable, (Database.delete_tasks, description, task_ids))
+
+    def archive(self, task_ids, description=None):
+        """Move tasks to the archive tier, undoably."""
+        task_ids = list(task_ids)
+        description = description or f"Archive {len(task_ids)} task(s)"
+        return self.write(self.undoable, (Database.archive_tasks, description, task_ids))
+
+    def unarchive(self, task_ids, description=None):
+        task_ids = list(task_ids)
+        description = description or f"Unarchive {len(task_ids)} task(s)"
+        return self.write(self.undoable, (Database.unarchive_tasks, description, task_ids))
+
+    def archive_old(self, **policy):
+        """Apply the archive policy (see archive.archive_old_tasks); the result is how many tasks moved."""
+        from archive import archive_old_tasks
+        return self.executor.submit(archive_old_tasks, **policy)
+
+    def maintain(self, **options):
+        from archive import run_maintenance
+        return self.executor.submit(run_maintenance, **options)
+
+    def scan_artifacts(self, **options):
+        """Re-index the test-result files on a reader thread; the result is the scan summary.
+
+        Batches are saved through the writer, so the scan never holds the
+        write lock while it reads files. See artifacts.scan_artifacts.
+        """
+        from artifacts import scan_artifacts
+        return self.executor.submit_read(scan_artifacts, save=self.save_artifacts, **options)
+
+    def save_artifacts(self, rows, removed):
+        self.write(self.store_artifacts, (rows, removed)).result()
+
+    @staticmethod
+    def store_artifacts(db, rows, removed):
+        db.save_artifacts(rows, removed)
+        return len(rows), []
+
+    def snapshot(self, **options):
+        """Back up the database to a compressed snapshot; the result is its path (see snapshots.create_snapshot)."""
+        return self.executor.submit_read(self.take_snapshot, **options)
+
+    @staticmethod
+    def take_snapshot(db, **options):
+        from snapshots import create_snapshot
+        return create_snapshot(db.db_name, **options)
+
+    def compare_snapshot(self, path):
+        from snapshots import compare_snapshot
+        return self.executor.submit_read(compare_snapshot, path)
+
+    def restore_snapshot(self, path, description=None):
+        """Put the active tasks back as they were in the snapshot at `path`, undoably; the result is the batch id.
+
+        The snapshot is read on a reader thread, so the writer is held only
+        while the differences are applied.
+        """
+        description = description or f"Restore {os.path.basename(path)}"
+        return self.executor.submit_read(self.read_and_restore, path, description)
+
+    def read_and_restore(self, db, path, description):
+        from snapshots import read_snapshot, restore_tasks
+        return self.write(self.undoable, (restore_tasks, description, read_snapshot(path))).result()
+
+    @staticmethod
+    def undoable(db, operation, description, *args):
+        task_ids, inverse = operation(db, *args)
+        return db.record_batch(description, inverse), task_ids
+
+    def undo(self, batch_id=None):
+        """Revert the latest bulk operation (or `batch_id`); the result is (description, task ids) or None."""
+        return self.write(self.undo_batch, (batch_id,))
+
+    @staticmethod
+    def undo_batch(db, batch_id):
+        result = db.undo_batch(batch_id)
+        return result, result[1] if result else []
+
+    def undo_history(self):
+        return self.executor.submit_read(Database.undo_history)
+
+    def write(self, sql, params, many=False, returns_id=False):
+        """Queue a statement for the next group commit.
+
+        `sql` may instead be a function, called as `sql(db, *params)` inside
+        the transaction; it returns (result, ids of the tasks it wrote).
+        """
+        future = Future()
+        with self.lock:
+            self.pending.append((future, sql, params, many, returns_id))
+            # Only the first write of a group schedules a flush; later ones ride along.
+            start_flush = len(self.pending) == 1
+        if start_flush:
+            self.executor.submit(self.flush)
+        return future
+
+    def flush(self, db):
+        with self.lock:
+            batch, self.pending = self.pending, []
+        done, written = [], []
+        try:
+            db.conn.commit()
+            db.cursor.execute('BEGIN IMMEDIATE')
+            for future, sql, params, many, returns_id in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                db.cursor.execute('SAVEPOINT store_write')
+                try:
+                    if callable(sql):
+                        result, ids = sql(db, *params)
+                    elif many:
+                        db.cursor.executemany(sql, params)
+                    else:
+                        db.cursor.execute(sql, params)
+                except Exception as e:
+                    # Any failure (a bad parameter as much as a constraint) only fails its own write.
+                    db.cursor.execute('ROLLBACK TO store_write')
+                    future.set_exception(e)
+                else:
+                    if callable(sql):
+                        written.extend(ids)
+                    else:
+                        result = db.cursor.lastrowid if returns_id else db.cursor.rowcount
+                        if sql is not INSERT_TASK:
+                            written.extend([row[-1] for row in params] if many else [params[-1]])
+                    done.append((future, result))
+                db.cursor.execute('RELEASE store_write')
+            db.conn.commit()
+        except Exception as e:
+            # Never leave the write lock held or a half-applied batch for the next flush to commit.
+            if db.conn.in_transaction:
+                db.conn.rollback()
+            for future, _ in done:
+                future.set_exception(e)
+            for future, *_ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        # Only after the commit, so a concurrent read cannot re-cache the old values.
+        db.tasks.invalidate(written)
+        for future, result in done:
+            future.set_result(result)
+
+    def close(self, wait=True):
+        if self.feed is not None:
+            self.feed.stop()
+        self.executor.shutdown(wait)
+
+
+def query_options(params):
+    """Keyword arguments for Database.query/search from URL or CLI parameters."""
+    options = {name: params[name] for name in FILTERS if params.get(name)}
+    if params.get('order_by'):
+        options['order_by'] = params['order_by']
+    if params.get('desc') not in (None, '', '0', 'false', False):
+        options['descending'] = True
+    if params.get('include_archive') not in (None, '', '0', 'false', False):
+        options['include_archive'] = True
+    for name in ('limit', 'offset'):
+        if params.get(name) not in (None, ''):
+            options[name] = int(params[name])
+    return options
+
+
+REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class ApiServer:
+    """A small HTTP/1.1 JSON API over a TaskStore, with keep-alive connections.
+
+    GET    /tasks?status=&assigned_to=&priority=&artifact=&text=&q=&order_by=&desc=&limit=&offset=&include_archive=
+    GET    /tasks/<id>
+    POST   /tasks            body: a task object, or a list of them
+    PATCH  /tasks/<id>       body: the columns to change
+    PUT    /tasks/<id>       body: the whole task
+    DELETE /tasks/<id>
+    GET    /changes?since=<cursor>&wait=<seconds>
+    GET    /stats
+
+    /changes returns change-log entries after `since`; with `wait` it holds
+    the request open until something changes (long polling).
+    """
+
+    def __init__(self, store, host='127.0.0.1', port=DEFAULT_PORT):
+        self.store = store
+        self.host = host
+        self.port = port
+        self.server = None
+        self.handlers = {}
+        self.waiters = set()
+        self.loop = None
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.store.subscribe(self.on_change)
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Serving {self.store.db_name}.db on http://{self.host}:{self.port}/tasks")
+        async with self.server:
+            await self.server.serve_forever()
+
+    def on_change(self, cursor, changes):
+        self.loop.call_soon_threadsafe(self.wake_waiters)
+
+    def wake_waiters(self):
+        for waiter in self.waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self.waiters.clear()
+
+    async def stop(self):
+        self.store.unsubscribe(self.on_change)
+        self.server.close()
+        # Closing the connections ends each handler at its next read.
+        for writer in self.handlers.values():
+            writer.close()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        handler = asyncio.current_task()
+        self.handlers[handler] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length') or 0))
+                status, payload = await self.dispatch(method, target, body)
+                data = json.dumps(payload).encode()
+                keep_alive = headers.get('connection', '').lower() != 'close' and version != 'HTTP/1.0'
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    .encode('latin-1') + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.handlers.pop(handler, None)
+            writer.close()
+
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        parts = [part for part in url.path.split('/') if part]
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            if parts == ['stats'] and method == 'GET':
+                return 200, await asyncio.wrap_future(self.store.stats())
+            if parts == ['changes'] and method == 'GET':
+                return 200, await self.changes(int(params.get('since') or 0), float(params.get('wait') or 0))
+            if not parts or parts[0] != 'tasks' or len(parts) > 2:
+                return 404, {'error': 'not found'}
+            if len(parts) == 1:
+                return await self.tasks(method, params, body)
+            return await self.task(method, int(parts[1]), body)
+        except (ValueError, TypeError, KeyError, OverflowError) as e:
+            return 400, {'error': str(e)}
+        except sqlite3.Error as e:
+            return 500, {'error': str(e)}
+
+    async def changes(self, since, wait):
+        entries = await asyncio.wrap_future(self.store.changes_since(since, API_PAGE_SIZE))
+        if not entries and wait > 0:
+            waiter = self.loop.create_future()
+            self.waiters.add(waiter)
+            try:
+                await asyncio.wait_for(waiter, min(wait, MAX_CHANGE_WAIT))
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self.waiters.discard(waiter)
+            entries = await asyncio.wrap_future(self.store.changes_since(since, API_PAGE_SIZE))
+        return {
+            'cursor': entries[-1][0] if entries else since,
+            'changes': [{'id': task_id, 'op': op} for _, task_id, op in entries],
+        }
+
+    async def tasks(self, method, params, body):
+        if method == 'GET':
+            options = query_options(params)
+            options.setdefault('limit', API_PAGE_SIZE)
+            if params.get('q'):
+                options.pop('order_by', None)
+                options.pop('descending', None)
+                future = self.store.search(params['q'], **options)
+            else:
+                future = self.store.query(**options)
+            return 200, [task_dict(row) for row in await asyncio.wrap_future(future)]
+        if method == 'POST':
+            data = json.loads(body or b'null')
+            if isinstance(data, list):
+                return 201, {'created': await asyncio.wrap_future(self.store.create_many(data))}
+            if not isinstance(data, dict):
+                raise ValueError("expected a task object or a list of them")
+            return 201, {'id': await asyncio.wrap_future(self.store.create(data))}
+        return 405, {'error': f'{method} not allowed'}
+
+    async def task(self, method, task_id, body):
+        if method == 'GET':
+            task = await asyncio.wrap_future(self.store.get(task_id))
+            return (200, task_dict(task.row())) if task else (404, {'error': f'no task {task_id}'})
+        if method in ('PATCH', 'PUT'):
+            data = json.loads(body or b'null')
+            if not isinstance(data, dict):
+                raise ValueError("expected a task object")
+            data.pop('id', None)
+            future = self.store.update(task_id, data) if method == 'PATCH' else self.store.replace(task_id, data)
+        elif method == 'DELETE':
+            future = self.store.delete(task_id)
+        else:
+            return 405, {'error': f'{method} not allowed'}
+        changed = await asyncio.wrap_future(future)
+        return (200, {'changed': changed}) if changed else (404, {'error': f'no task {task_id}'})
+
+
+def serve(store, host='127.0.0.1', port=DEFAULT_PORT):
+    try:
+        asyncio.run(ApiServer(store, host, port).serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Work with a task database without the GUI")
+    parser.add_argument('db_name', help="database name, without the .db suffix")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    listing = commands.add_parser('list', help="print matching tasks as JSON lines")
+    for name in FILTERS:
+        listing.add_argument(f"--{name.replace('_', '-')}", dest=name)
+    listing.add_argument('--search', help="full-text search, best matches first")
+    listing.add_argument('--include-archive', dest='include_archive', action='store_true')
+    listing.add_argument('--order-by', dest='order_by')
+    listing.add_argument('--desc', action='store_true')
+    listing.add_argument('--limit', type=int)
+    listing.add_argument('--offset', type=int)
+
+    commands.add_parser('get', help="print one task").add_argument('task_id', type=int)
+
+    for name in ('add', 'update'):
+        command = commands.add_parser(name, help=f"{name} a task")
+        if name == 'update':
+            command.add_argument('task_id', type=int)
+        for field in TASK_FIELDS[1:]:
+            command.add_argument(f"--{field.replace('_', '-')}", dest=field)
+
+    commands.add_parser('delete', help="delete tasks").add_argument('task_ids', type=int, nargs='+')
+    bulk = commands.add_parser('bulk-update', help="set the same columns on many tasks, undoably")
+    bulk.add_argument('task_ids', type=int, nargs='+')
+    for field in ('status', 'assigned_to', 'priority', 'progress_percentage', 'completion_date'):
+        bulk.add_argument(f"--{field.replace('_', '-')}", dest=field)
+    commands.add_parser('undo', help="revert the latest bulk update or delete")
+    for name in ('archive', 'unarchive'):
+        commands.add_parser(name, help=f"{name} tasks, undoably").add_argument('task_ids', type=int, nargs='+')
+    archiving = commands.add_parser('archive-old', help="archive finished tasks by the archive policy")
+    archiving.add_argument('--days', type=int)
+    archiving.add_argument('--statuses', help="comma-separated, default Closed,Done")
+    maintaining = commands.add_parser('maintain', help="archive by policy, ANALYZE and VACUUM when worthwhile")
+    maintaining.add_argument('--vacuum', action='store_true', default=None, help="VACUUM even if little is free")
+    commands.add_parser('history', help="list bulk operations that can be undone")
+    commands.add_parser('scan-results', help="index the files behind test_result_path and report their status")
+    snapshot = commands.add_parser('snapshot', help="back up the database to a compressed snapshot")
+    snapshot.add_argument('--force', action='store_true', help="even if nothing changed since the last one")
+    snapshot.add_argument('--keep', type=int, help="then delete all but the newest KEEP snapshots")
+    commands.add_parser('snapshots', help="list the snapshots of the database")
+    for name in ('compare', 'restore'):
+        commands.add_parser(name, help=f"{name} the active tasks with a snapshot" if name == 'compare'
+                            else "restore the active tasks from a snapshot, undoably").add_argument('snapshot')
+    commands.add_parser('import', help="import a CSV export").add_argument('file_path')
+    commands.add_parser('export', help="export tasks (.csv, .jsonl, optionally .gz)").add_argument('file_path')
+    commands.add_parser('stats', help="print task statistics")
+    serve_parser = commands.add_parser('serve', help="run the HTTP API")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument('--auto-archive', dest='auto_archive', action='store_true',
+                              help="let the daily maintenance archive finished tasks by the archive policy")
+
+    args = parser.parse_args(argv)
+    store = TaskStore(args.db_name)
+    try:
+        if args.command == 'list':
+            options = query_options(vars(args))
+            future = store.search(args.search, **{k: v for k, v in options.items()
+                                                  if k not in ('order_by', 'descending')}) \
+                if args.search else store.query(**options)
+            for row in future.result():
+                print(json.dumps(task_dict(row)))
+        elif args.command == 'get':
+            task = store.get(args.task_id).result()
+            if task is None:
+                print(f"No task {args.task_id}", file=sys.stderr)
+                return 1
+            print(json.dumps(task_dict(task.row())))
+        elif args.command in ('add', 'update'):
+            fields = {field: getattr(args, field) for field in TASK_FIELDS[1:] if getattr(args, field) is not None}
+            if args.command == 'add':
+                print(store.create(fields).result())
+            elif not store.update(args.task_id, fields).result():
+                print(f"No task {args.task_id}", file=sys.stderr)
+                return 1
+        elif args.command == 'delete':
+            store.bulk_delete(args.task_ids).result()
+            print(f"Deleted task(s) {', '.join(map(str, args.task_ids))}; 'undo' restores them")
+        elif args.command == 'bulk-update':
+            fields = {field: getattr(args, field) for field in
+                      ('status', 'assigned_to', 'priority', 'progress_percentage', 'completion_date')
+                      if getattr(args, field) is not None}
+            store.bulk_update(args.task_ids, fields).result()
+            print(f"Updated {len(args.task_ids)} task(s); 'undo' reverts them")
+        elif args.command in ('archive', 'unarchive'):
+            (store.archive if args.command == 'archive' else store.unarchive)(args.task_ids).result()
+            print(f"{args.command.capitalize()}d {len(args.task_ids)} task(s)")
+        elif args.command == 'archive-old':
+            policy = {}
+            if args.days is not None:
+                policy['days'] = args.days
+            if args.statuses:
+                policy['statuses'] = [parse_status(status.strip()) for status in args.statuses.split(',')]
+            print(f"Archived {store.archive_old(**policy).result()} task(s)")
+        elif args.command == 'maintain':
+            print(json.dumps(store.maintain(vacuum=args.vacuum).result(), indent=2))
+        elif args.command == 'undo':
+            result = store.undo().result()
+            if result is None:
+                print("Nothing to undo", file=sys.stderr)
+                return 1
+            description, task_ids = result
+            print(f"Undid: {description} ({len(task_ids)} task(s))")
+        elif args.command == 'history':
+            for batch_id, created_at, description in store.undo_history().result():
+                print(f"{batch_id}\t{datetime.fromtimestamp(created_at):%Y-%m-%d %H:%M:%S}\t{description}")
+        elif args.command == 'scan-results':
+            print(json.dumps(store.scan_artifacts().result(), indent=2))
+        elif args.command == 'snapshot':
+            from snapshots import prune_snapshots
+            path = store.snapshot(if_changed=not args.force).result()
+            print(path or "Nothing changed since the last snapshot")
+            if args.keep is not None:
+                for removed in prune_snapshots(args.db_name, args.keep):
+                    print(f"Deleted {removed}")
+        elif args.command == 'snapshots':
+            from snapshots import list_snapshots
+            for path, taken_at, cursor in list_snapshots(args.db_name):
+                print(f"{datetime.fromtimestamp(taken_at):%Y-%m-%d %H:%M:%S}\t{cursor}\t{os.path.getsize(path)}\t{path}")
+        elif args.command == 'compare':
+            print(json.dumps(store.compare_snapshot(args.snapshot).result(), indent=2))
+        elif args.command == 'restore':
+            store.restore_snapshot(args.snapshot).result()
+            print(f"Restored the active tasks from {args.snapshot}; 'undo' reverts it")
+        elif args.command == 'import':
+            from bulk_import import import_csv
+            inserted, errors = store.executor.submit(import_csv, args.file_path).result()
+            for line_num, message in errors:
+                print(f"Line {line_num}: {message}", file=sys.stderr)
+            print(f"Imported {inserted} task(s), rejected {len(errors)}")
+        elif args.command == 'export':
+            from data_export import export_tasks
+            columns = [("Seq No", None)] + [(field, field) for field in TASK_FIELDS[1:]] + [("Task ID", 'id')]
+            print(f"Exported {store.executor.submit_read(export_tasks, args.file_path, columns).result()} task(s)")
+        elif args.command == 'stats':
+            print(json.dumps(store.stats().result(), indent=2))
+        elif args.command == 'serve':
+            from archive import MaintenanceScheduler
+            from snapshots import SnapshotScheduler
+            maintenance = MaintenanceScheduler(store.executor, archive=args.auto_archive)
+            snapshots = SnapshotScheduler(args.db_name)
+            serve(store, args.host, args.port)
+            maintenance.stop()
+            snapshots.stop()
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())